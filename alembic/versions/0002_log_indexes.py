@@ -0,0 +1,42 @@
+"""log explorer keyset indexes
+
+Revision ID: 0002_log_indexes
+Revises: 0001_initial
+Create Date: 2026-10-19
+"""
+from __future__ import annotations
+
+from alembic import op
+
+
+revision = "0002_log_indexes"
+down_revision = "0001_initial"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_audit_logs_created_at_id", "audit_logs", ["created_at", "id"], unique=False)
+    op.create_index("ix_audit_logs_actor_id_created_at", "audit_logs", ["actor_id", "created_at", "id"], unique=False)
+    op.create_index("ix_audit_logs_action_created_at", "audit_logs", ["action", "created_at", "id"], unique=False)
+    op.create_index("ix_audit_logs_ip_created_at", "audit_logs", ["ip", "created_at", "id"], unique=False)
+
+    op.create_index("ix_download_logs_created_at_id", "download_logs", ["created_at", "id"], unique=False)
+    op.create_index(
+        "ix_download_logs_app_type_id_created_at",
+        "download_logs",
+        ["app_type_id", "created_at", "id"],
+        unique=False,
+    )
+    op.create_index("ix_download_logs_ip_created_at", "download_logs", ["ip", "created_at", "id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_download_logs_ip_created_at", table_name="download_logs")
+    op.drop_index("ix_download_logs_app_type_id_created_at", table_name="download_logs")
+    op.drop_index("ix_download_logs_created_at_id", table_name="download_logs")
+
+    op.drop_index("ix_audit_logs_ip_created_at", table_name="audit_logs")
+    op.drop_index("ix_audit_logs_action_created_at", table_name="audit_logs")
+    op.drop_index("ix_audit_logs_actor_id_created_at", table_name="audit_logs")
+    op.drop_index("ix_audit_logs_created_at_id", table_name="audit_logs")
@@ -0,0 +1,30 @@
+"""listing keyset indexes
+
+Revision ID: 0003_listing_indexes
+Revises: 0002_log_indexes
+Create Date: 2026-10-19
+"""
+from __future__ import annotations
+
+from alembic import op
+
+
+revision = "0003_listing_indexes"
+down_revision = "0002_log_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_notices_created_at_id", "notices", ["created_at", "id"], unique=False)
+    op.create_index(
+        "ix_apk_versions_app_type_id_created_at",
+        "apk_versions",
+        ["app_type_id", "created_at", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_apk_versions_app_type_id_created_at", table_name="apk_versions")
+    op.drop_index("ix_notices_created_at_id", table_name="notices")
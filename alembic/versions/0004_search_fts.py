@@ -0,0 +1,55 @@
+"""full-text search tables
+
+Revision ID: 0004_search_fts
+Revises: 0003_listing_indexes
+Create Date: 2026-10-19
+"""
+from __future__ import annotations
+
+from alembic import op
+
+
+revision = "0004_search_fts"
+down_revision = "0003_listing_indexes"
+branch_labels = None
+depends_on = None
+
+
+FTS_TABLES = {
+    "app_types_fts": ("app_types", ["name", "description"]),
+    "apk_versions_fts": ("apk_versions", ["release_note"]),
+    "notices_fts": ("notices", ["title", "content"]),
+}
+
+
+def upgrade() -> None:
+    for fts_name, (source, columns) in FTS_TABLES.items():
+        column_list = ", ".join(columns)
+        new_values = ", ".join(f"new.{c}" for c in columns)
+        old_values = ", ".join(f"old.{c}" for c in columns)
+
+        op.execute(
+            f"CREATE VIRTUAL TABLE {fts_name} USING fts5("
+            f"{column_list}, content='{source}', content_rowid='id', tokenize='trigram')"
+        )
+        op.execute(
+            f"CREATE TRIGGER {fts_name}_ai AFTER INSERT ON {source} BEGIN "
+            f"INSERT INTO {fts_name}(rowid, {column_list}) VALUES (new.id, {new_values}); END"
+        )
+        op.execute(
+            f"CREATE TRIGGER {fts_name}_ad AFTER DELETE ON {source} BEGIN "
+            f"INSERT INTO {fts_name}({fts_name}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); END"
+        )
+        op.execute(
+            f"CREATE TRIGGER {fts_name}_au AFTER UPDATE ON {source} BEGIN "
+            f"INSERT INTO {fts_name}({fts_name}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); "
+            f"INSERT INTO {fts_name}(rowid, {column_list}) VALUES (new.id, {new_values}); END"
+        )
+        op.execute(f"INSERT INTO {fts_name}({fts_name}) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    for fts_name in reversed(list(FTS_TABLES)):
+        for suffix in ("au", "ad", "ai"):
+            op.execute(f"DROP TRIGGER IF EXISTS {fts_name}_{suffix}")
+        op.execute(f"DROP TABLE IF EXISTS {fts_name}")
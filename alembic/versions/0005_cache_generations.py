@@ -0,0 +1,30 @@
+"""cache generation counters
+
+Revision ID: 0005_cache_generations
+Revises: 0004_search_fts
+Create Date: 2026-10-19
+"""
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "0005_cache_generations"
+down_revision = "0004_search_fts"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "cache_generations",
+        sa.Column("name", sa.String(length=64), nullable=False),
+        sa.Column("generation", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("updated_at", sa.DateTime(), nullable=False, server_default=sa.text("CURRENT_TIMESTAMP")),
+        sa.PrimaryKeyConstraint("name"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("cache_generations")
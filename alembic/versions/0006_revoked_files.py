@@ -0,0 +1,31 @@
+"""revoked download files
+
+Revision ID: 0006_revoked_files
+Revises: 0005_cache_generations
+Create Date: 2026-10-19
+"""
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "0006_revoked_files"
+down_revision = "0005_cache_generations"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "revoked_files",
+        sa.Column("apk_file_id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("revoked_at", sa.DateTime(), nullable=False, server_default=sa.text("CURRENT_TIMESTAMP")),
+        sa.PrimaryKeyConstraint("apk_file_id"),
+    )
+    op.create_index("ix_revoked_files_revoked_at", "revoked_files", ["revoked_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_revoked_files_revoked_at", table_name="revoked_files")
+    op.drop_table("revoked_files")
@@ -0,0 +1,41 @@
+"""apk crc32 and device profiles
+
+Revision ID: 0007_bundles
+Revises: 0006_revoked_files
+Create Date: 2026-10-19
+"""
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "0007_bundles"
+down_revision = "0006_revoked_files"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("apk_files", sa.Column("crc32", sa.Integer(), nullable=True))
+
+    op.create_table(
+        "device_profiles",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(length=120), nullable=False),
+        sa.Column("slug", sa.String(length=120), nullable=False),
+        sa.Column("app_slugs", sa.Text(), nullable=False, server_default=""),
+        sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.text("CURRENT_TIMESTAMP")),
+        sa.Column("updated_at", sa.DateTime(), nullable=False, server_default=sa.text("CURRENT_TIMESTAMP")),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("name"),
+        sa.UniqueConstraint("slug"),
+    )
+    op.create_index("ix_device_profiles_slug", "device_profiles", ["slug"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_device_profiles_slug", table_name="device_profiles")
+    op.drop_table("device_profiles")
+    with op.batch_alter_table("apk_files") as batch_op:
+        batch_op.drop_column("crc32")
@@ -0,0 +1,32 @@
+"""server-side admin sessions
+
+Revision ID: 0008_admin_sessions
+Revises: 0007_bundles
+Create Date: 2026-10-19
+"""
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "0008_admin_sessions"
+down_revision = "0007_bundles"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "admin_sessions",
+        sa.Column("id", sa.String(length=64), nullable=False),
+        sa.Column("data", sa.Text(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_admin_sessions_expires_at", "admin_sessions", ["expires_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_admin_sessions_expires_at", table_name="admin_sessions")
+    op.drop_table("admin_sessions")
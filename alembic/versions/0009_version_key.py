@@ -0,0 +1,91 @@
+"""sortable version key
+
+Revision ID: 0009_version_key
+Revises: 0008_admin_sessions
+Create Date: 2026-10-19
+"""
+from __future__ import annotations
+
+import re
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "0009_version_key"
+down_revision = "0008_admin_sessions"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+_TOKEN = re.compile(r"\d+|[^\d]+")
+
+
+# Frozen copy of appdownloader.versioning.version_key as of this revision; the
+# live function has since changed format (see 0016_version_key_lengths).
+def _number(digits: str) -> str:
+    return (digits.lstrip("0") or "0").rjust(10, "0")
+
+
+def _segment(text: str) -> str:
+    return "".join(_number(token) if token.isdigit() else token.lower() for token in _TOKEN.findall(text))
+
+
+def version_key(version: str) -> str:
+    value = version.strip()
+    if value[:1] in ("v", "V") and value[1:2].isdigit():
+        value = value[1:]
+    value = value.split("+", 1)[0]
+    core, _sep, prerelease = value.partition("-")
+
+    segments = [_segment(part) for part in core.split(".") if part]
+    while len(segments) > 1 and segments[-1] == _number("0"):
+        segments.pop()
+    key = ".".join(segments)
+    if prerelease:
+        identifiers = [_segment(part) for part in re.split(r"[.\-_]", prerelease) if part]
+        return key + "!" + ".".join(identifiers)
+    return key + "-"
+
+
+def upgrade() -> None:
+    op.add_column(
+        "apk_versions",
+        sa.Column("version_key", sa.String(length=255), nullable=False, server_default=""),
+    )
+
+    bind = op.get_bind()
+    versions = sa.table("apk_versions", sa.column("id", sa.Integer), sa.column("version", sa.String))
+    update = sa.text("UPDATE apk_versions SET version_key = :version_key WHERE id = :id")
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(versions.c.id, versions.c.version)
+            .where(versions.c.id > last_id)
+            .order_by(versions.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        bind.execute(update, [{"id": row_id, "version_key": version_key(version)} for row_id, version in rows])
+        last_id = rows[-1][0]
+
+    op.drop_index("ix_apk_versions_app_type_id_created_at", table_name="apk_versions")
+    op.create_index(
+        "ix_apk_versions_app_type_id_version_key",
+        "apk_versions",
+        ["app_type_id", "version_key", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_apk_versions_app_type_id_version_key", table_name="apk_versions")
+    op.create_index(
+        "ix_apk_versions_app_type_id_created_at",
+        "apk_versions",
+        ["app_type_id", "created_at", "id"],
+        unique=False,
+    )
+    with op.batch_alter_table("apk_versions") as batch_op:
+        batch_op.drop_column("version_key")
@@ -0,0 +1,38 @@
+"""release channels and staged rollouts
+
+Revision ID: 0010_release_channels
+Revises: 0009_version_key
+Create Date: 2026-10-19
+"""
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "0010_release_channels"
+down_revision = "0009_version_key"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "release_channels",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("app_type_id", sa.Integer(), nullable=False),
+        sa.Column("channel", sa.String(length=20), nullable=False),
+        sa.Column("apk_version_id", sa.Integer(), nullable=True),
+        sa.Column("rollout_version_id", sa.Integer(), nullable=True),
+        sa.Column("rollout_percent", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(), nullable=False, server_default=sa.text("CURRENT_TIMESTAMP")),
+        sa.ForeignKeyConstraint(["app_type_id"], ["app_types.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["apk_version_id"], ["apk_versions.id"], ondelete="SET NULL"),
+        sa.ForeignKeyConstraint(["rollout_version_id"], ["apk_versions.id"], ondelete="SET NULL"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("app_type_id", "channel", name="uq_release_channels_app_type_channel"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("release_channels")
@@ -0,0 +1,34 @@
+"""indexes for hot lookups found by the query plan tests
+
+Revision ID: 0011_hot_query_indexes
+Revises: 0010_release_channels
+Create Date: 2026-10-19
+"""
+from __future__ import annotations
+
+from alembic import op
+
+
+revision = "0011_hot_query_indexes"
+down_revision = "0010_release_channels"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_apk_files_sha256", "apk_files", ["sha256"], unique=False)
+    op.create_index("ix_apk_files_stored_path", "apk_files", ["stored_path"], unique=False)
+    op.create_index("ix_apk_versions_updated_at", "apk_versions", ["updated_at"], unique=False)
+    op.create_index(
+        "ix_notices_is_visible_is_pinned_created_at",
+        "notices",
+        ["is_visible", "is_pinned", "created_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_notices_is_visible_is_pinned_created_at", table_name="notices")
+    op.drop_index("ix_apk_versions_updated_at", table_name="apk_versions")
+    op.drop_index("ix_apk_files_stored_path", table_name="apk_files")
+    op.drop_index("ix_apk_files_sha256", table_name="apk_files")
@@ -0,0 +1,44 @@
+"""fire search update triggers only on indexed columns
+
+Revision ID: 0012_search_update_triggers
+Revises: 0011_hot_query_indexes
+Create Date: 2026-10-19
+"""
+from __future__ import annotations
+
+from alembic import op
+
+
+revision = "0012_search_update_triggers"
+down_revision = "0011_hot_query_indexes"
+branch_labels = None
+depends_on = None
+
+
+FTS_TABLES = {
+    "app_types_fts": ("app_types", ["name", "description"]),
+    "apk_versions_fts": ("apk_versions", ["release_note"]),
+    "notices_fts": ("notices", ["title", "content"]),
+}
+
+
+def _create_update_trigger(fts_name: str, source: str, columns: list[str], watched: str) -> None:
+    column_list = ", ".join(columns)
+    new_values = ", ".join(f"new.{c}" for c in columns)
+    old_values = ", ".join(f"old.{c}" for c in columns)
+    op.execute(f"DROP TRIGGER IF EXISTS {fts_name}_au")
+    op.execute(
+        f"CREATE TRIGGER {fts_name}_au AFTER UPDATE{watched} ON {source} BEGIN "
+        f"INSERT INTO {fts_name}({fts_name}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {fts_name}(rowid, {column_list}) VALUES (new.id, {new_values}); END"
+    )
+
+
+def upgrade() -> None:
+    for fts_name, (source, columns) in FTS_TABLES.items():
+        _create_update_trigger(fts_name, source, columns, f" OF {', '.join(columns)}")
+
+
+def downgrade() -> None:
+    for fts_name, (source, columns) in FTS_TABLES.items():
+        _create_update_trigger(fts_name, source, columns, "")
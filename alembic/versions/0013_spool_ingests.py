@@ -0,0 +1,32 @@
+"""ledger of ingested download spool files
+
+Revision ID: 0013_spool_ingests
+Revises: 0012_search_update_triggers
+Create Date: 2026-10-19
+"""
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "0013_spool_ingests"
+down_revision = "0012_search_update_triggers"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "spool_ingests",
+        sa.Column("name", sa.String(length=255), nullable=False),
+        sa.Column("rows", sa.Integer(), nullable=False),
+        sa.Column("ingested_at", sa.DateTime(), nullable=False, server_default=sa.text("CURRENT_TIMESTAMP")),
+        sa.PrimaryKeyConstraint("name"),
+    )
+    op.create_index("ix_spool_ingests_ingested_at", "spool_ingests", ["ingested_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_spool_ingests_ingested_at", table_name="spool_ingests")
+    op.drop_table("spool_ingests")
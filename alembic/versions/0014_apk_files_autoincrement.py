@@ -0,0 +1,38 @@
+"""never reuse apk_files ids
+
+Revision ID: 0014_apk_files_autoincrement
+Revises: 0013_spool_ingests
+Create Date: 2026-10-19
+"""
+from __future__ import annotations
+
+from alembic import op
+
+
+revision = "0014_apk_files_autoincrement"
+down_revision = "0013_spool_ingests"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("apk_files", recreate="always", table_kwargs={"sqlite_autoincrement": True}):
+        pass
+    # Ids of already deleted files may sit above the current maximum and still
+    # be referenced by revocations and outstanding signed links.
+    op.execute(
+        "INSERT INTO sqlite_sequence (name, seq) SELECT 'apk_files', 0 "
+        "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'apk_files')"
+    )
+    op.execute(
+        "UPDATE sqlite_sequence SET seq = max(seq, "
+        "(SELECT coalesce(max(id), 0) FROM apk_files), "
+        "(SELECT coalesce(max(apk_file_id), 0) FROM revoked_files), "
+        "(SELECT coalesce(max(apk_file_id), 0) FROM download_logs)) "
+        "WHERE name = 'apk_files'"
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("apk_files", recreate="always", table_kwargs={"sqlite_autoincrement": False}):
+        pass
@@ -0,0 +1,33 @@
+"""dedupe download pings by token
+
+Revision ID: 0015_download_ping_ids
+Revises: 0014_apk_files_autoincrement
+Create Date: 2026-10-19
+"""
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "0015_download_ping_ids"
+down_revision = "0014_apk_files_autoincrement"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("download_logs", sa.Column("ping_id", sa.String(length=32), nullable=True))
+    op.create_index(
+        "ux_download_logs_ping_id",
+        "download_logs",
+        ["ping_id"],
+        unique=True,
+        sqlite_where=sa.text("ping_id IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ux_download_logs_ping_id", table_name="download_logs")
+    with op.batch_alter_table("download_logs") as batch_op:
+        batch_op.drop_column("ping_id")
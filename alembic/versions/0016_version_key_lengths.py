@@ -0,0 +1,79 @@
+"""length-prefixed numbers in version_key
+
+Revision ID: 0016_version_key_lengths
+Revises: 0015_download_ping_ids
+Create Date: 2026-10-19
+"""
+from __future__ import annotations
+
+import re
+from collections.abc import Callable
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "0016_version_key_lengths"
+down_revision = "0015_download_ping_ids"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+_TOKEN = re.compile(r"\d+|[^\d]+")
+
+
+# Frozen copies of both key formats so this revision never depends on the
+# live appdownloader.versioning module.
+def _padded(digits: str) -> str:
+    return (digits.lstrip("0") or "0").rjust(10, "0")
+
+
+def _length_prefixed(digits: str) -> str:
+    digits = (digits.lstrip("0") or "0")[:99]
+    return f"{len(digits):02d}{digits}"
+
+
+def _version_key(version: str, number: Callable[[str], str]) -> str:
+    def segment(text: str) -> str:
+        return "".join(number(token) if token.isdigit() else token.lower() for token in _TOKEN.findall(text))
+
+    value = version.strip()
+    if value[:1] in ("v", "V") and value[1:2].isdigit():
+        value = value[1:]
+    value = value.split("+", 1)[0]
+    core, _sep, prerelease = value.partition("-")
+
+    segments = [segment(part) for part in core.split(".") if part]
+    while len(segments) > 1 and segments[-1] == number("0"):
+        segments.pop()
+    key = ".".join(segments)
+    if prerelease:
+        identifiers = [segment(part) for part in re.split(r"[.\-_]", prerelease) if part]
+        return key + "!" + ".".join(identifiers)
+    return key + "-"
+
+
+def _recompute(number: Callable[[str], str]) -> None:
+    bind = op.get_bind()
+    versions = sa.table("apk_versions", sa.column("id", sa.Integer), sa.column("version", sa.String))
+    update = sa.text("UPDATE apk_versions SET version_key = :version_key WHERE id = :id")
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(versions.c.id, versions.c.version)
+            .where(versions.c.id > last_id)
+            .order_by(versions.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        bind.execute(update, [{"id": row_id, "version_key": _version_key(version, number)} for row_id, version in rows])
+        last_id = rows[-1][0]
+
+
+def upgrade() -> None:
+    _recompute(_length_prefixed)
+
+
+def downgrade() -> None:
+    _recompute(_padded)
@@ -1,26 +1,26 @@
 param(
   [string]$ProjectRoot = "C:\\InternalApkHub",
-  [string]$BackupRoot = "C:\\InternalApkHub\\backups"
+  [string]$BackupRoot = "C:\\InternalApkHub\\backups",
+  [string]$BaseArchive = ""
 )
 
 $ErrorActionPreference = "Stop"
 
 $Timestamp = Get-Date -Format "yyyyMMdd_HHmmss"
-$TargetDir = Join-Path $BackupRoot $Timestamp
-New-Item -ItemType Directory -Path $TargetDir -Force | Out-Null
+New-Item -ItemType Directory -Path $BackupRoot -Force | Out-Null
 
-$DbPath = Join-Path $ProjectRoot "data\\app.db"
-$ApkPath = Join-Path $ProjectRoot "data\\apk"
+$ArchivePath = Join-Path $BackupRoot "apkhub_backup_$Timestamp.tar"
 
-if (Test-Path $DbPath) {
-  Copy-Item $DbPath (Join-Path $TargetDir "app.db") -Force
+Push-Location $ProjectRoot
+try {
+  if ($BaseArchive -ne "") {
+    uv run appdownloader backup $ArchivePath --base $BaseArchive
+  } else {
+    uv run appdownloader backup $ArchivePath
+  }
+  if ($LASTEXITCODE -ne 0) { throw "appdownloader backup failed ($LASTEXITCODE)" }
+} finally {
+  Pop-Location
 }
 
-if (Test-Path $ApkPath) {
-  Copy-Item $ApkPath (Join-Path $TargetDir "apk") -Recurse -Force
-}
-
-$ZipPath = Join-Path $BackupRoot "apkhub_backup_$Timestamp.zip"
-Compress-Archive -Path "$TargetDir\\*" -DestinationPath $ZipPath -Force
-
-Write-Host "Backup complete: $ZipPath"
+Write-Host "Backup complete: $ArchivePath"
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare two-commit audit logging with one transaction per action.")
+    parser.add_argument("--actions", type=int, default=300)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    tmp_dir = Path(tempfile.mkdtemp(prefix="bench-admin-"))
+    os.environ["DATABASE_URL"] = f"sqlite:///{(tmp_dir / 'bench.db').as_posix()}"
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+    from appdownloader.audit import AuditTrail
+    from appdownloader.cache import bump_generation
+    from appdownloader.db import SessionLocal, init_db
+    from appdownloader.models import AuditLog, Notice
+
+    init_db()
+    db = SessionLocal()
+    notice = Notice(title="bench", content="bench")
+    db.add(notice)
+    db.commit()
+    notice_id = notice.id
+    db.close()
+
+    def legacy() -> None:
+        db = SessionLocal()
+        try:
+            target = db.get(Notice, notice_id)
+            target.is_visible = not target.is_visible
+            bump_generation(db)
+            db.commit()
+            db.add(
+                AuditLog(
+                    actor_type="admin",
+                    actor_id=1,
+                    action="toggle_notice_visibility",
+                    target_type="notice",
+                    target_id=notice_id,
+                    ip="127.0.0.1",
+                    user_agent="bench",
+                )
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def unit_of_work() -> None:
+        db = SessionLocal()
+        try:
+            audit = AuditTrail(db, ip="127.0.0.1", user_agent="bench")
+            target = db.get(Notice, notice_id)
+            target.is_visible = not target.is_visible
+            audit.record("toggle_notice_visibility", "notice", target, actor_id=1)
+            bump_generation(db)
+            db.commit()
+        finally:
+            db.close()
+
+    results: dict[str, list[float]] = {"two commits": [], "one transaction": []}
+    for _round in range(args.rounds):
+        for label, action in (("two commits", legacy), ("one transaction", unit_of_work)):
+            started = time.perf_counter()
+            for _ in range(args.actions):
+                action()
+            results[label].append((time.perf_counter() - started) * 1000 / args.actions)
+
+    for label, samples in results.items():
+        print(f"{label:>16}: median {statistics.median(samples):.3f} ms/action (min {min(samples):.3f})")
+    baseline = statistics.median(results["two commits"])
+    improved = statistics.median(results["one transaction"])
+    print(f"{'speedup':>16}: {baseline / improved:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
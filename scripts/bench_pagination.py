@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session, joinedload
+
+from appdownloader.models import ApkVersion, AppType, Base, Notice
+from appdownloader.pagination import keyset_page
+from appdownloader.versioning import version_key
+
+
+def seed(session: Session, rows: int) -> int:
+    base = datetime(2020, 1, 1)
+    app_type = AppType(name="Bench App", slug="bench-app", is_active=True)
+    session.add(app_type)
+    session.flush()
+
+    session.execute(
+        insert(Notice),
+        [
+            {"title": f"notice {i}", "content": "x" * 200, "created_at": base + timedelta(minutes=i)}
+            for i in range(rows)
+        ],
+    )
+    session.execute(
+        insert(AppType),
+        [{"name": f"app {i:06d}", "slug": f"app-{i:06d}"} for i in range(rows)],
+    )
+    session.execute(
+        insert(ApkVersion),
+        [
+            {
+                "app_type_id": app_type.id,
+                "version": f"1.{i}",
+                "version_key": version_key(f"1.{i}"),
+                "created_at": base + timedelta(minutes=i),
+            }
+            for i in range(rows)
+        ],
+    )
+    session.commit()
+    return app_type.id
+
+
+def timed(label: str, fn, repeat: int) -> None:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed_ms = (time.perf_counter() - started) * 1000 / repeat
+    print(f"{label:<40} {elapsed_ms:9.2f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare full listing loads with keyset pages.")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        engine = create_engine(f"sqlite:///{(Path(tmp_dir) / 'bench.db').as_posix()}")
+        Base.metadata.create_all(bind=engine)
+
+        with Session(engine) as session:
+            app_type_id = seed(session, args.rows)
+
+            def versions_query():
+                return (
+                    session.query(ApkVersion)
+                    .options(joinedload(ApkVersion.current_file))
+                    .filter(ApkVersion.app_type_id == app_type_id)
+                )
+
+            def deep_cursor(query, columns, descending=True) -> str | None:
+                cursor = None
+                for _ in range(50):
+                    cursor = keyset_page(
+                        query, columns, cursor=cursor, descending=descending, limit=args.page_size
+                    ).next_cursor
+                return cursor
+
+            notices_cursor = deep_cursor(session.query(Notice), [Notice.created_at, Notice.id])
+            apps_cursor = deep_cursor(session.query(AppType), [AppType.name, AppType.id], descending=False)
+            versions_cursor = deep_cursor(versions_query(), [ApkVersion.version_key, ApkVersion.id])
+            session.expunge_all()
+
+            print(f"rows={args.rows} page_size={args.page_size}")
+            timed(
+                "notices .all()",
+                lambda: session.query(Notice).order_by(Notice.created_at.desc()).all(),
+                args.repeat,
+            )
+            timed(
+                "notices keyset (page 51)",
+                lambda: keyset_page(
+                    session.query(Notice),
+                    [Notice.created_at, Notice.id],
+                    cursor=notices_cursor,
+                    limit=args.page_size,
+                ),
+                args.repeat,
+            )
+            timed(
+                "app types .all()",
+                lambda: session.query(AppType).order_by(AppType.name.asc()).all(),
+                args.repeat,
+            )
+            timed(
+                "app types keyset (page 51)",
+                lambda: keyset_page(
+                    session.query(AppType),
+                    [AppType.name, AppType.id],
+                    cursor=apps_cursor,
+                    descending=False,
+                    limit=args.page_size,
+                ),
+                args.repeat,
+            )
+            timed(
+                "versions .all()",
+                lambda: versions_query().order_by(ApkVersion.version_key.desc(), ApkVersion.id.desc()).all(),
+                args.repeat,
+            )
+            timed(
+                "versions keyset (page 51)",
+                lambda: keyset_page(
+                    versions_query(),
+                    [ApkVersion.version_key, ApkVersion.id],
+                    cursor=versions_cursor,
+                    limit=args.page_size,
+                ),
+                args.repeat,
+            )
+
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
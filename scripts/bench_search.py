@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from appdownloader.models import ApkVersion, AppType, Base, Notice
+from appdownloader.search import install_search_index, search_catalog
+
+
+COMMON_WORDS = [
+    "재고", "바코드", "스캐너", "출고", "입고", "라벨", "프린터", "오류", "수정", "개선",
+    "동기화", "로그인", "배터리", "네트워크", "설비", "점검", "warehouse", "scanner", "printer", "sync",
+]
+SYLLABLES = ["가", "나", "다", "라", "마", "바", "사", "아", "자", "차", "카", "타", "파", "하", "고", "노", "도", "로"]
+
+
+def build_vocabulary(rng: random.Random, size: int) -> tuple[list[str], list[float]]:
+    words = list(COMMON_WORDS)
+    while len(words) < size:
+        words.append("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    weights = [1.0 / (rank + 1) for rank in range(len(words))]
+    return words, weights
+
+
+def sentence(rng: random.Random, vocabulary: tuple[list[str], list[float]], length: int) -> str:
+    words, weights = vocabulary
+    return " ".join(rng.choices(words, weights=weights, k=length))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure /search query latency over FTS5 tables.")
+    parser.add_argument("--documents", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--vocabulary", type=int, default=5000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    vocabulary = build_vocabulary(rng, args.vocabulary)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        engine = create_engine(f"sqlite:///{(Path(tmp_dir) / 'bench.db').as_posix()}")
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as connection:
+            install_search_index(connection)
+
+        per_kind = args.documents // 3
+        with Session(engine) as session:
+            session.execute(
+                insert(AppType),
+                [
+                    {"name": f"앱 {i}", "slug": f"app-{i}", "description": sentence(rng, vocabulary, 8)}
+                    for i in range(per_kind)
+                ],
+            )
+            session.execute(
+                insert(ApkVersion),
+                [
+                    {"app_type_id": rng.randint(1, per_kind), "version": f"1.0.{i}", "release_note": sentence(rng, vocabulary, 20)}
+                    for i in range(per_kind)
+                ],
+            )
+            session.execute(
+                insert(Notice),
+                [{"title": sentence(rng, vocabulary, 4), "content": sentence(rng, vocabulary, 30)} for _ in range(per_kind)],
+            )
+            session.commit()
+
+            print(f"documents={per_kind * 3}")
+            for query in ["바코드 스캐너", "warehouse sync", "배터리", "재고", "printer"]:
+                timings = []
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    results = search_catalog(session, query)
+                    timings.append((time.perf_counter() - started) * 1000)
+                print(
+                    f"{query!r:<20} hits={results.total:<3} "
+                    f"median={statistics.median(timings):7.2f} ms  p95={sorted(timings)[int(len(timings) * 0.95)]:7.2f} ms"
+                )
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
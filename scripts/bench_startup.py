@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+
+PROBE = r"""
+import json, resource, sys, time
+started = time.perf_counter()
+import appdownloader.main as main
+imported = time.perf_counter()
+for handler in main.app.router.on_startup:
+    handler()
+ready = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "startup_ms": (ready - imported) * 1000,
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "modules": len(sys.modules),
+    "routes": len(main.app.routes),
+}))
+"""
+
+
+def probe(mode: str, env: dict[str, str]) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        env={**env, "SERVE_MODE": mode},
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare cold start of the full app with edge mode.")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    src_dir = Path(__file__).resolve().parents[1] / "src"
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_dir = Path(tmp_dir)
+        env = {
+            **os.environ,
+            "PYTHONPATH": str(src_dir),
+            "DATABASE_URL": f"sqlite:///{(data_dir / 'app.db').as_posix()}",
+            "FILES_ROOT": (data_dir / "apk").as_posix(),
+            "TMP_ROOT": (data_dir / "tmp").as_posix(),
+            "ADMIN_PASSWORD": "bench-password",
+        }
+        probe("full", env)
+
+        print(f"{'mode':<6} {'import ms':>10} {'startup ms':>11} {'max RSS MB':>11} {'modules':>8} {'routes':>7}")
+        for mode in ("full", "edge"):
+            runs = [probe(mode, env) for _ in range(args.repeat)]
+            print(
+                f"{mode:<6} {statistics.median(r['import_ms'] for r in runs):10.1f} "
+                f"{statistics.median(r['startup_ms'] for r in runs):11.1f} "
+                f"{statistics.median(r['rss_mb'] for r in runs):11.1f} "
+                f"{runs[0]['modules']:8d} {runs[0]['routes']:7d}"
+            )
+
+
+if __name__ == "__main__":
+    main()
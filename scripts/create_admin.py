@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import getpass
 
-from appdownloader.auth import hash_password
+from appdownloader.auth import set_admin_password
 from appdownloader.db import SessionLocal, init_db
 from appdownloader.models import AdminUser
 
@@ -20,15 +20,10 @@ def main() -> None:
             raise ValueError("password is required")
 
         existing = db.query(AdminUser).filter(AdminUser.username == username).first()
+        set_admin_password(db, username, password, create=True)
         if existing:
-            existing.password_hash = hash_password(password)
-            db.commit()
             print(f"Updated admin password for '{username}'.")
             return
-
-        admin = AdminUser(username=username, password_hash=hash_password(password))
-        db.add(admin)
-        db.commit()
         print(f"Created admin user '{username}'.")
     finally:
         db.close()
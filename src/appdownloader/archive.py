@@ -0,0 +1,296 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+from collections.abc import Iterator
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from sqlalchemy import and_, delete, func, select
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .models import AuditLog, DownloadLog
+from .utils import ensure_dir
+
+
+ARCHIVE_MODELS = {
+    "download_logs": DownloadLog,
+    "audit_logs": AuditLog,
+}
+
+INDEX_FILENAME = "index.json"
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _month_bounds(value: datetime) -> tuple[datetime, datetime]:
+    start = value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    if start.month == 12:
+        end = start.replace(year=start.year + 1, month=1)
+    else:
+        end = start.replace(month=start.month + 1)
+    return start, end
+
+
+def _table_dir(table_name: str, root: Path | None = None) -> Path:
+    if table_name not in ARCHIVE_MODELS:
+        raise ValueError(f"unsupported archive table: {table_name}")
+    return (root or settings.archive_root) / table_name
+
+
+def load_index(table_name: str, root: Path | None = None) -> list[dict]:
+    index_path = _table_dir(table_name, root) / INDEX_FILENAME
+    if not index_path.exists():
+        return []
+    return json.loads(index_path.read_text(encoding="utf-8"))["segments"]
+
+
+def _save_index(table_name: str, segments: list[dict], root: Path | None = None) -> None:
+    table_dir = _table_dir(table_name, root)
+    ensure_dir(table_dir)
+    index_path = table_dir / INDEX_FILENAME
+    tmp_path = index_path.with_suffix(".json.tmp")
+    tmp_path.write_text(json.dumps({"segments": segments}, ensure_ascii=False, indent=1), encoding="utf-8")
+    os.replace(tmp_path, index_path)
+
+
+def _encode_row(row: dict) -> str:
+    return json.dumps(
+        {key: value.isoformat() if isinstance(value, datetime) else value for key, value in row.items()},
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+
+
+def _decode_row(line: str) -> dict:
+    row = json.loads(line)
+    row["created_at"] = datetime.fromisoformat(row["created_at"])
+    return row
+
+
+def _write_segment(
+    db: Session,
+    table_name: str,
+    month_start: datetime,
+    month_end: datetime,
+    batch_size: int,
+    root: Path | None = None,
+) -> dict | None:
+    table = ARCHIVE_MODELS[table_name].__table__
+    month_dir = _table_dir(table_name, root) / f"{month_start:%Y-%m}"
+    ensure_dir(month_dir)
+    tmp_path = month_dir / f".segment-{os.getpid()}.jsonl.gz.tmp"
+
+    # Leftovers of indexed segments are deleted before a month is read again,
+    # so every row still in the window is unarchived regardless of how its id
+    # relates to earlier segments.
+    rows = 0
+    first_id = None
+    last_id = 0
+    min_created = None
+    max_created = None
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as out:
+        while True:
+            batch = (
+                db.execute(
+                    select(table)
+                    .where(
+                        table.c.created_at >= month_start,
+                        table.c.created_at < month_end,
+                        table.c.id > last_id,
+                    )
+                    .order_by(table.c.id.asc())
+                    .limit(batch_size)
+                )
+                .mappings()
+                .all()
+            )
+            if not batch:
+                break
+            for row in batch:
+                out.write(_encode_row(dict(row)))
+                out.write("\n")
+                created = row["created_at"]
+                min_created = created if min_created is None else min(min_created, created)
+                max_created = created if max_created is None else max(max_created, created)
+            if first_id is None:
+                first_id = batch[0]["id"]
+            last_id = batch[-1]["id"]
+            rows += len(batch)
+
+    if not rows:
+        tmp_path.unlink(missing_ok=True)
+        return None
+
+    digest = hashlib.sha256()
+    with tmp_path.open("rb") as fp:
+        for chunk in iter(lambda: fp.read(1024 * 1024), b""):
+            digest.update(chunk)
+
+    segment_path = month_dir / f"{first_id:012d}-{last_id:012d}.jsonl.gz"
+    if segment_path.exists():
+        segment_path = month_dir / f"{first_id:012d}-{last_id:012d}-{digest.hexdigest()[:8]}.jsonl.gz"
+    os.replace(tmp_path, segment_path)
+    segment_path.chmod(0o444)
+
+    return {
+        "month": f"{month_start:%Y-%m}",
+        "path": segment_path.relative_to(_table_dir(table_name, root)).as_posix(),
+        "rows": rows,
+        "first_id": first_id,
+        "last_id": last_id,
+        "min_created_at": min_created.isoformat(),
+        "max_created_at": max_created.isoformat(),
+        "sha256": digest.hexdigest(),
+    }
+
+
+def _segment_rows(table, segment: dict):
+    # The exact extent the segment was read with: no row outside it can match
+    # both the id range and the created_at range.
+    return and_(
+        table.c.id.between(segment["first_id"], segment["last_id"]),
+        table.c.created_at.between(
+            datetime.fromisoformat(segment["min_created_at"]),
+            datetime.fromisoformat(segment["max_created_at"]),
+        ),
+    )
+
+
+def _delete_archived(db: Session, table_name: str, segment: dict, batch_size: int) -> int:
+    # One short write transaction per batch_size ids keeps the log writers
+    # from waiting behind a month-long DELETE.
+    table = ARCHIVE_MODELS[table_name].__table__
+    deleted = 0
+    low = segment["first_id"]
+    while low <= segment["last_id"]:
+        high = min(low + batch_size - 1, segment["last_id"])
+        result = db.execute(delete(table).where(_segment_rows(table, segment), table.c.id.between(low, high)))
+        db.commit()
+        deleted += result.rowcount
+        low = high + 1
+    return deleted
+
+
+def archive_logs(
+    db: Session,
+    table_name: str,
+    *,
+    older_than_days: int | None = None,
+    batch_size: int | None = None,
+    now: datetime | None = None,
+    root: Path | None = None,
+) -> int:
+    table = ARCHIVE_MODELS[table_name].__table__
+    older_than_days = settings.log_archive_after_days if older_than_days is None else older_than_days
+    batch_size = batch_size or settings.log_archive_batch_size
+    cutoff = (now or _utcnow()) - timedelta(days=older_than_days)
+
+    segments = load_index(table_name, root)
+    archived = 0
+    while True:
+        oldest = db.execute(select(func.min(table.c.created_at)).where(table.c.created_at < cutoff)).scalar()
+        if oldest is None:
+            db.rollback()
+            return archived
+
+        month_start, month_end = _month_bounds(oldest)
+        month_end = min(month_end, cutoff)
+        # A run that stopped after saving the index leaves part of that
+        # segment live; finish its deletion instead of archiving it again.
+        for done in segments:
+            if done["month"] == f"{month_start:%Y-%m}" and db.execute(
+                select(table.c.id).where(_segment_rows(table, done)).limit(1)
+            ).first():
+                _delete_archived(db, table_name, done, batch_size)
+
+        segment = _write_segment(db, table_name, month_start, month_end, batch_size, root)
+        if segment is None:
+            db.rollback()
+            return archived
+
+        # The index is saved before any row is deleted: a crash can leave rows
+        # both archived and live until the next run, never deleted without a
+        # segment.
+        db.rollback()
+        try:
+            _save_index(table_name, [*segments, segment], root)
+        except Exception:
+            (_table_dir(table_name, root) / segment["path"]).unlink(missing_ok=True)
+            raise
+        segments.append(segment)
+        deleted = _delete_archived(db, table_name, segment, batch_size)
+        if deleted != segment["rows"]:
+            raise RuntimeError(
+                f"{table_name} {segment['month']}: segment holds {segment['rows']} rows "
+                f"but {deleted} were deleted"
+            )
+        archived += segment["rows"]
+
+
+def _iter_segment_rows(table_name: str, segment: dict, root: Path | None = None) -> Iterator[dict]:
+    path = _table_dir(table_name, root) / segment["path"]
+    with gzip.open(path, "rt", encoding="utf-8") as fp:
+        for line in fp:
+            if line.strip():
+                yield _decode_row(line)
+
+
+def iter_logs(
+    db: Session,
+    table_name: str,
+    *,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    filters: dict | None = None,
+    batch_size: int = 1000,
+    root: Path | None = None,
+) -> Iterator[dict]:
+    table = ARCHIVE_MODELS[table_name].__table__
+    filters = filters or {}
+
+    def matches(row: dict) -> bool:
+        if start is not None and row["created_at"] < start:
+            return False
+        if end is not None and row["created_at"] >= end:
+            return False
+        return all(row.get(key) == value for key, value in filters.items())
+
+    segments = sorted(load_index(table_name, root), key=lambda s: (s["month"], s["first_id"]))
+    for segment in segments:
+        if start is not None and datetime.fromisoformat(segment["max_created_at"]) < start:
+            continue
+        if end is not None and datetime.fromisoformat(segment["min_created_at"]) >= end:
+            continue
+        for row in _iter_segment_rows(table_name, segment, root):
+            if matches(row):
+                yield row
+
+    conditions = [getattr(table.c, key) == value for key, value in filters.items()]
+    if start is not None:
+        conditions.append(table.c.created_at >= start)
+    if end is not None:
+        conditions.append(table.c.created_at < end)
+
+    last_id = 0
+    while True:
+        batch = (
+            db.execute(
+                select(table)
+                .where(table.c.id > last_id, *conditions)
+                .order_by(table.c.id.asc())
+                .limit(batch_size)
+            )
+            .mappings()
+            .all()
+        )
+        if not batch:
+            return
+        for row in batch:
+            yield dict(row)
+        last_id = batch[-1]["id"]
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import mimetypes
+import os
+from functools import lru_cache
+from pathlib import Path
+
+from anyio import to_thread
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import Scope
+
+from .compression import choose_encoding, compress_bytes, is_compressible, supported_encodings
+from .config import settings
+from .utils import ensure_dir
+
+
+DIST_DIR = "dist"
+MANIFEST_NAME = "manifest.json"
+GENERATIONS_NAME = "generations.json"
+# Workers and cached pages keep pointing at the previous build during a
+# deploy, so its files stay until prune_assets runs with them out of range.
+KEEP_GENERATIONS = 3
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+ENCODING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+
+def _source_assets(static_dir: Path) -> list[Path]:
+    dist = static_dir / DIST_DIR
+    return sorted(p for p in static_dir.rglob("*") if p.is_file() and dist not in p.parents)
+
+
+def build_assets(static_dir: Path | None = None) -> dict[str, str]:
+    static_dir = static_dir or settings.static_dir
+    dist = static_dir / DIST_DIR
+    ensure_dir(dist)
+    manifest: dict[str, str] = {}
+    written: set[str] = set()
+
+    for source in _source_assets(static_dir):
+        name = source.relative_to(static_dir).as_posix()
+        data = source.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()[:12]
+        hashed = Path(name).with_name(f"{source.stem}.{digest}{source.suffix}").as_posix()
+        manifest[name] = hashed
+
+        target = dist / hashed
+        ensure_dir(target.parent)
+        if not target.exists():
+            target.write_bytes(data)
+        written.add(hashed)
+
+        content_type = mimetypes.guess_type(source.name)[0] or ""
+        if not is_compressible(content_type):
+            continue
+        for encoding in supported_encodings():
+            sibling = target.with_name(target.name + ENCODING_SUFFIXES[encoding])
+            if not sibling.exists():
+                compressed = compress_bytes(data, encoding)
+                if len(compressed) >= len(data):
+                    continue
+                sibling.write_bytes(compressed)
+            written.add(sibling.relative_to(dist).as_posix())
+
+    generations = _load_generations(dist)
+    files = sorted(written)
+    if not generations or generations[0] != files:
+        _write_json(dist / GENERATIONS_NAME, [files, *generations])
+    _write_json(dist / MANIFEST_NAME, manifest)
+    load_manifest.cache_clear()
+    return manifest
+
+
+def prune_assets(static_dir: Path | None = None, keep: int = KEEP_GENERATIONS) -> list[Path]:
+    dist = (static_dir or settings.static_dir) / DIST_DIR
+    generations = _load_generations(dist)[: max(keep, 1)]
+    kept = {name for files in generations for name in files} | {MANIFEST_NAME, GENERATIONS_NAME}
+    removed = [p for p in dist.rglob("*") if p.is_file() and p.relative_to(dist).as_posix() not in kept]
+    for path in removed:
+        path.unlink()
+    if generations:
+        _write_json(dist / GENERATIONS_NAME, generations)
+    return removed
+
+
+def _load_generations(dist: Path) -> list[list[str]]:
+    try:
+        return json.loads((dist / GENERATIONS_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return []
+
+
+def _write_json(path: Path, value) -> None:
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(value, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+@lru_cache
+def load_manifest(static_dir: Path | None = None) -> dict[str, str]:
+    path = (static_dir or settings.static_dir) / DIST_DIR / MANIFEST_NAME
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def asset_url(name: str) -> str:
+    hashed = load_manifest().get(name)
+    return f"/static/{DIST_DIR}/{hashed}" if hashed else f"/static/{name}"
+
+
+class AssetFiles(StaticFiles):
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        hashed = Path(path).parts[:1] == (DIST_DIR,)
+        response = None
+        if hashed:
+            response = await self._precompressed_response(path, scope)
+        if response is None:
+            response = await super().get_response(path, scope)
+        if response.status_code in (200, 304):
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL if hashed else "no-cache"
+        return response
+
+    async def _precompressed_response(self, path: str, scope: Scope) -> Response | None:
+        accept = Headers(scope=scope).get("accept-encoding", "")
+        available = tuple(e for e in ENCODING_SUFFIXES if e in supported_encodings())
+        while (encoding := choose_encoding(accept, available)) is not None:
+            full_path, stat_result = await to_thread.run_sync(self.lookup_path, path + ENCODING_SUFFIXES[encoding])
+            if stat_result is not None and full_path:
+                response = self.file_response(full_path, stat_result, scope)
+                media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+                if media_type.startswith("text/"):
+                    media_type += "; charset=utf-8"
+                response.headers["Content-Type"] = media_type
+                response.headers["Content-Encoding"] = encoding
+                response.headers["Vary"] = "Accept-Encoding"
+                return response
+            available = tuple(e for e in available if e != encoding)
+        return None
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+from fastapi import Depends, Request
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session
+
+from .db import get_db
+from .models import AuditLog, Base
+from .utils import get_client_ip
+
+
+class AuditTrail:
+    def __init__(self, db: Session, *, ip: str | None = None, user_agent: str | None = None):
+        self.db = db
+        self.ip = ip
+        self.user_agent = user_agent
+        self._pending: list[tuple[str, int | None, str, str, int | Base | None]] = []
+        event.listen(db, "before_commit", self._write_pending)
+        event.listen(db, "after_rollback", self._discard_pending)
+
+    def record(
+        self,
+        action: str,
+        target_type: str,
+        target: int | Base | None = None,
+        *,
+        actor_id: int | None,
+        actor_type: str = "admin",
+    ) -> None:
+        self._pending.append((actor_type, actor_id, action, target_type, target))
+
+    def record_many(
+        self,
+        action: str,
+        target_type: str,
+        targets: Iterable[int | Base],
+        *,
+        actor_id: int | None,
+        actor_type: str = "admin",
+    ) -> None:
+        for target in targets:
+            self.record(action, target_type, target, actor_id=actor_id, actor_type=actor_type)
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def _write_pending(self, session: Session) -> None:
+        if not self._pending:
+            return
+        if any(isinstance(target, Base) for *_rest, target in self._pending):
+            session.flush()
+        rows = [
+            {
+                "actor_type": actor_type,
+                "actor_id": actor_id,
+                "action": action,
+                "target_type": target_type,
+                "target_id": target.id if isinstance(target, Base) else target,
+                "ip": self.ip,
+                "user_agent": self.user_agent,
+            }
+            for actor_type, actor_id, action, target_type, target in self._pending
+        ]
+        self._pending.clear()
+        session.execute(insert(AuditLog), rows)
+
+    def _discard_pending(self, _session: Session) -> None:
+        self._pending.clear()
+
+
+def audit_trail(request: Request, db: Session = Depends(get_db)) -> AuditTrail:
+    return AuditTrail(db, ip=get_client_ip(request), user_agent=request.headers.get("user-agent"))
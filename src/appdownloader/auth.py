@@ -1,16 +1,40 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import threading
 import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
 
+from anyio import to_thread
 from passlib.context import CryptContext
 from sqlalchemy.orm import Session
 
+from .cache import GenerationCache, bump_generation
 from .config import settings
 from .models import AdminUser
+from .sessions import rotate_session
 
 
 pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
 
+ADMINS = "admins"
+SESSION_TOUCH_SECONDS = 60
+
+
+class LoginBusy(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class AdminIdentity:
+    id: int
+    username: str
+    stamp: str
+
 
 def hash_password(plain: str) -> str:
     return pwd_context.hash(plain)
@@ -20,16 +44,113 @@ def verify_password(plain: str, password_hash: str) -> bool:
     return pwd_context.verify(plain, password_hash)
 
 
-def authenticate_admin(db: Session, username: str, password: str) -> AdminUser | None:
-    admin = db.query(AdminUser).filter(AdminUser.username == username).first()
-    if not admin:
-        return None
-    if not verify_password(password, admin.password_hash):
+@lru_cache(maxsize=1)
+def _dummy_hash() -> str:
+    return pwd_context.hash("appdownloader-dummy-password")
+
+
+def password_stamp(password_hash: str) -> str:
+    return hashlib.sha256(password_hash.encode("utf-8")).hexdigest()[:16]
+
+
+def _load_identities(db: Session) -> dict[int, AdminIdentity]:
+    rows = db.query(AdminUser.id, AdminUser.username, AdminUser.password_hash).all()
+    return {
+        admin_id: AdminIdentity(admin_id, username, password_stamp(password_hash))
+        for admin_id, username, password_hash in rows
+    }
+
+
+admin_identities: GenerationCache[dict[int, AdminIdentity]] = GenerationCache(
+    ADMINS, _load_identities, check_interval=settings.admin_cache_ttl_seconds
+)
+
+
+class PasswordVerifier:
+    def __init__(self, workers: int, max_pending: int):
+        self._pool = ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="argon2")
+        self._slots = threading.BoundedSemaphore(max(max_pending, 1))
+
+    async def verify(self, plain: str, password_hash: str) -> bool:
+        if not self._slots.acquire(blocking=False):
+            raise LoginBusy()
+        try:
+            return await asyncio.wrap_future(self._pool.submit(verify_password, plain, password_hash))
+        finally:
+            self._slots.release()
+
+
+password_verifier = PasswordVerifier(settings.argon2_workers, settings.argon2_max_pending)
+
+
+class LoginThrottle:
+    # Counts live in this process only; with APP_WORKERS > 1 each worker
+    # tracks its own failures, so the effective limit scales with workers.
+    def __init__(self, window_seconds: float, max_per_ip: int, max_per_user: int, max_keys: int = 10000):
+        self.window_seconds = window_seconds
+        self.limits = {"ip": max_per_ip, "user": max_per_user}
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._failures: OrderedDict[tuple[str, str], deque[float]] = OrderedDict()
+
+    def _keys(self, ip: str | None, username: str) -> list[tuple[str, str]]:
+        keys = [("user", username.lower())]
+        if ip:
+            keys.append(("ip", ip))
+        return keys
+
+    def retry_after(self, ip: str | None, username: str) -> int:
+        now = time.monotonic()
+        wait = 0.0
+        with self._lock:
+            for key in self._keys(ip, username):
+                failures = self._failures.get(key)
+                if not failures:
+                    continue
+                while failures and now - failures[0] >= self.window_seconds:
+                    failures.popleft()
+                limit = self.limits[key[0]]
+                if limit > 0 and len(failures) >= limit:
+                    wait = max(wait, failures[-limit] + self.window_seconds - now)
+        return int(wait) + 1 if wait > 0 else 0
+
+    def failed(self, ip: str | None, username: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            for key in self._keys(ip, username):
+                failures = self._failures.pop(key, None) or deque(maxlen=max(self.limits.values()) or 1)
+                failures.append(now)
+                self._failures[key] = failures
+            while len(self._failures) > self.max_keys:
+                self._failures.popitem(last=False)
+
+    def succeeded(self, username: str) -> None:
+        with self._lock:
+            self._failures.pop(("user", username.lower()), None)
+
+
+login_throttle = LoginThrottle(
+    settings.login_window_seconds,
+    settings.login_max_failures_per_ip,
+    settings.login_max_failures_per_user,
+)
+
+
+def _find_admin(db: Session, username: str) -> AdminUser | None:
+    return db.query(AdminUser).filter(AdminUser.username == username).first()
+
+
+async def authenticate_admin(db: Session, username: str, password: str) -> AdminUser | None:
+    admin = await to_thread.run_sync(_find_admin, db, username)
+    # Unknown usernames still pay for one verification so timing does not
+    # reveal which accounts exist.
+    valid = await password_verifier.verify(password, admin.password_hash if admin else _dummy_hash())
+    if not admin or not valid:
         return None
     return admin
 
 
-def get_session_admin(db: Session, session_data: dict) -> AdminUser | None:
+def get_session_admin(db: Session, session_data: dict) -> AdminIdentity | None:
     admin_user_id = session_data.get("admin_user_id")
     last_seen = session_data.get("last_seen")
     if not admin_user_id or not last_seen:
@@ -39,8 +160,35 @@ def get_session_admin(db: Session, session_data: dict) -> AdminUser | None:
     if now_ts - int(last_seen) > settings.session_max_age_seconds:
         return None
 
-    session_data["last_seen"] = now_ts
-    return db.query(AdminUser).filter(AdminUser.id == int(admin_user_id)).first()
+    identity = admin_identities.get(db).get(int(admin_user_id))
+    if not identity or session_data.get("auth_stamp") != identity.stamp:
+        return None
+
+    # Only touch the session once a minute so server-side sessions are not
+    # rewritten on every admin request.
+    if now_ts - int(last_seen) >= SESSION_TOUCH_SECONDS:
+        session_data["last_seen"] = now_ts
+    return identity
+
+
+def start_admin_session(session_data: dict, admin: AdminUser) -> None:
+    rotate_session(session_data)
+    session_data["admin_user_id"] = admin.id
+    session_data["last_seen"] = int(time.time())
+    session_data["auth_stamp"] = password_stamp(admin.password_hash)
+
+
+def set_admin_password(db: Session, username: str, password: str, *, create: bool = False) -> AdminUser:
+    admin = db.query(AdminUser).filter(AdminUser.username == username).first()
+    if not admin:
+        if not create:
+            raise LookupError(username)
+        admin = AdminUser(username=username, password_hash="")
+        db.add(admin)
+    admin.password_hash = hash_password(password)
+    bump_generation(db, ADMINS)
+    db.commit()
+    return admin
 
 
 def bootstrap_admin_if_needed(db: Session) -> None:
@@ -51,9 +199,4 @@ def bootstrap_admin_if_needed(db: Session) -> None:
     if exists:
         return
 
-    admin = AdminUser(
-        username=settings.admin_username,
-        password_hash=hash_password(settings.admin_password),
-    )
-    db.add(admin)
-    db.commit()
+    set_admin_password(db, settings.admin_username, settings.admin_password, create=True)
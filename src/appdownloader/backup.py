@@ -0,0 +1,363 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import tarfile
+import tempfile
+import threading
+import time
+from collections.abc import Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+
+from .config import settings
+from .db import sqlite_database_path
+from .storage import StorageBackend, StorageError, blob_key, get_storage, legacy_path
+from .utils import ensure_dir
+
+
+MANIFEST_NAME = "manifest.json"
+DATABASE_NAME = "app.db"
+BLOB_PREFIX = "blobs/"
+CHUNK_SIZE = 1024 * 1024
+BLOCK_SIZE = tarfile.BLOCKSIZE
+
+
+class BackupError(Exception):
+    pass
+
+
+class RestoreError(BackupError):
+    def __init__(self, report: RestoreReport):
+        super().__init__(
+            f"{len(report.missing)} missing and {len(report.mismatched)} mismatched blobs; database not replaced"
+        )
+        self.report = report
+
+
+@dataclass
+class RestoreReport:
+    database_path: Path
+    restored_files: int = 0
+    verified_files: int = 0
+    missing: list[str] = field(default_factory=list)
+    mismatched: list[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.missing and not self.mismatched
+
+
+def snapshot_database(target: Path, db_path: Path | None = None) -> Path:
+    # Copied page by page into a file next to the other temp data, so a
+    # backup costs disk space rather than memory proportional to the DB.
+    db_path = db_path or sqlite_database_path()
+    if db_path is None:
+        raise BackupError("online backup is only supported for SQLite databases")
+
+    source = sqlite3.connect(f"file:{db_path.as_posix()}?mode=ro", uri=True)
+    try:
+        destination = sqlite3.connect(target)
+        try:
+            source.backup(destination)
+        finally:
+            destination.close()
+    finally:
+        source.close()
+    return target
+
+
+@contextmanager
+def temporary_snapshot() -> Iterator[Path]:
+    ensure_dir(settings.tmp_root)
+    fd, name = tempfile.mkstemp(prefix="backup-", suffix=".db", dir=settings.tmp_root)
+    os.close(fd)
+    path = Path(name)
+    try:
+        yield snapshot_database(path)
+    finally:
+        path.unlink(missing_ok=True)
+
+
+def _snapshot_files(snapshot: Path) -> list[dict]:
+    conn = sqlite3.connect(f"file:{snapshot.as_posix()}?mode=ro", uri=True)
+    try:
+        rows = conn.execute("SELECT id, stored_path, sha256, file_size FROM apk_files ORDER BY id").fetchall()
+    finally:
+        conn.close()
+    return [{"id": r[0], "stored_path": r[1], "sha256": r[2], "size": r[3]} for r in rows]
+
+
+def _tar_header(name: str, size: int, mtime: float | None = None) -> bytes:
+    info = tarfile.TarInfo(name)
+    info.size = size
+    info.mtime = int(mtime or time.time())
+    info.mode = 0o644
+    return info.tobuf(format=tarfile.PAX_FORMAT)
+
+
+def _tar_padding(size: int) -> bytes:
+    return b"\0" * (-size % BLOCK_SIZE)
+
+
+def read_manifest(archive_path: Path) -> dict:
+    with tarfile.open(archive_path, mode="r|*") as tar:
+        for member in tar:
+            if member.name == MANIFEST_NAME:
+                return json.load(tar.extractfile(member))
+            break
+    raise BackupError(f"{archive_path} does not start with {MANIFEST_NAME}")
+
+
+def build_manifest(snapshot: Path, base_manifest: dict | None = None, base_name: str | None = None) -> dict:
+    base_blobs = {f["sha256"] for f in (base_manifest or {}).get("files", []) if not f.get("missing")}
+    storage = get_storage()
+    files = []
+    for row in _snapshot_files(snapshot):
+        exists = storage.exists(row["stored_path"])
+        in_base = row["sha256"] in base_blobs
+        files.append(
+            {
+                "id": row["id"],
+                "sha256": row["sha256"],
+                "size": row["size"],
+                "path": blob_key(row["sha256"]) if legacy_path(row["stored_path"]) else row["stored_path"],
+                "stored_path": row["stored_path"],
+                "in_base": in_base,
+                "missing": not exists and not in_base,
+            }
+        )
+    return {
+        "format": 1,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "base": base_name,
+        "database": {
+            "name": DATABASE_NAME,
+            "size": snapshot.stat().st_size,
+            "sha256": _hash_file(snapshot),
+        },
+        "files": files,
+    }
+
+
+def iter_backup_archive(base_archive: Path | None = None) -> Iterator[bytes]:
+    base_manifest = read_manifest(base_archive) if base_archive else None
+    with temporary_snapshot() as snapshot:
+        manifest = build_manifest(snapshot, base_manifest, base_archive.name if base_archive else None)
+
+        manifest_bytes = json.dumps(manifest, ensure_ascii=False, indent=1).encode("utf-8")
+        yield _tar_header(MANIFEST_NAME, len(manifest_bytes))
+        yield manifest_bytes + _tar_padding(len(manifest_bytes))
+
+        size = manifest["database"]["size"]
+        yield _tar_header(DATABASE_NAME, size)
+        with snapshot.open("rb") as fp:
+            yield from iter(lambda: fp.read(CHUNK_SIZE), b"")
+        yield _tar_padding(size)
+
+    storage = get_storage()
+    written: set[str] = set()
+    for entry in manifest["files"]:
+        if entry["in_base"] or entry["missing"] or entry["sha256"] in written:
+            continue
+        stat = storage.stat(entry["stored_path"])
+        if stat is None:
+            continue
+        if stat.size != entry["size"]:
+            raise BackupError(f"{entry['stored_path']} changed size during backup")
+        yield _tar_header(BLOB_PREFIX + entry["sha256"], stat.size, stat.mtime)
+        yield from storage.get(entry["stored_path"])
+        yield _tar_padding(stat.size)
+        written.add(entry["sha256"])
+
+    yield b"\0" * (BLOCK_SIZE * 2)
+
+
+def write_backup(output: Path, base_archive: Path | None = None) -> dict:
+    ensure_dir(output.parent)
+    tmp_path = output.with_name(output.name + ".part")
+    try:
+        with tmp_path.open("wb") as out:
+            for chunk in iter_backup_archive(base_archive):
+                out.write(chunk)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    os.replace(tmp_path, output)
+    return read_manifest(output)
+
+
+def _hash_blob(storage: StorageBackend, key: str) -> str | None:
+    digest = hashlib.sha256()
+    try:
+        for chunk in storage.get(key):
+            digest.update(chunk)
+    except (OSError, StorageError):
+        return None
+    return digest.hexdigest()
+
+
+def _hash_file(path: Path) -> str | None:
+    digest = hashlib.sha256()
+    try:
+        with path.open("rb") as fp:
+            for chunk in iter(lambda: fp.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+def _copy_stream(src, target: Path) -> None:
+    ensure_dir(target.parent)
+    tmp_path = target.with_name(target.name + ".part")
+    with tmp_path.open("wb") as out:
+        for chunk in iter(lambda: src.read(CHUNK_SIZE), b""):
+            out.write(chunk)
+    os.replace(tmp_path, target)
+
+
+def _spool_member(src, directory: Path) -> tuple[Path, str]:
+    fd, name = tempfile.mkstemp(prefix="restore-", suffix=".blob", dir=directory)
+    digest = hashlib.sha256()
+    try:
+        with os.fdopen(fd, "wb") as out:
+            for chunk in iter(lambda: src.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        Path(name).unlink(missing_ok=True)
+        raise
+    return Path(name), digest.hexdigest()
+
+
+def _put_verified(storage: StorageBackend, key: str, path: Path) -> None:
+    try:
+        # put rather than put_file: a same-sized but damaged blob must be replaced.
+        with path.open("rb") as fp:
+            storage.put(key, fp, path.stat().st_size)
+    finally:
+        path.unlink(missing_ok=True)
+
+
+def _extract_blobs(
+    storage: StorageBackend,
+    archive_path: Path,
+    targets: dict[str, str],
+    restored: set[str],
+    corrupt: set[str],
+    pool: ThreadPoolExecutor,
+    slots: threading.BoundedSemaphore,
+) -> list[Future]:
+    # Members are hashed while they are spooled to a temp file; only a blob
+    # whose digest matches its name ever reaches storage, so a damaged
+    # archive cannot overwrite good content. Uploads run on the pool.
+    uploads: list[Future] = []
+    with tarfile.open(archive_path, mode="r|*") as tar:
+        for member in tar:
+            if not member.name.startswith(BLOB_PREFIX):
+                continue
+            sha256 = member.name[len(BLOB_PREFIX):]
+            key = targets.get(sha256)
+            if not key or sha256 in restored:
+                continue
+            path, digest = _spool_member(tar.extractfile(member), settings.tmp_root)
+            if digest != sha256:
+                path.unlink(missing_ok=True)
+                corrupt.add(sha256)
+                continue
+            slots.acquire()
+            future = pool.submit(_put_verified, storage, key, path)
+            future.add_done_callback(lambda _future: slots.release())
+            uploads.append(future)
+            restored.add(sha256)
+    return uploads
+
+
+def restore_backup(
+    archive_path: Path,
+    base_archives: list[Path] | None = None,
+    *,
+    force: bool = False,
+    workers: int | None = None,
+) -> RestoreReport:
+    db_path = sqlite_database_path()
+    if db_path is None:
+        raise BackupError("restore is only supported for SQLite databases")
+    if db_path.exists() and not force:
+        raise BackupError(f"{db_path} already exists; pass force=True to overwrite it")
+
+    manifest = read_manifest(archive_path)
+    report = RestoreReport(database_path=db_path)
+    ensure_dir(settings.tmp_root)
+
+    storage = get_storage()
+    targets: dict[str, str] = {}
+    for entry in manifest["files"]:
+        if not entry["missing"]:
+            targets.setdefault(entry["sha256"], entry["path"])
+
+    restored_db = db_path.with_name(db_path.name + ".restore")
+    try:
+        with tarfile.open(archive_path, mode="r|*") as tar:
+            for member in tar:
+                if member.name == DATABASE_NAME:
+                    ensure_dir(db_path.parent)
+                    _copy_stream(tar.extractfile(member), restored_db)
+                    break
+            else:
+                raise BackupError(f"{archive_path} has no {DATABASE_NAME}")
+
+        if _hash_file(restored_db) != manifest["database"]["sha256"]:
+            raise BackupError("database snapshot checksum mismatch")
+
+        workers = workers or min(8, (os.cpu_count() or 1) * 2)
+        restored: set[str] = set()
+        corrupt: set[str] = set()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            slots = threading.BoundedSemaphore(workers * 2)
+            uploads: list[Future] = []
+            for source in [archive_path, *(base_archives or [])]:
+                uploads += _extract_blobs(storage, source, targets, restored, corrupt, pool, slots)
+            for future in uploads:
+                future.result()
+
+            # Blobs no archive carried must already be in storage intact.
+            leftover = [(sha256, key) for sha256, key in targets.items() if sha256 not in restored]
+            digests = list(pool.map(lambda item: _hash_blob(storage, item[1]), leftover))
+        for (sha256, key), digest in zip(leftover, digests):
+            if digest == sha256:
+                report.verified_files += 1
+            elif digest is None and sha256 not in corrupt:
+                report.missing.append(key)
+            else:
+                report.mismatched.append(key)
+        report.restored_files = len(restored)
+        report.verified_files += len(restored)
+
+        if not report.ok:
+            raise RestoreError(report)
+
+        conn = sqlite3.connect(restored_db)
+        try:
+            conn.executemany(
+                "UPDATE apk_files SET stored_path = ? WHERE id = ?",
+                [
+                    (targets[entry["sha256"]], entry["id"])
+                    for entry in manifest["files"]
+                    if not entry["missing"] and targets[entry["sha256"]] != entry["stored_path"]
+                ],
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        os.replace(restored_db, db_path)
+    finally:
+        restored_db.unlink(missing_ok=True)
+        restored_db.with_name(restored_db.name + ".part").unlink(missing_ok=True)
+    return report
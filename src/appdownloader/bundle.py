@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import hashlib
+import struct
+import zlib
+from bisect import bisect_right
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
+from .models import ApkFile
+from .storage import StorageBackend, StorageError
+
+
+ZIP32_LIMIT = 0xFFFFFFFF
+ZIP16_LIMIT = 0xFFFF
+ZIP_VERSION = 20
+ZIP64_VERSION = 45
+UTF8_FLAG = 0x0800
+
+LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")
+CENTRAL_HEADER = struct.Struct("<IHHHHHHIIIHHHHHII")
+ZIP64_OFFSET_EXTRA = struct.Struct("<HHQ")
+ZIP64_END = struct.Struct("<IQHHIIQQQQ")
+ZIP64_LOCATOR = struct.Struct("<IIQI")
+END_RECORD = struct.Struct("<IHHHHIIH")
+
+
+class BundleError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class BundleEntry:
+    name: str
+    key: str
+    size: int
+    crc32: int
+    modified_at: datetime
+    apk_file_id: int
+    app_type_id: int
+    version: str
+
+
+@dataclass(frozen=True)
+class _Segment:
+    offset: int
+    length: int
+    data: bytes | None = None
+    key: str | None = None
+
+
+def _dos_timestamp(value: datetime) -> tuple[int, int]:
+    if value.year < 1980:
+        return 0, (1 << 5) | 1
+    time_part = (value.hour << 11) | (value.minute << 5) | (value.second // 2)
+    date_part = ((value.year - 1980) << 9) | (value.month << 5) | value.day
+    return time_part, date_part
+
+
+class ZipBundle:
+    def __init__(self, entries: list[BundleEntry]):
+        self.entries = entries
+        self.segments: list[_Segment] = []
+        central = bytearray()
+        offset = 0
+
+        for entry in entries:
+            if entry.size >= ZIP32_LIMIT:
+                raise BundleError(f"{entry.name} is too large for a bundle")
+            name = entry.name.encode("utf-8")
+            time_part, date_part = _dos_timestamp(entry.modified_at)
+            header = LOCAL_HEADER.pack(
+                0x04034B50, ZIP_VERSION, UTF8_FLAG, 0, time_part, date_part,
+                entry.crc32, entry.size, entry.size, len(name), 0,
+            ) + name
+            self.segments.append(_Segment(offset, len(header), data=header))
+            self.segments.append(_Segment(offset + len(header), entry.size, key=entry.key))
+
+            extra = b""
+            header_offset = offset
+            if offset >= ZIP32_LIMIT:
+                extra = ZIP64_OFFSET_EXTRA.pack(0x0001, 8, offset)
+                header_offset = ZIP32_LIMIT
+            central += CENTRAL_HEADER.pack(
+                0x02014B50, ZIP64_VERSION if extra else ZIP_VERSION, ZIP64_VERSION if extra else ZIP_VERSION,
+                UTF8_FLAG, 0, time_part, date_part, entry.crc32, entry.size, entry.size,
+                len(name), len(extra), 0, 0, 0, 0, header_offset,
+            ) + name + extra
+            offset += len(header) + entry.size
+
+        central_offset = offset
+        central_size = len(central)
+        tail = bytes(central)
+        count = len(entries)
+        if count > ZIP16_LIMIT or central_offset >= ZIP32_LIMIT or central_size >= ZIP32_LIMIT:
+            zip64_end_offset = central_offset + central_size
+            tail += ZIP64_END.pack(
+                0x06064B50, ZIP64_END.size - 12, ZIP64_VERSION, ZIP64_VERSION, 0, 0,
+                count, count, central_size, central_offset,
+            )
+            tail += ZIP64_LOCATOR.pack(0x07064B50, 0, zip64_end_offset, 1)
+        tail += END_RECORD.pack(
+            0x06054B50, 0, 0, min(count, ZIP16_LIMIT), min(count, ZIP16_LIMIT),
+            min(central_size, ZIP32_LIMIT), min(central_offset, ZIP32_LIMIT), 0,
+        )
+        self.segments.append(_Segment(offset, len(tail), data=tail))
+        self.size = offset + len(tail)
+        self._offsets = [segment.offset for segment in self.segments]
+
+    @property
+    def etag(self) -> str:
+        digest = hashlib.sha256()
+        for entry in self.entries:
+            digest.update(f"{entry.name}\0{entry.key}\0{entry.crc32}\0{entry.modified_at.isoformat()}\n".encode())
+        return f'"{digest.hexdigest()[:32]}"'
+
+    def iter_range(self, storage: StorageBackend, start: int, end: int) -> Iterator[bytes]:
+        index = max(bisect_right(self._offsets, start) - 1, 0)
+        for segment in self.segments[index:]:
+            if segment.offset >= end:
+                break
+            lo = max(start, segment.offset) - segment.offset
+            hi = min(end, segment.offset + segment.length) - segment.offset
+            if lo >= hi:
+                continue
+            if segment.data is not None:
+                yield segment.data[lo:hi]
+            elif lo == 0 and hi == segment.length:
+                yield from storage.get(segment.key)
+            else:
+                yield from storage.open_range(segment.key, lo, hi)
+
+
+def blob_crc32(storage: StorageBackend, key: str) -> int:
+    value = 0
+    for chunk in storage.get(key):
+        value = zlib.crc32(chunk, value)
+    return value
+
+
+def backfill_crc32(db: Session, storage: StorageBackend, batch_size: int = 100) -> tuple[int, list[str]]:
+    # Files uploaded before crc32 was recorded. Each batch commits on its own,
+    # so an interrupted run picks up where it stopped.
+    filled = 0
+    failed = []
+    last_id = 0
+    while True:
+        batch = (
+            db.query(ApkFile)
+            .filter(ApkFile.crc32.is_(None), ApkFile.id > last_id)
+            .order_by(ApkFile.id.asc())
+            .limit(batch_size)
+            .all()
+        )
+        if not batch:
+            return filled, failed
+        for apk_file in batch:
+            try:
+                apk_file.crc32 = blob_crc32(storage, apk_file.stored_path)
+            except (OSError, StorageError) as exc:
+                failed.append(f"{apk_file.stored_path}: {exc}")
+                continue
+            filled += 1
+        db.commit()
+        last_id = batch[-1].id
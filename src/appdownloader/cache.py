@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Callable
+from typing import Generic, TypeVar
+
+from sqlalchemy import event, update
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .models import CacheGeneration
+
+
+T = TypeVar("T")
+
+CATALOG = "catalog"
+_MISSING = object()
+_registry: dict[str, list[GenerationCache]] = {}
+
+
+def current_generation(db: Session, name: str) -> int:
+    value = db.query(CacheGeneration.generation).filter(CacheGeneration.name == name).scalar()
+    return value or 0
+
+
+def bump_generation(db: Session, name: str = CATALOG) -> None:
+    # Runs inside the caller's transaction so other workers only see the new
+    # generation together with the data it invalidates.
+    result = db.execute(
+        update(CacheGeneration)
+        .where(CacheGeneration.name == name)
+        .values(generation=CacheGeneration.generation + 1)
+    )
+    if result.rowcount == 0:
+        db.add(CacheGeneration(name=name, generation=1))
+        db.flush()
+    event.listen(db, "after_commit", lambda _session: expire_local(name), once=True)
+
+
+def expire_local(name: str) -> None:
+    for cache in _registry.get(name, []):
+        cache.expire()
+
+
+class GenerationCache(Generic[T]):
+    def __init__(self, name: str, loader: Callable[[Session], T], check_interval: float | None = None):
+        self.name = name
+        self.loader = loader
+        self.check_interval = settings.cache_check_interval_seconds if check_interval is None else check_interval
+        self._lock = threading.Lock()
+        self._value: T | object = _MISSING
+        self._generation = -1
+        self._checked_at = float("-inf")
+        _registry.setdefault(name, []).append(self)
+
+    def get(self, db: Session) -> T:
+        now = time.monotonic()
+        with self._lock:
+            if self._value is not _MISSING and now - self._checked_at < self.check_interval:
+                return self._value
+
+        generation = current_generation(db, self.name)
+        with self._lock:
+            if self._value is not _MISSING and generation == self._generation:
+                self._checked_at = now
+                return self._value
+
+        value = self.loader(db)
+        with self._lock:
+            self._value = value
+            self._generation = generation
+            self._checked_at = now
+        return value
+
+    def expire(self) -> None:
+        with self._lock:
+            self._checked_at = float("-inf")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._value = _MISSING
+            self._generation = -1
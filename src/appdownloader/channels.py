@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+
+from .signing import DownloadGrant
+
+
+STABLE = "stable"
+BETA = "beta"
+CHANNELS = (STABLE, BETA)
+BUCKETS = 100
+
+
+@dataclass(frozen=True)
+class Release:
+    version: str
+    download: DownloadGrant | None
+
+
+@dataclass(frozen=True)
+class ChannelRule:
+    pinned: Release | None
+    rollout: Release | None
+    rollout_percent: int
+
+
+def device_bucket(device_id: str, app_slug: str, version: str) -> int:
+    # Salting with the rollout version gives each rollout its own cohort while
+    # keeping a device in the same bucket as the percentage is raised.
+    digest = hashlib.sha256(f"{app_slug}\0{version}\0{device_id}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % BUCKETS
+
+
+def resolve_release(
+    app_slug: str,
+    default: Release | None,
+    rules: dict[str, ChannelRule],
+    channel: str = STABLE,
+    device_id: str | None = None,
+) -> tuple[Release | None, bool]:
+    # A channel without its own rule gets the newest release; the stable pin
+    # and rollout never leak into beta.
+    rule = rules.get(channel)
+    if rule is None:
+        return default, False
+    if (
+        rule.rollout is not None
+        and device_id
+        and device_bucket(device_id, app_slug, rule.rollout.version) < rule.rollout_percent
+    ):
+        return rule.rollout, True
+    return rule.pinned or default, False
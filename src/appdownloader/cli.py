@@ -1,14 +1,314 @@
 from __future__ import annotations
 
-import uvicorn
+import argparse
+import sys
+from pathlib import Path
 
 from .config import settings
 
 
-def main() -> None:
-    uvicorn.run(
-        "appdownloader.main:app",
-        host=settings.host,
-        port=settings.port,
-        reload=False,
+def serve(args: argparse.Namespace | None = None) -> None:
+    from .server import run_server
+
+    run_server(getattr(args, "workers", None))
+
+
+def archive(args: argparse.Namespace) -> None:
+    from .archive import ARCHIVE_MODELS, archive_logs
+    from .db import SessionLocal
+
+    tables = [args.table] if args.table else list(ARCHIVE_MODELS)
+    db = SessionLocal()
+    try:
+        for table_name in tables:
+            count = archive_logs(
+                db,
+                table_name,
+                older_than_days=args.older_than_days,
+                batch_size=args.batch_size,
+            )
+            print(f"{table_name}: archived {count} rows")
+    finally:
+        db.close()
+
+
+def backfill_crc32(args: argparse.Namespace) -> None:
+    from .bundle import backfill_crc32 as fill
+    from .db import SessionLocal
+    from .storage import get_storage
+
+    db = SessionLocal()
+    try:
+        filled, failed = fill(db, get_storage(), batch_size=args.batch_size)
+    finally:
+        db.close()
+    print(f"apk_files: filled crc32 for {filled} files")
+    for message in failed:
+        print(f"  failed {message}", file=sys.stderr)
+    if failed:
+        raise SystemExit(1)
+
+
+def import_apks(args: argparse.Namespace) -> None:
+    from .db import SessionLocal
+    from .importer import import_directory, load_rules
+
+    rules = load_rules(args.rules, args.pattern)
+    db = SessionLocal()
+    try:
+        report = import_directory(
+            db,
+            args.source,
+            rules,
+            create_apps=args.create_apps,
+            workers=args.workers,
+            batch_size=args.batch_size,
+            dry_run=args.dry_run,
+        )
+    finally:
+        db.close()
+
+    print(
+        f"scanned={report.scanned} imported={report.imported} skipped_existing={report.skipped_existing} "
+        f"unmatched={len(report.unmatched)} invalid={len(report.invalid)} duplicates={len(report.duplicates)} "
+        f"missing_apps={len(report.missing_apps)} elapsed={report.elapsed:.1f}s "
+        f"rate={report.files_per_minute:.0f} files/min"
     )
+    for label, items in (
+        ("unmatched", report.unmatched),
+        ("invalid", report.invalid),
+        ("duplicate", report.duplicates),
+        ("missing app", report.missing_apps),
+    ):
+        for item in items:
+            print(f"  {label}: {item}", file=sys.stderr)
+
+
+def backup(args: argparse.Namespace) -> None:
+    from .backup import iter_backup_archive, write_backup
+
+    if str(args.output) == "-":
+        for chunk in iter_backup_archive(args.base):
+            sys.stdout.buffer.write(chunk)
+        sys.stdout.buffer.flush()
+        return
+
+    manifest = write_backup(args.output, args.base)
+    included = sum(1 for f in manifest["files"] if not f["in_base"] and not f["missing"])
+    missing = sum(1 for f in manifest["files"] if f["missing"])
+    print(f"{args.output}: database {manifest['database']['size']} bytes, {included} files, {missing} missing")
+
+
+def restore(args: argparse.Namespace) -> None:
+    from .backup import RestoreError, restore_backup
+
+    try:
+        report = restore_backup(args.archive, args.base, force=args.force, workers=args.workers)
+    except RestoreError as exc:
+        for path in exc.report.missing:
+            print(f"  missing: {path}", file=sys.stderr)
+        for path in exc.report.mismatched:
+            print(f"  sha256 mismatch: {path}", file=sys.stderr)
+        print(f"restore aborted: {exc}", file=sys.stderr)
+        raise SystemExit(1) from None
+    print(
+        f"restored {report.database_path}, {report.restored_files} blobs, {report.verified_files} files verified"
+    )
+
+
+def mirror_sync(args: argparse.Namespace) -> None:
+    import time
+
+    from .db import SessionLocal
+    from .mirror import primary_client, sync_from_primary
+    from .spool import ingest_download_spool
+
+    interval = settings.mirror_sync_interval_seconds if args.interval is None else args.interval
+    with primary_client(args.primary, args.token) as client:
+        while True:
+            db = SessionLocal()
+            try:
+                report = sync_from_primary(db, client, prune=not args.no_prune)
+                ingested = ingest_download_spool(db)
+            finally:
+                db.close()
+            print(
+                f"blobs={report.blobs_total} fetched={report.blobs_fetched} ({report.bytes_fetched} bytes) "
+                f"pruned={report.blobs_pruned} catalog_changed={report.catalog_changed} download_logs={ingested}"
+            )
+            if interval <= 0:
+                return
+            time.sleep(interval)
+
+
+def ingest_downloads(_args: argparse.Namespace) -> None:
+    from .db import SessionLocal
+    from .spool import ingest_download_spool
+
+    db = SessionLocal()
+    try:
+        print(f"ingested {ingest_download_spool(db)} download logs")
+    finally:
+        db.close()
+
+
+def build_assets(_args: argparse.Namespace) -> None:
+    from .assets import build_assets as build
+
+    for name, hashed in build().items():
+        print(f"{name} -> {hashed}")
+
+
+def prune_assets(args: argparse.Namespace) -> None:
+    from .assets import prune_assets as prune
+
+    for path in prune(keep=args.keep):
+        print(f"removed {path}")
+
+
+def set_password(args: argparse.Namespace) -> None:
+    import getpass
+
+    from .auth import set_admin_password
+    from .db import SessionLocal
+
+    password = args.password or getpass.getpass(f"new password for {args.username}: ")
+    if not password:
+        raise SystemExit("password must not be empty")
+    db = SessionLocal()
+    try:
+        set_admin_password(db, args.username, password, create=args.create)
+    except LookupError:
+        raise SystemExit(f"unknown admin: {args.username} (use --create)") from None
+    finally:
+        db.close()
+    print(f"{args.username}: password updated; existing sessions are signed out")
+
+
+def seed(args: argparse.Namespace) -> None:
+    import time
+
+    from .db import engine, init_db
+    from .seed import SeedPlan, seed_database
+
+    plan = SeedPlan(
+        apps=args.apps,
+        versions_per_app=args.versions,
+        revisions_per_version=args.revisions,
+        notices=args.notices,
+        audit_logs=args.audit_logs,
+        download_logs=args.download_logs,
+        clients=args.clients,
+        days=args.days,
+        skew=args.skew,
+        file_size=int(args.file_size_mb * 1024**2),
+        random_seed=args.seed,
+    )
+    files_root = None if args.no_files or settings.storage_backend != "local" else settings.files_root
+    started = time.perf_counter()
+
+    def progress(table: str, done: int, total: int) -> None:
+        print(f"  {table}: {done}/{total} ({time.perf_counter() - started:.1f}s)", file=sys.stderr)
+
+    init_db()
+    try:
+        report = seed_database(engine, plan, files_root=files_root, progress=progress)
+    except ValueError as exc:
+        raise SystemExit(str(exc)) from None
+    for table, count in report.counts.items():
+        print(f"{table}: {count}")
+    for phase, seconds in report.timings.items():
+        print(f"{phase}: {seconds:.1f}s")
+    print(f"placeholder files: {report.placeholder_files}, elapsed {report.elapsed:.1f}s")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="appdownloader")
+    parser.set_defaults(handler=serve)
+    commands = parser.add_subparsers(dest="command")
+
+    serve_cmd = commands.add_parser("serve", help="run the web server")
+    serve_cmd.add_argument("--workers", type=int, default=None, help="worker processes (default: APP_WORKERS)")
+    serve_cmd.set_defaults(handler=serve)
+
+    archive_cmd = commands.add_parser("archive", help="move old log rows into compressed monthly segments")
+    archive_cmd.add_argument("--table", choices=["download_logs", "audit_logs"], default=None)
+    archive_cmd.add_argument("--older-than-days", type=int, default=None)
+    archive_cmd.add_argument("--batch-size", type=int, default=None)
+    archive_cmd.set_defaults(handler=archive)
+
+    crc_cmd = commands.add_parser("backfill-crc32", help="compute missing APK crc32 values used by /bundle")
+    crc_cmd.add_argument("--batch-size", type=int, default=100)
+    crc_cmd.set_defaults(handler=backfill_crc32)
+
+    import_cmd = commands.add_parser("import", help="bulk import an existing APK archive directory")
+    import_cmd.add_argument("source", type=Path)
+    import_cmd.add_argument(
+        "--pattern",
+        action="append",
+        default=[],
+        help="filename regex with (?P<slug>...) and (?P<version>...) groups; repeatable",
+    )
+    import_cmd.add_argument("--rules", type=Path, default=None, help='JSON list of {"pattern": ..., "app": slug}')
+    import_cmd.add_argument("--create-apps", action="store_true", help="create missing app types from slugs")
+    import_cmd.add_argument("--workers", type=int, default=None)
+    import_cmd.add_argument("--batch-size", type=int, default=200)
+    import_cmd.add_argument("--dry-run", action="store_true")
+    import_cmd.set_defaults(handler=import_apks)
+
+    backup_cmd = commands.add_parser("backup", help="stream an online snapshot of the DB and APK files into a tar")
+    backup_cmd.add_argument("output", type=Path, help="target .tar path, or - for stdout")
+    backup_cmd.add_argument("--base", type=Path, default=None, help="previous archive; blobs it holds are skipped")
+    backup_cmd.set_defaults(handler=backup)
+
+    restore_cmd = commands.add_parser("restore", help="restore and verify a backup archive (server must be stopped)")
+    restore_cmd.add_argument("archive", type=Path)
+    restore_cmd.add_argument("--base", type=Path, action="append", default=[], help="base archive(s) for incrementals")
+    restore_cmd.add_argument("--force", action="store_true", help="overwrite an existing database")
+    restore_cmd.add_argument("--workers", type=int, default=None)
+    restore_cmd.set_defaults(handler=restore)
+
+    mirror_cmd = commands.add_parser("mirror-sync", help="pull the catalog and missing APK blobs from the primary")
+    mirror_cmd.add_argument("--primary", default=None, help="primary base URL (default: MIRROR_PRIMARY_URL)")
+    mirror_cmd.add_argument("--token", default=None, help="shared token (default: MIRROR_TOKEN)")
+    mirror_cmd.add_argument("--interval", type=int, default=None, help="repeat every N seconds; 0 runs once")
+    mirror_cmd.add_argument("--no-prune", action="store_true", help="keep blobs the primary no longer references")
+    mirror_cmd.set_defaults(handler=mirror_sync)
+
+    ingest_cmd = commands.add_parser("ingest-downloads", help="load download logs spooled by edge workers into the DB")
+    ingest_cmd.set_defaults(handler=ingest_downloads)
+
+    assets_cmd = commands.add_parser("build-assets", help="write content-hashed, precompressed static assets")
+    assets_cmd.set_defaults(handler=build_assets)
+
+    prune_assets_cmd = commands.add_parser("prune-assets", help="delete hashed assets of builds older than --keep")
+    prune_assets_cmd.add_argument("--keep", type=int, default=3, help="number of recent builds to keep")
+    prune_assets_cmd.set_defaults(handler=prune_assets)
+
+    password_cmd = commands.add_parser("set-password", help="change an admin password and sign out its sessions")
+    password_cmd.add_argument("username")
+    password_cmd.add_argument("--password", default=None, help="new password (prompted when omitted)")
+    password_cmd.add_argument("--create", action="store_true", help="create the admin if it does not exist")
+    password_cmd.set_defaults(handler=set_password)
+
+    seed_cmd = commands.add_parser("seed", help="fill a fresh database with synthetic, skewed test data")
+    seed_cmd.add_argument("--apps", type=int, default=20)
+    seed_cmd.add_argument("--versions", type=int, default=30, help="versions per app")
+    seed_cmd.add_argument("--revisions", type=int, default=1, help="files per version; the last is current")
+    seed_cmd.add_argument("--notices", type=int, default=200)
+    seed_cmd.add_argument("--audit-logs", type=int, default=100_000)
+    seed_cmd.add_argument("--download-logs", type=int, default=1_000_000)
+    seed_cmd.add_argument("--clients", type=int, default=5000, help="distinct client IPs in the logs")
+    seed_cmd.add_argument("--days", type=int, default=365, help="spread logs over the last N days")
+    seed_cmd.add_argument("--skew", type=float, default=1.2, help="Zipf exponent for app/version popularity")
+    seed_cmd.add_argument("--file-size-mb", type=float, default=30, help="average placeholder APK size")
+    seed_cmd.add_argument("--no-files", action="store_true", help="do not create sparse placeholder APK files")
+    seed_cmd.add_argument("--seed", type=int, default=42, help="random seed for the catalog")
+    seed_cmd.set_defaults(handler=seed)
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = build_parser().parse_args(argv)
+    args.handler(args)
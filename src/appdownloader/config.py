@@ -25,18 +25,75 @@ class Settings:
     secret_key: str = os.getenv("APP_SECRET_KEY", "change-this-secret-key")
     host: str = os.getenv("APP_HOST", "0.0.0.0")
     port: int = int(os.getenv("APP_PORT", "8080"))
+    workers: int = int(os.getenv("APP_WORKERS", "1"))
+    limit_concurrency: int = int(os.getenv("APP_LIMIT_CONCURRENCY", "0"))
+    backlog: int = int(os.getenv("APP_BACKLOG", "2048"))
+    keep_alive_seconds: int = int(os.getenv("APP_KEEP_ALIVE_SECONDS", "5"))
+    graceful_shutdown_seconds: int = int(os.getenv("APP_GRACEFUL_SHUTDOWN_SECONDS", "30"))
+    event_loop: str = os.getenv("APP_LOOP", "auto")
+    http_protocol: str = os.getenv("APP_HTTP", "auto")
+    h11_max_incomplete_event_size: int = int(os.getenv("APP_H11_MAX_INCOMPLETE_EVENT_SIZE", "0"))
+
+    serve_mode: str = os.getenv("SERVE_MODE", "full").strip().lower()
 
     database_url: str = os.getenv("DATABASE_URL", "sqlite:///data/app.db")
     files_root: Path = PROJECT_ROOT / os.getenv("FILES_ROOT", "data/apk")
     tmp_root: Path = PROJECT_ROOT / os.getenv("TMP_ROOT", "data/tmp")
+    archive_root: Path = PROJECT_ROOT / os.getenv("ARCHIVE_ROOT", "data/archive")
     templates_dir: Path = PACKAGE_DIR / "templates"
     static_dir: Path = PACKAGE_DIR / "static"
 
+    storage_backend: str = os.getenv("STORAGE_BACKEND", "local").strip().lower()
+    s3_endpoint_url: str = os.getenv("S3_ENDPOINT_URL", "")
+    s3_bucket: str = os.getenv("S3_BUCKET", "")
+    s3_access_key: str = os.getenv("S3_ACCESS_KEY", "")
+    s3_secret_key: str = os.getenv("S3_SECRET_KEY", "")
+    s3_region: str = os.getenv("S3_REGION", "us-east-1")
+    storage_cache_dir: Path | None = (
+        PROJECT_ROOT / os.getenv("STORAGE_CACHE_DIR") if os.getenv("STORAGE_CACHE_DIR") else None
+    )
+    storage_cache_max_bytes: int = int(os.getenv("STORAGE_CACHE_MAX_BYTES", str(10 * 1024**3)))
+
+    mirror_token: str = os.getenv("MIRROR_TOKEN", "")
+    mirror_primary_url: str = os.getenv("MIRROR_PRIMARY_URL", "")
+    mirror_sync_interval_seconds: int = int(os.getenv("MIRROR_SYNC_INTERVAL_SECONDS", "0"))
+
+    download_token_ttl_seconds: int = int(os.getenv("DOWNLOAD_TOKEN_TTL_SECONDS", "86400"))
+    download_log_flush_seconds: float = float(os.getenv("DOWNLOAD_LOG_FLUSH_SECONDS", "1.0"))
+    cache_check_interval_seconds: float = float(os.getenv("CACHE_CHECK_INTERVAL_SECONDS", "1.0"))
+
+    hot_top_n: int = int(os.getenv("HOT_TOP_N", "10"))
+    hot_warm_interval_seconds: float = float(os.getenv("HOT_WARM_INTERVAL_SECONDS", "60"))
+    hot_half_life_seconds: float = float(os.getenv("HOT_HALF_LIFE_SECONDS", "900"))
+    hot_mmap_budget_bytes: int = int(os.getenv("HOT_MMAP_BUDGET_BYTES", "0"))
+
     session_max_age_seconds: int = int(os.getenv("SESSION_MAX_AGE_SECONDS", "28800"))
+    session_backend: str = os.getenv("SESSION_BACKEND", "auto").strip().lower()
+    session_memory_max_entries: int = int(os.getenv("SESSION_MEMORY_MAX_ENTRIES", "1000"))
+    session_reap_interval_seconds: float = float(os.getenv("SESSION_REAP_INTERVAL_SECONDS", "300"))
+    admin_cache_ttl_seconds: float = float(os.getenv("ADMIN_CACHE_TTL_SECONDS", "30"))
+    argon2_workers: int = int(os.getenv("ARGON2_WORKERS", "2"))
+    argon2_max_pending: int = int(os.getenv("ARGON2_MAX_PENDING", "8"))
+    login_window_seconds: int = int(os.getenv("LOGIN_WINDOW_SECONDS", "300"))
+    login_max_failures_per_ip: int = int(os.getenv("LOGIN_MAX_FAILURES_PER_IP", "20"))
+    login_max_failures_per_user: int = int(os.getenv("LOGIN_MAX_FAILURES_PER_USER", "5"))
+
+    trace_sample_rate: float = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+    trace_dir: Path = PROJECT_ROOT / os.getenv("TRACE_DIR", "data/traces")
+    trace_max_bytes: int = int(os.getenv("TRACE_MAX_BYTES", str(10 * 1024**2)))
+    trace_backups: int = int(os.getenv("TRACE_BACKUPS", "5"))
+    profile_max_seconds: int = int(os.getenv("PROFILE_MAX_SECONDS", "60"))
+
+    log_archive_after_days: int = int(os.getenv("LOG_ARCHIVE_AFTER_DAYS", "90"))
+    log_archive_batch_size: int = int(os.getenv("LOG_ARCHIVE_BATCH_SIZE", "5000"))
 
     auto_bootstrap_admin: bool = _to_bool(os.getenv("AUTO_BOOTSTRAP_ADMIN"), True)
     admin_username: str = os.getenv("ADMIN_USERNAME", "admin")
     admin_password: str = os.getenv("ADMIN_PASSWORD", "ChangeMeNow!")
 
+    @property
+    def edge_mode(self) -> bool:
+        return self.serve_mode == "edge"
+
 
 settings = Settings()
@@ -1,12 +1,14 @@
 from __future__ import annotations
 
 from contextlib import contextmanager
+from pathlib import Path
 
 from sqlalchemy import create_engine
 from sqlalchemy.orm import Session, sessionmaker
 
-from .config import settings
+from .config import PROJECT_ROOT, settings
 from .models import Base
+from .tracing import instrument_engine
 
 
 connect_args = {}
@@ -15,9 +17,31 @@ if settings.database_url.startswith("sqlite"):
 
 
 engine = create_engine(settings.database_url, connect_args=connect_args)
+instrument_engine(engine)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
 
+def sqlite_database_path() -> Path | None:
+    if not settings.database_url.startswith("sqlite:///"):
+        return None
+    db_path = Path(settings.database_url.replace("sqlite:///", ""))
+    if not db_path.is_absolute():
+        db_path = PROJECT_ROOT / db_path
+    return db_path
+
+
+def configure_read_only() -> None:
+    db_path = sqlite_database_path()
+    if db_path is None:
+        return
+    read_only_engine = create_engine(
+        f"sqlite:///file:{db_path.as_posix()}?mode=ro&uri=true",
+        connect_args={"check_same_thread": False},
+    )
+    instrument_engine(read_only_engine)
+    SessionLocal.configure(bind=read_only_engine)
+
+
 def init_db() -> None:
     Base.metadata.create_all(bind=engine)
 
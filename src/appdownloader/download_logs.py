@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+
+from .config import settings
+from .db import SessionLocal
+from .spool import spool_download_logs
+from .utils import write_download_logs
+
+
+logger = logging.getLogger(__name__)
+
+
+class DownloadLogQueue:
+    def __init__(self, flush_interval: float | None = None, batch_size: int = 500):
+        self.flush_interval = settings.download_log_flush_seconds if flush_interval is None else flush_interval
+        self.batch_size = batch_size
+        self._queue: queue.SimpleQueue[dict] = queue.SimpleQueue()
+        self._write_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._pending = 0
+        self._done = threading.Condition()
+
+    def submit(
+        self,
+        *,
+        apk_file_id: int,
+        app_type_id: int,
+        version: str,
+        ip: str | None,
+        user_agent: str | None,
+        ping_id: str | None = None,
+    ) -> None:
+        with self._done:
+            self._pending += 1
+        self._queue.put(
+            {
+                "apk_file_id": apk_file_id,
+                "app_type_id": app_type_id,
+                "version": version,
+                "ip": ip,
+                "user_agent": user_agent,
+                "ping_id": ping_id,
+                "created_at": datetime.now(timezone.utc).replace(tzinfo=None),
+            }
+        )
+        if self._thread is None:
+            self._start()
+
+    def _start(self) -> None:
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="download-log-writer", daemon=True)
+                self._thread.start()
+
+    def _drain(self, first: dict | None = None) -> list[dict]:
+        rows = [first] if first else []
+        while len(rows) < self.batch_size:
+            try:
+                rows.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return rows
+
+    def _write(self, rows: list[dict]) -> None:
+        if not rows:
+            return
+        try:
+            if settings.edge_mode:
+                spool_download_logs(rows)
+                return
+            with SessionLocal() as db:
+                write_download_logs(db, rows)
+        finally:
+            with self._done:
+                self._pending -= len(rows)
+                self._done.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            try:
+                with self._write_lock:
+                    self._write(self._drain(first))
+            except Exception:
+                logger.exception("failed to write download logs")
+            time.sleep(self.flush_interval)
+
+    def flush(self, timeout: float = 5.0) -> None:
+        with self._write_lock:
+            while rows := self._drain():
+                self._write(rows)
+        with self._done:
+            self._done.wait_for(lambda: self._pending <= 0, timeout)
+
+
+download_log_queue = DownloadLogQueue()
@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import logging
+import mmap
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from statistics import median
+
+from starlette.responses import Response
+
+from .config import settings
+from .storage import get_storage
+
+
+logger = logging.getLogger(__name__)
+
+READ_CHUNK_SIZE = 1024 * 1024
+LATENCY_SAMPLES = 1000
+
+
+def warm_path(path: Path) -> bool:
+    try:
+        fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    except OSError:
+        return False
+    try:
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        else:
+            while os.read(fd, READ_CHUNK_SIZE):
+                pass
+        return True
+    finally:
+        os.close(fd)
+
+
+class PopularityTracker:
+    def __init__(self, half_life_seconds: float):
+        self.half_life_seconds = half_life_seconds
+        self._scores: dict[str, tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def _decayed(self, score: float, updated_at: float, now: float) -> float:
+        return score * 0.5 ** ((now - updated_at) / self.half_life_seconds)
+
+    def record(self, key: str, now: float | None = None) -> None:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            score, updated_at = self._scores.get(key, (0.0, now))
+            self._scores[key] = (self._decayed(score, updated_at, now) + 1.0, now)
+
+    def top(self, n: int, now: float | None = None) -> list[tuple[str, float]]:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            ranked = [(key, self._decayed(score, at, now)) for key, (score, at) in self._scores.items()]
+            ranked.sort(key=lambda item: item[1], reverse=True)
+            for key, score in ranked[n * 4 :]:
+                if score < 0.01:
+                    del self._scores[key]
+        return ranked[:n]
+
+    def forget(self, key: str) -> None:
+        with self._lock:
+            self._scores.pop(key, None)
+
+
+@dataclass(frozen=True)
+class MappedBlob:
+    data: mmap.mmap
+    size: int
+
+
+def _summarize(samples: list[float]) -> dict:
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered), 3),
+        "p50": round(median(ordered), 3),
+        "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        "max": round(ordered[-1], 3),
+    }
+
+
+class HotFiles:
+    def __init__(
+        self,
+        *,
+        top_n: int | None = None,
+        mmap_budget_bytes: int | None = None,
+        warm_interval: float | None = None,
+        half_life_seconds: float | None = None,
+    ):
+        self.top_n = settings.hot_top_n if top_n is None else top_n
+        self.mmap_budget_bytes = settings.hot_mmap_budget_bytes if mmap_budget_bytes is None else mmap_budget_bytes
+        self.warm_interval = settings.hot_warm_interval_seconds if warm_interval is None else warm_interval
+        self.tracker = PopularityTracker(
+            settings.hot_half_life_seconds if half_life_seconds is None else half_life_seconds
+        )
+        self._warmed: dict[str, float] = {}
+        self._mapped: OrderedDict[str, MappedBlob] = OrderedDict()
+        self._latency: dict[str, deque[float]] = {}
+        self._lock = threading.Lock()
+        self._queue: queue.SimpleQueue[str] = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+
+    def _start(self) -> None:
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="hot-file-warmer", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                key = self._queue.get(timeout=self.warm_interval)
+            except queue.Empty:
+                key = None
+            try:
+                if key is None:
+                    self.refresh()
+                else:
+                    self.warm(key)
+            except Exception:
+                logger.exception("failed to warm hot files")
+
+    def record_download(self, key: str) -> None:
+        self.tracker.record(key)
+        if self._thread is None:
+            self._start()
+
+    def schedule_warm(self, key: str) -> None:
+        self._queue.put(key)
+        if self._thread is None:
+            self._start()
+
+    def warm(self, key: str) -> bool:
+        path = get_storage().fetch(key)
+        if path is None or not warm_path(path):
+            return False
+        with self._lock:
+            self._warmed[key] = time.monotonic()
+        return True
+
+    def mapped(self, key: str) -> MappedBlob | None:
+        with self._lock:
+            return self._mapped.get(key)
+
+    def refresh(self) -> None:
+        hottest = [key for key, _score in self.tracker.top(self.top_n)]
+        for key in hottest:
+            self.warm(key)
+        stale_before = time.monotonic() - self.tracker.half_life_seconds
+        with self._lock:
+            keep = set(hottest)
+            for key in [key for key, at in self._warmed.items() if key not in keep and at < stale_before]:
+                del self._warmed[key]
+        self._remap(hottest)
+
+    def _remap(self, hottest: list[str]) -> None:
+        wanted: OrderedDict[str, MappedBlob] = OrderedDict()
+        used = 0
+        storage = get_storage()
+        for key in hottest:
+            if self.mmap_budget_bytes <= 0:
+                break
+            current = self.mapped(key)
+            if current is None:
+                path = storage.fetch(key)
+                if path is None:
+                    continue
+                size = path.stat().st_size
+                if size == 0 or used + size > self.mmap_budget_bytes:
+                    continue
+                with path.open("rb") as fp:
+                    current = MappedBlob(mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ), size)
+            elif used + current.size > self.mmap_budget_bytes:
+                continue
+            wanted[key] = current
+            used += current.size
+        with self._lock:
+            # Dropped maps are closed by the garbage collector once in-flight responses finish.
+            self._mapped = wanted
+
+    @property
+    def mapped_bytes(self) -> int:
+        with self._lock:
+            return sum(blob.size for blob in self._mapped.values())
+
+    def forget(self, key: str) -> None:
+        self.tracker.forget(key)
+        with self._lock:
+            self._warmed.pop(key, None)
+            self._mapped.pop(key, None)
+
+    def label_for(self, key: str) -> str:
+        with self._lock:
+            if key in self._mapped:
+                return "mmap"
+            return "warm" if key in self._warmed else "cold"
+
+    def record_first_byte(self, label: str, seconds: float) -> None:
+        with self._lock:
+            self._latency.setdefault(label, deque(maxlen=LATENCY_SAMPLES)).append(seconds * 1000)
+
+    def stats(self) -> dict:
+        with self._lock:
+            latency = {label: list(samples) for label, samples in self._latency.items()}
+            warmed = sorted(self._warmed)
+            mapped = list(self._mapped)
+        return {
+            "top": [{"key": key, "score": round(score, 3)} for key, score in self.tracker.top(self.top_n)],
+            "warmed": warmed,
+            "mapped": mapped,
+            "mapped_bytes": self.mapped_bytes,
+            "mmap_budget_bytes": self.mmap_budget_bytes,
+            "first_byte_ms": {label: _summarize(samples) for label, samples in latency.items() if samples},
+        }
+
+
+def iter_mapped(blob: MappedBlob, start: int, end: int) -> Iterator[bytes]:
+    # A plain iterator: StreamingResponse pulls it in the threadpool, so page
+    # faults on a cold mapping never stall the event loop.
+    for offset in range(start, end, READ_CHUNK_SIZE):
+        yield blob.data[offset : min(offset + READ_CHUNK_SIZE, end)]
+
+
+class FirstByteTimer(Response):
+    def __init__(self, inner: Response, label: str, started: float, hot: HotFiles):
+        self.inner = inner
+        self.label = label
+        self.started = started
+        self.hot = hot
+        self.status_code = inner.status_code
+
+    @property
+    def background(self):
+        return self.inner.background
+
+    @background.setter
+    def background(self, value) -> None:
+        self.inner.background = value
+
+    @property
+    def raw_headers(self):
+        return self.inner.raw_headers
+
+    async def __call__(self, scope, receive, send) -> None:
+        pending = True
+
+        async def timed_send(message) -> None:
+            nonlocal pending
+            if pending and message["type"] == "http.response.body":
+                pending = False
+                self.hot.record_first_byte(self.label, time.perf_counter() - self.started)
+            await send(message)
+
+        await self.inner(scope, receive, timed_send)
+
+
+hot_files = HotFiles()
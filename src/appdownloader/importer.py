@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import sys
+import time
+from collections.abc import Callable, Iterable
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from sqlalchemy.orm import Session
+
+from .audit import AuditTrail
+from .cache import bump_generation
+from .models import ApkFile, ApkVersion, AppType
+from .storage import blob_key, get_storage
+from .utils import digest_stream, slugify_name
+from .versioning import version_key
+
+
+DEFAULT_PATTERN = r"^(?P<slug>[A-Za-z0-9][A-Za-z0-9_-]*?)[-_]v?(?P<version>\d+(?:\.\d+)*(?:[-+][0-9A-Za-z.]+)?)\.apk$"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class ImportRule:
+    pattern: re.Pattern
+    app_slug: str | None = None
+    app_name: str | None = None
+
+    def match(self, path: Path) -> tuple[str, str] | None:
+        found = self.pattern.search(path.name)
+        if not found:
+            return None
+        groups = found.groupdict()
+        slug = self.app_slug or groups.get("slug")
+        version = groups.get("version")
+        if not slug or not version:
+            return None
+        return slugify_name(slug), version
+
+
+@dataclass(frozen=True)
+class ImportCandidate:
+    path: Path
+    app_slug: str
+    version: str
+
+
+@dataclass(frozen=True)
+class InspectedFile:
+    path: str
+    size: int
+    sha256: str
+    error: str | None
+    crc32: int = 0
+
+
+@dataclass
+class ImportReport:
+    scanned: int = 0
+    imported: int = 0
+    skipped_existing: int = 0
+    unmatched: list[str] = field(default_factory=list)
+    invalid: list[str] = field(default_factory=list)
+    duplicates: list[str] = field(default_factory=list)
+    missing_apps: list[str] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def files_per_minute(self) -> float:
+        return self.imported * 60 / self.elapsed if self.elapsed else 0.0
+
+
+def load_rules(rules_file: Path | None, patterns: Iterable[str] = ()) -> list[ImportRule]:
+    rules = [ImportRule(re.compile(p, re.IGNORECASE)) for p in patterns]
+    if rules_file:
+        for item in json.loads(rules_file.read_text(encoding="utf-8")):
+            rules.append(ImportRule(re.compile(item["pattern"], re.IGNORECASE), item.get("app"), item.get("name")))
+    return rules or [ImportRule(re.compile(DEFAULT_PATTERN, re.IGNORECASE))]
+
+
+def collect_candidates(source_dir: Path, rules: list[ImportRule], report: ImportReport) -> list[ImportCandidate]:
+    seen: set[tuple[str, str]] = set()
+    candidates = []
+    for path in sorted(source_dir.rglob("*")):
+        if not path.is_file() or path.suffix.lower() != ".apk":
+            continue
+        report.scanned += 1
+        mapped = next((m for m in (rule.match(path) for rule in rules) if m), None)
+        if not mapped:
+            report.unmatched.append(str(path))
+            continue
+        if mapped in seen:
+            report.duplicates.append(str(path))
+            continue
+        seen.add(mapped)
+        candidates.append(ImportCandidate(path=path, app_slug=mapped[0], version=mapped[1]))
+    return candidates
+
+
+def inspect_file(path: str) -> InspectedFile:
+    try:
+        with open(path, "rb") as fp:
+            digest = digest_stream(fp, HASH_CHUNK_SIZE)
+    except OSError as exc:
+        return InspectedFile(path=path, size=0, sha256="", error=str(exc))
+
+    error = None if digest.size >= 4 and digest.header.startswith(b"PK") else "APK 헤더 검증에 실패했습니다."
+    return InspectedFile(path=path, size=digest.size, sha256=digest.sha256, error=error, crc32=digest.crc32)
+
+
+def _print_progress(done: int, total: int, started: float) -> None:
+    if done % 25 and done != total:
+        return
+    elapsed = time.monotonic() - started
+    rate = done * 60 / elapsed if elapsed else 0.0
+    print(f"\r[{done:>6}/{total}] {rate:8.1f} files/min", end="", file=sys.stderr, flush=True)
+
+
+def _app_names(rules: list[ImportRule]) -> dict[str, str]:
+    return {slugify_name(rule.app_slug): rule.app_name for rule in rules if rule.app_slug and rule.app_name}
+
+
+def _resolve_app_types(
+    db: Session,
+    slugs: set[str],
+    create_apps: bool,
+    names: dict[str, str] | None = None,
+) -> dict[str, AppType]:
+    # Apps are identified by slug only; the display name is unique too but may
+    # differ from the slug, so it is assigned separately and never matched on.
+    names = names or {}
+    app_types = {a.slug: a for a in db.query(AppType).filter(AppType.slug.in_(slugs)).all()}
+    wanted = {names.get(slug, slug) for slug in slugs}
+    taken = {
+        name: slug for name, slug in db.query(AppType.name, AppType.slug).filter(AppType.name.in_(wanted)).all()
+    }
+
+    def available(name: str, slug: str) -> str:
+        if taken.get(name, slug) == slug:
+            return name
+        return f"{name} ({slug})"
+
+    if create_apps:
+        # Names only apply to apps created here; renaming an existing app is
+        # an admin action with its own audit entry, not an import side effect.
+        for slug in sorted(slugs - set(app_types)):
+            app_type = AppType(name=available(names.get(slug, slug), slug), slug=slug, is_active=True)
+            taken[app_type.name] = slug
+            db.add(app_type)
+            app_types[slug] = app_type
+        db.flush()
+    return app_types
+
+
+def _write_batch(
+    db: Session,
+    batch: list[tuple[ImportCandidate, InspectedFile, AppType]],
+    audit: AuditTrail,
+) -> None:
+    storage = get_storage()
+    stored_paths: list[str] = []
+    try:
+        versions = [
+            ApkVersion(app_type_id=app_type.id, version=candidate.version, version_key=version_key(candidate.version))
+            for candidate, _i, app_type in batch
+        ]
+        db.add_all(versions)
+        db.flush()
+
+        files = []
+        for version, (candidate, info, app_type) in zip(versions, batch):
+            stored_path = blob_key(info.sha256)
+            if not storage.exists(stored_path):
+                storage.put_file(stored_path, candidate.path)
+                stored_paths.append(stored_path)
+            files.append(
+                ApkFile(
+                    apk_version_id=version.id,
+                    revision_no=1,
+                    stored_path=stored_path,
+                    original_filename=candidate.path.name,
+                    file_size=info.size,
+                    sha256=info.sha256,
+                    crc32=info.crc32,
+                    uploaded_by=None,
+                    is_current=True,
+                )
+            )
+        db.add_all(files)
+        db.flush()
+
+        for version, apk_record in zip(versions, files):
+            version.current_file_id = apk_record.id
+        audit.record_many("import_apk", "apk_version", versions, actor_id=None, actor_type="system")
+        bump_generation(db)
+        db.commit()
+    except Exception:
+        db.rollback()
+        for stored_path in stored_paths:
+            storage.delete(stored_path)
+        raise
+
+
+def import_directory(
+    db: Session,
+    source_dir: Path,
+    rules: list[ImportRule],
+    *,
+    create_apps: bool = False,
+    workers: int | None = None,
+    batch_size: int = 200,
+    dry_run: bool = False,
+    progress: Callable[[int, int, float], None] | None = _print_progress,
+) -> ImportReport:
+    started = time.monotonic()
+    report = ImportReport()
+    candidates = collect_candidates(source_dir, rules, report)
+
+    app_types = _resolve_app_types(
+        db,
+        {c.app_slug for c in candidates},
+        create_apps and not dry_run,
+        _app_names(rules),
+    )
+    existing = {
+        (app_type_id, version)
+        for app_type_id, version in db.query(ApkVersion.app_type_id, ApkVersion.version)
+        .filter(ApkVersion.app_type_id.in_([a.id for a in app_types.values() if a.id is not None]))
+        .all()
+    }
+
+    pending = []
+    for candidate in candidates:
+        app_type = app_types.get(candidate.app_slug)
+        if app_type is None:
+            report.missing_apps.append(str(candidate.path))
+        elif (app_type.id, candidate.version) in existing:
+            report.skipped_existing += 1
+        else:
+            pending.append((candidate, app_type))
+
+    batch = []
+    audit = AuditTrail(db, user_agent="appdownloader import")
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        inspected = pool.map(inspect_file, [str(c.path) for c, _a in pending], chunksize=8)
+        for done, ((candidate, app_type), info) in enumerate(zip(pending, inspected), start=1):
+            if info.error:
+                report.invalid.append(f"{candidate.path}: {info.error}")
+            elif not dry_run:
+                batch.append((candidate, info, app_type))
+                if len(batch) >= batch_size:
+                    _write_batch(db, batch, audit)
+                    report.imported += len(batch)
+                    batch = []
+            if progress:
+                progress(done, len(pending), started)
+
+    if batch:
+        _write_batch(db, batch, audit)
+        report.imported += len(batch)
+
+    if progress and pending:
+        print(file=sys.stderr)
+    report.elapsed = time.monotonic() - started
+    return report
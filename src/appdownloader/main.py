@@ -1,45 +1,63 @@
 from __future__ import annotations
 
-from pathlib import Path
+import os
 
-from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
-from starlette.middleware.sessions import SessionMiddleware
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 
-from .auth import bootstrap_admin_if_needed
-from .config import PROJECT_ROOT, settings
-from .db import SessionLocal, init_db
-from .routes.admin import router as admin_router
+from .assets import AssetFiles
+from .compression import CompressionMiddleware
+from .config import settings
+from .db import SessionLocal, configure_read_only, init_db, sqlite_database_path
+from .pagination import InvalidCursor
+from .routes.api import router as api_router
 from .routes.public import router as public_router
 from .utils import ensure_dir
 
 
+# Set by `serve --workers N` after the parent has prepared the runtime once.
+RUNTIME_PREPARED_ENV = "APPDOWNLOADER_RUNTIME_PREPARED"
+
 app = FastAPI(title=settings.app_name)
+app.add_middleware(CompressionMiddleware)
+
+
+if settings.edge_mode:
+    configure_read_only()
+else:
+    from .sessions import ServerSessionMiddleware, build_session_store
 
+    app.add_middleware(
+        ServerSessionMiddleware,
+        store=build_session_store(),
+        max_age=settings.session_max_age_seconds,
+        path="/admin",
+        same_site="lax",
+        https_only=False,
+    )
 
-app.add_middleware(
-    SessionMiddleware,
-    secret_key=settings.secret_key,
-    max_age=settings.session_max_age_seconds,
-    same_site="lax",
-    https_only=False,
-)
+
+if settings.trace_sample_rate > 0:
+    from .tracing import TracingMiddleware
+
+    app.add_middleware(TracingMiddleware)
 
 
 def _ensure_sqlite_dir() -> None:
-    if settings.database_url.startswith("sqlite:///"):
-        db_file = settings.database_url.replace("sqlite:///", "")
-        db_path = Path(db_file)
-        if not db_path.is_absolute():
-            db_path = PROJECT_ROOT / db_path
+    db_path = sqlite_database_path()
+    if db_path:
         ensure_dir(db_path.parent)
 
 
-@app.on_event("startup")
-def on_startup() -> None:
+def prepare_runtime() -> None:
+    ensure_dir(settings.tmp_root)
+    if settings.edge_mode:
+        return
+
+    from .auth import bootstrap_admin_if_needed
+
     _ensure_sqlite_dir()
     ensure_dir(settings.files_root)
-    ensure_dir(settings.tmp_root)
     ensure_dir(settings.static_dir)
     init_db()
 
@@ -50,6 +68,33 @@ def on_startup() -> None:
         db.close()
 
 
-app.mount("/static", StaticFiles(directory=str(settings.static_dir)), name="static")
+@app.on_event("startup")
+def on_startup() -> None:
+    if os.environ.get(RUNTIME_PREPARED_ENV) == "1":
+        return
+    prepare_runtime()
+
+
+@app.exception_handler(InvalidCursor)
+async def invalid_cursor(_request: Request, exc: InvalidCursor) -> JSONResponse:
+    return JSONResponse({"detail": f"Invalid cursor: {exc}"}, status_code=400)
+
+
+@app.on_event("shutdown")
+def on_shutdown() -> None:
+    from .download_logs import download_log_queue
+
+    download_log_queue.flush()
+    if settings.trace_sample_rate > 0:
+        from .tracing import trace_exporter
+
+        trace_exporter.flush()
+
+
+app.mount("/static", AssetFiles(directory=str(settings.static_dir)), name="static")
 app.include_router(public_router)
-app.include_router(admin_router)
+app.include_router(api_router)
+if not settings.edge_mode:
+    from .routes.admin import router as admin_router
+
+    app.include_router(admin_router)
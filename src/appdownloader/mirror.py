@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from sqlalchemy import DateTime, delete, insert, update
+from sqlalchemy.orm import Session
+
+from .cache import bump_generation
+from .config import settings
+from .models import ApkFile, ApkVersion, AppType, DeviceProfile, Notice, ReleaseChannel
+from .signing import revoke_files
+from .storage import StorageBackend, blob_key, get_storage, legacy_path
+from .utils import ensure_dir
+from .versioning import version_key
+
+if TYPE_CHECKING:
+    import httpx
+
+
+CATALOG_MODELS = {
+    "app_types": AppType,
+    "apk_versions": ApkVersion,
+    "apk_files": ApkFile,
+    "notices": Notice,
+    "device_profiles": DeviceProfile,
+    "release_channels": ReleaseChannel,
+}
+LOCAL_ONLY_COLUMNS = {"stored_path", "uploaded_by", "created_by"}
+CHUNK_SIZE = 1024 * 1024
+FETCH_ATTEMPTS = 3
+
+
+class MirrorError(Exception):
+    pass
+
+
+@dataclass
+class MirrorReport:
+    blobs_total: int = 0
+    blobs_fetched: int = 0
+    bytes_fetched: int = 0
+    blobs_pruned: int = 0
+    catalog_rows: dict[str, int] = field(default_factory=dict)
+    catalog_changed: bool = False
+
+
+def _serialize(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def build_catalog_manifest(db: Session) -> dict:
+    tables = {}
+    for name, model in CATALOG_MODELS.items():
+        columns = [c for c in model.__table__.columns if c.name not in LOCAL_ONLY_COLUMNS]
+        rows = db.query(*columns).order_by(model.id).all()
+        tables[name] = [{c.name: _serialize(value) for c, value in zip(columns, row)} for row in rows]
+    body = json.dumps(tables, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return {
+        "format": 1,
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "catalog_sha256": hashlib.sha256(body).hexdigest(),
+        "tables": tables,
+    }
+
+
+def _deserialize_rows(model, rows: list[dict]) -> list[dict]:
+    date_columns = {c.name for c in model.__table__.columns if isinstance(c.type, DateTime)}
+    known = {c.name for c in model.__table__.columns}
+    result = []
+    for row in rows:
+        item = {k: v for k, v in row.items() if k in known}
+        for name in date_columns & item.keys():
+            if item[name] is not None:
+                item[name] = datetime.fromisoformat(item[name])
+        result.append(item)
+    return result
+
+
+def _fetch_blob(client: httpx.Client, sha256: str, part_path: Path) -> int:
+    import httpx
+
+    fetched = 0
+    for attempt in range(FETCH_ATTEMPTS):
+        offset = part_path.stat().st_size if part_path.exists() else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+        try:
+            with client.stream("GET", f"/api/mirror/blobs/{sha256}", headers=headers) as response:
+                if response.status_code == 416:
+                    return fetched
+                if response.status_code not in (200, 206):
+                    raise MirrorError(f"blob {sha256}: primary answered {response.status_code}")
+                mode = "ab" if response.status_code == 206 else "wb"
+                with part_path.open(mode) as out:
+                    for chunk in response.iter_bytes(CHUNK_SIZE):
+                        out.write(chunk)
+                        fetched += len(chunk)
+            return fetched
+        except httpx.TransportError:
+            if attempt == FETCH_ATTEMPTS - 1:
+                raise
+    return fetched
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as fp:
+        for chunk in iter(lambda: fp.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _swap_catalog(db: Session, tables: dict[str, list[dict]]) -> None:
+    rows = {name: _deserialize_rows(model, tables.get(name, [])) for name, model in CATALOG_MODELS.items()}
+    for item in rows["apk_files"]:
+        item["stored_path"] = blob_key(item["sha256"])
+    for item in rows["apk_versions"]:
+        item["version_key"] = version_key(item["version"])
+
+    previous_ids = {file_id for (file_id,) in db.query(ApkFile.id)}
+    try:
+        revoke_files(db, previous_ids - {item["id"] for item in rows["apk_files"]})
+        db.execute(update(ApkVersion).values(current_file_id=None))
+        for model in (ReleaseChannel, ApkFile, ApkVersion, AppType, Notice, DeviceProfile):
+            db.execute(delete(model))
+        for name in ("app_types", "apk_versions", "apk_files", "notices", "device_profiles", "release_channels"):
+            if rows[name]:
+                db.execute(insert(CATALOG_MODELS[name]), rows[name])
+        bump_generation(db)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+
+def sync_from_primary(
+    db: Session,
+    client: httpx.Client,
+    *,
+    storage: StorageBackend | None = None,
+    work_dir: Path | None = None,
+    prune: bool = True,
+) -> MirrorReport:
+    storage = storage or get_storage()
+    work_dir = work_dir or settings.tmp_root / "mirror"
+    ensure_dir(work_dir)
+    report = MirrorReport()
+
+    response = client.get("/api/mirror/manifest")
+    if response.status_code != 200:
+        raise MirrorError(f"manifest request failed: {response.status_code}")
+    manifest = response.json()
+    tables = manifest["tables"]
+
+    wanted = {row["sha256"]: row["file_size"] for row in tables["apk_files"]}
+    report.blobs_total = len(wanted)
+    for sha256, size in wanted.items():
+        key = blob_key(sha256)
+        if storage.exists(key):
+            continue
+        part_path = work_dir / f"{sha256}.part"
+        report.bytes_fetched += _fetch_blob(client, sha256, part_path)
+        if part_path.stat().st_size != size or _file_sha256(part_path) != sha256:
+            part_path.unlink(missing_ok=True)
+            raise MirrorError(f"blob {sha256} failed verification; catalog left unchanged")
+        storage.put_file(key, part_path)
+        part_path.unlink(missing_ok=True)
+        report.blobs_fetched += 1
+
+    local_files = db.query(ApkFile.stored_path, ApkFile.sha256).all()
+    previous_keys = {key for key, _sha in local_files}
+    legacy_keys = any(key != blob_key(sha256) for key, sha256 in local_files)
+    if legacy_keys or build_catalog_manifest(db)["catalog_sha256"] != manifest["catalog_sha256"]:
+        _swap_catalog(db, tables)
+        report.catalog_changed = True
+    report.catalog_rows = {name: len(rows) for name, rows in tables.items()}
+
+    if prune:
+        for key in previous_keys - {blob_key(sha256) for sha256 in wanted}:
+            if legacy_path(key):
+                continue
+            storage.delete(key)
+            report.blobs_pruned += 1
+    return report
+
+
+def primary_client(base_url: str | None = None, token: str | None = None) -> httpx.Client:
+    import httpx
+
+    base_url = base_url or settings.mirror_primary_url
+    if not base_url:
+        raise MirrorError("MIRROR_PRIMARY_URL is not configured")
+    return httpx.Client(
+        base_url=base_url,
+        headers={"Authorization": f"Bearer {token or settings.mirror_token}"},
+        timeout=httpx.Timeout(30.0, read=300.0),
+    )
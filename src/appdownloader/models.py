@@ -3,14 +3,18 @@ from __future__ import annotations
 from datetime import datetime
 
 from sqlalchemy import (
+    DDL,
     Boolean,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
     UniqueConstraint,
+    event,
     func,
+    text,
 )
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
@@ -53,11 +57,16 @@ class AppType(Base):
 
 class ApkVersion(Base):
     __tablename__ = "apk_versions"
-    __table_args__ = (UniqueConstraint("app_type_id", "version", name="uq_apk_versions_app_type_version"),)
+    __table_args__ = (
+        UniqueConstraint("app_type_id", "version", name="uq_apk_versions_app_type_version"),
+        Index("ix_apk_versions_app_type_id_version_key", "app_type_id", "version_key", "id"),
+        Index("ix_apk_versions_updated_at", "updated_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     app_type_id: Mapped[int] = mapped_column(ForeignKey("app_types.id", ondelete="CASCADE"), nullable=False)
     version: Mapped[str] = mapped_column(String(64), nullable=False)
+    version_key: Mapped[str] = mapped_column(String(255), nullable=False, default="", server_default="")
     release_note: Mapped[str | None] = mapped_column(Text, nullable=True)
     current_file_id: Mapped[int | None] = mapped_column(ForeignKey("apk_files.id", ondelete="SET NULL"), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now())
@@ -84,7 +93,14 @@ class ApkVersion(Base):
 
 class ApkFile(Base):
     __tablename__ = "apk_files"
-    __table_args__ = (UniqueConstraint("apk_version_id", "revision_no", name="uq_apk_files_version_revision"),)
+    __table_args__ = (
+        UniqueConstraint("apk_version_id", "revision_no", name="uq_apk_files_version_revision"),
+        Index("ix_apk_files_sha256", "sha256"),
+        Index("ix_apk_files_stored_path", "stored_path"),
+        # Signed links and revocations refer to file ids; SQLite would hand a
+        # deleted newest id to the next upload without AUTOINCREMENT.
+        {"sqlite_autoincrement": True},
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     apk_version_id: Mapped[int] = mapped_column(ForeignKey("apk_versions.id", ondelete="CASCADE"), nullable=False)
@@ -93,6 +109,7 @@ class ApkFile(Base):
     original_filename: Mapped[str] = mapped_column(String(255), nullable=False)
     file_size: Mapped[int] = mapped_column(Integer, nullable=False)
     sha256: Mapped[str] = mapped_column(String(64), nullable=False)
+    crc32: Mapped[int | None] = mapped_column(Integer, nullable=True)
     uploaded_by: Mapped[int] = mapped_column(ForeignKey("admin_users.id", ondelete="SET NULL"), nullable=True)
     is_current: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True, server_default="1")
     created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now())
@@ -106,6 +123,10 @@ class ApkFile(Base):
 
 class Notice(Base):
     __tablename__ = "notices"
+    __table_args__ = (
+        Index("ix_notices_created_at_id", "created_at", "id"),
+        Index("ix_notices_is_visible_is_pinned_created_at", "is_visible", "is_pinned", "created_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     title: Mapped[str] = mapped_column(String(200), nullable=False)
@@ -122,8 +143,56 @@ class Notice(Base):
     )
 
 
+class DeviceProfile(Base):
+    __tablename__ = "device_profiles"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[str] = mapped_column(String(120), unique=True, nullable=False)
+    slug: Mapped[str] = mapped_column(String(120), unique=True, nullable=False, index=True)
+    app_slugs: Mapped[str] = mapped_column(Text, nullable=False, default="", server_default="")
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        nullable=False,
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
+
+    @property
+    def app_slug_list(self) -> list[str]:
+        return [slug for slug in self.app_slugs.split(",") if slug]
+
+
+class ReleaseChannel(Base):
+    __tablename__ = "release_channels"
+    __table_args__ = (UniqueConstraint("app_type_id", "channel", name="uq_release_channels_app_type_channel"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    app_type_id: Mapped[int] = mapped_column(ForeignKey("app_types.id", ondelete="CASCADE"), nullable=False)
+    channel: Mapped[str] = mapped_column(String(20), nullable=False)
+    apk_version_id: Mapped[int | None] = mapped_column(
+        ForeignKey("apk_versions.id", ondelete="SET NULL"), nullable=True
+    )
+    rollout_version_id: Mapped[int | None] = mapped_column(
+        ForeignKey("apk_versions.id", ondelete="SET NULL"), nullable=True
+    )
+    rollout_percent: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        nullable=False,
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
+
+
 class AuditLog(Base):
     __tablename__ = "audit_logs"
+    __table_args__ = (
+        Index("ix_audit_logs_created_at_id", "created_at", "id"),
+        Index("ix_audit_logs_actor_id_created_at", "actor_id", "created_at", "id"),
+        Index("ix_audit_logs_action_created_at", "action", "created_at", "id"),
+        Index("ix_audit_logs_ip_created_at", "ip", "created_at", "id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     actor_type: Mapped[str] = mapped_column(String(20), nullable=False)
@@ -138,6 +207,12 @@ class AuditLog(Base):
 
 class DownloadLog(Base):
     __tablename__ = "download_logs"
+    __table_args__ = (
+        Index("ix_download_logs_created_at_id", "created_at", "id"),
+        Index("ix_download_logs_app_type_id_created_at", "app_type_id", "created_at", "id"),
+        Index("ix_download_logs_ip_created_at", "ip", "created_at", "id"),
+        Index("ux_download_logs_ping_id", "ping_id", unique=True, sqlite_where=text("ping_id IS NOT NULL")),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     apk_file_id: Mapped[int | None] = mapped_column(
@@ -151,4 +226,73 @@ class DownloadLog(Base):
     version: Mapped[str] = mapped_column(String(64), nullable=False)
     ip: Mapped[str | None] = mapped_column(String(100), nullable=True)
     user_agent: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    ping_id: Mapped[str | None] = mapped_column(String(32), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now())
+
+
+class CacheGeneration(Base):
+    __tablename__ = "cache_generations"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    generation: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        nullable=False,
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
+
+
+class RevokedFile(Base):
+    __tablename__ = "revoked_files"
+
+    apk_file_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    revoked_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now(), index=True)
+
+
+class AdminSession(Base):
+    __tablename__ = "admin_sessions"
+
+    id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    data: Mapped[str] = mapped_column(Text, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+
+
+class SpoolIngest(Base):
+    __tablename__ = "spool_ingests"
+
+    name: Mapped[str] = mapped_column(String(255), primary_key=True)
+    rows: Mapped[int] = mapped_column(Integer, nullable=False)
+    ingested_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now(), index=True)
+
+
+# FTS5 tables are not ORM models. Migrations 0004/0012 create them on real
+# databases; create_all builds them only alongside a freshly created source
+# table (tests, seed databases) and never touches an existing schema.
+SEARCH_INDEXES = {
+    "app_types_fts": ("app_types", ["name", "description"]),
+    "apk_versions_fts": ("apk_versions", ["release_note"]),
+    "notices_fts": ("notices", ["title", "content"]),
+}
+
+
+def _search_index_ddl(fts_name: str, source: str, columns: list[str]) -> list[str]:
+    column_list = ", ".join(columns)
+    new_values = ", ".join(f"new.{c}" for c in columns)
+    old_values = ", ".join(f"old.{c}" for c in columns)
+    return [
+        f"CREATE VIRTUAL TABLE {fts_name} USING fts5("
+        f"{column_list}, content='{source}', content_rowid='id', tokenize='trigram')",
+        f"CREATE TRIGGER {fts_name}_ai AFTER INSERT ON {source} BEGIN "
+        f"INSERT INTO {fts_name}(rowid, {column_list}) VALUES (new.id, {new_values}); END",
+        f"CREATE TRIGGER {fts_name}_ad AFTER DELETE ON {source} BEGIN "
+        f"INSERT INTO {fts_name}({fts_name}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); END",
+        f"CREATE TRIGGER {fts_name}_au AFTER UPDATE OF {column_list} ON {source} BEGIN "
+        f"INSERT INTO {fts_name}({fts_name}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {fts_name}(rowid, {column_list}) VALUES (new.id, {new_values}); END",
+    ]
+
+
+for _fts_name, (_source, _columns) in SEARCH_INDEXES.items():
+    for _statement in _search_index_ddl(_fts_name, _source, _columns):
+        event.listen(Base.metadata.tables[_source], "after_create", DDL(_statement).execute_if(dialect="sqlite"))
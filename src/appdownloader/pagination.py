@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Any
+from urllib.parse import urlencode
+
+from sqlalchemy import DateTime, String, tuple_, type_coerce
+from sqlalchemy.orm import Query
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class Page:
+    items: list[Any]
+    next_cursor: str | None
+    prev_cursor: str | None
+
+
+def clamp_page_size(value: int | None, default: int = DEFAULT_PAGE_SIZE) -> int:
+    if not value or value < 1:
+        return default
+    return min(value, MAX_PAGE_SIZE)
+
+
+def requested_page_size(params: Mapping[str, str], default: int = DEFAULT_PAGE_SIZE) -> int:
+    try:
+        value = int(params.get("limit") or 0)
+    except ValueError:
+        value = 0
+    return clamp_page_size(value, default)
+
+
+def encode_cursor(values: tuple) -> str:
+    raw = json.dumps(list(values), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str | None, size: int) -> tuple | None:
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, binascii.Error):
+        return None
+    if not isinstance(values, list) or len(values) != size:
+        return None
+    if not all(value is None or isinstance(value, (str, int, float)) for value in values):
+        raise InvalidCursor("cursor values must be scalars")
+    return tuple(values)
+
+
+def _sort_expr(column):
+    # DateTime values are compared as the stored text so cursors round-trip exactly
+    # regardless of whether a row was written with or without microseconds.
+    if isinstance(column.type, DateTime):
+        return type_coerce(column, String)
+    return column
+
+
+def keyset_page(
+    query: Query,
+    columns: list,
+    *,
+    cursor: str | None = None,
+    direction: str = "next",
+    descending: bool = True,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> Page:
+    exprs = [_sort_expr(column) for column in columns]
+    values = decode_cursor(cursor, len(exprs))
+    forward = direction != "prev"
+    newest_first = descending == forward
+
+    if values is not None:
+        key = tuple_(*exprs)
+        bound = tuple_(*values)
+        query = query.filter(key < bound if newest_first else key > bound)
+
+    ordering = [expr.desc() if newest_first else expr.asc() for expr in exprs]
+    labelled = [expr.label(f"_page_key_{i}") for i, expr in enumerate(exprs)]
+    rows = query.add_columns(*labelled).order_by(*ordering).limit(limit + 1).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if not forward:
+        rows.reverse()
+
+    items = [row[0] for row in rows]
+    keys = [tuple(row[1:]) for row in rows]
+
+    next_cursor = None
+    prev_cursor = None
+    if keys:
+        if has_more or not forward:
+            next_cursor = encode_cursor(keys[-1])
+        if (forward and values is not None) or (not forward and has_more):
+            prev_cursor = encode_cursor(keys[0])
+
+    return Page(items=items, next_cursor=next_cursor, prev_cursor=prev_cursor)
+
+
+def page_url(
+    path: str,
+    params: Mapping[str, str],
+    cursor: str | None,
+    direction: str,
+    limit: int | None = None,
+) -> str | None:
+    if not cursor:
+        return None
+    query = {key: value for key, value in params.items() if value}
+    if limit is not None:
+        query["limit"] = str(limit)
+    query.update({"cursor": cursor, "direction": direction})
+    return f"{path}?{urlencode(query)}"
+
+
+def iter_keyset(query: Query, columns: list, *, descending: bool = True, batch_size: int = 1000):
+    cursor = None
+    while True:
+        page = keyset_page(query, columns, cursor=cursor, descending=descending, limit=batch_size)
+        yield from page.items
+        if not page.next_cursor:
+            return
+        cursor = page.next_cursor
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+
+DEFAULT_INTERVAL_MS = 10
+MIN_INTERVAL_MS = 1
+# Leaf frames of threads parked on a lock or selector; they dominate every
+# sample on a quiet worker and say nothing about where CPU goes.
+IDLE_FRAMES = {("threading.py", "wait"), ("selectors.py", "select"), ("queue.py", "get")}
+
+
+class ProfilerBusy(Exception):
+    pass
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_qualname} ({Path(code.co_filename).name})"
+
+
+def _is_idle(frame) -> bool:
+    return (Path(frame.f_code.co_filename).name, frame.f_code.co_name) in IDLE_FRAMES
+
+
+def collapse_frame(frame, thread_name: str) -> str:
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame).replace(";", ":"))
+        frame = frame.f_back
+    labels.append(thread_name.replace(";", ":"))
+    return ";".join(reversed(labels))
+
+
+class SamplingProfiler:
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    def sample(self, seconds: float, interval_ms: int = DEFAULT_INTERVAL_MS, *, include_idle: bool = False) -> Counter[str]:
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy()
+        try:
+            return self._sample(seconds, max(interval_ms, MIN_INTERVAL_MS) / 1000, include_idle)
+        finally:
+            self._lock.release()
+
+    def _sample(self, seconds: float, interval: float, include_idle: bool) -> Counter[str]:
+        own = threading.get_ident()
+        stacks: Counter[str] = Counter()
+        deadline = time.monotonic() + seconds
+        while True:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own or (not include_idle and _is_idle(frame)):
+                    continue
+                stacks[collapse_frame(frame, names.get(ident, f"thread-{ident}"))] += 1
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return stacks
+            time.sleep(min(interval, remaining))
+
+
+def format_collapsed(stacks: Counter[str]) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+sampling_profiler = SamplingProfiler()
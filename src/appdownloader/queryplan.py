@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import re
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine
+
+
+# Tables that grow with usage. Scans over the small catalog tables
+# (app_types, device_profiles, release_channels, ...) are expected.
+LARGE_TABLES = frozenset(
+    {
+        "apk_versions",
+        "apk_files",
+        "notices",
+        "audit_logs",
+        "download_logs",
+        "admin_sessions",
+        "revoked_files",
+    }
+)
+
+_SCAN = re.compile(r"^SCAN (?P<table>\w+)(?: AS (?P<alias>\w+))?(?P<rest>.*)$")
+_USING_INDEX = re.compile(r"\bUSING (?:COVERING )?INDEX (?P<index>\w+)")
+_CLAUSE_END = r"(?=\bGROUP BY\b|\bORDER BY\b|\bLIMIT\b|\bUNION\b|\)\s*(?:AS|$)|$)"
+
+
+@dataclass(frozen=True)
+class AllowedScan:
+    table: str
+    pattern: str
+    reason: str
+
+    def matches(self, statement: str, table: str) -> bool:
+        return table == self.table and re.search(self.pattern, " ".join(statement.split())) is not None
+
+
+# Scans that read a whole large table on purpose. Every entry needs a reason a
+# reviewer can check; anything else that scans fails the plan test.
+ALLOWED_SCANS = (
+    AllowedScan(
+        "apk_files",
+        r"^SELECT DISTINCT apk_files\.sha256 AS \w+ FROM apk_files$",
+        "live blob set: loaded once per catalog generation, not per request",
+    ),
+    AllowedScan(
+        "apk_versions",
+        r"^SELECT count\(apk_versions\.id\) AS \w+ FROM apk_versions$",
+        "admin dashboard total: admin-only, grows only by uploads, counted on the smallest index",
+    ),
+    AllowedScan(
+        "notices",
+        r"^SELECT count\(notices\.id\) AS \w+ FROM notices$",
+        "admin dashboard total: admin-only, grows only by posting notices, counted on the smallest index",
+    ),
+)
+
+
+@dataclass(frozen=True)
+class CapturedQuery:
+    statement: str
+    parameters: tuple | dict
+
+
+@dataclass(frozen=True)
+class PlanFinding:
+    statement: str
+    detail: str
+    table: str
+    suggestion: str | None
+
+    def __str__(self) -> str:
+        hint = f"\n  suggested: {self.suggestion}" if self.suggestion else ""
+        query = re.sub(r"^SELECT .*? FROM ", "SELECT ... FROM ", " ".join(self.statement.split()))
+        return f"{self.detail}\n  query: {query[:500]}{hint}"
+
+
+@dataclass
+class QueryCapture:
+    queries: list[CapturedQuery] = field(default_factory=list)
+
+    def _record(self, _conn, _cursor, statement, parameters, _context, executemany) -> None:
+        if executemany or not statement.lstrip().upper().startswith(("SELECT", "WITH", "UPDATE", "DELETE")):
+            return
+        self.queries.append(CapturedQuery(statement, parameters))
+
+    def unique(self) -> list[CapturedQuery]:
+        seen: dict[str, CapturedQuery] = {}
+        for query in self.queries:
+            seen.setdefault(query.statement, query)
+        return list(seen.values())
+
+
+@contextmanager
+def capture_queries(*engines: Engine) -> Iterator[QueryCapture]:
+    capture = QueryCapture()
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", capture._record)
+    try:
+        yield capture
+    finally:
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", capture._record)
+
+
+def explain(connection: Connection, query: CapturedQuery) -> list[str]:
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {query.statement}", query.parameters).fetchall()
+    return [row[-1] for row in rows]
+
+
+def _columns(text: str, name: str) -> list[str]:
+    found = re.findall(rf"\b{re.escape(name)}\.(\w+)", text)
+    return list(dict.fromkeys(found))
+
+
+def suggest_index(statement: str, table: str, alias: str | None = None) -> str | None:
+    # A heuristic, not a planner: filtered columns first, then ordering
+    # columns, which is the shape every index in this schema already has.
+    name = alias or table
+    upper = statement.upper()
+    where = re.search(rf"\bWHERE\b(?P<body>.*?){_CLAUSE_END}", statement, re.S)
+    joins = re.findall(rf"\bJOIN\s+{table}(?:\s+AS\s+{name})?\s+ON\b(.*?)(?=\bJOIN\b|\bWHERE\b|$)", statement, re.S)
+    order = statement[upper.rfind("ORDER BY") :] if "ORDER BY" in upper else ""
+    filtered = []
+    for clause in [*joins, where.group("body") if where else ""]:
+        filtered.extend(_columns(clause, name))
+    columns = list(dict.fromkeys([*filtered, *_columns(order, name)]))
+    if not columns:
+        return None
+    return f"CREATE INDEX ix_{table}_{'_'.join(columns)} ON {table} ({', '.join(columns)})"
+
+
+def _index_columns(connection: Connection, index: str) -> list[str]:
+    return [row[2] for row in connection.exec_driver_sql(f'PRAGMA index_info("{index}")').fetchall()]
+
+
+def bounded_index_walk(connection: Connection, statement: str, table: str, alias: str | None, index: str) -> bool:
+    # Walking an index in order stops after LIMIT rows only when the ORDER BY
+    # is the index order and no filter outside the index can skip rows.
+    name = alias or table
+    upper = statement.upper()
+    order_at = upper.rfind("ORDER BY")
+    if order_at < 0 or "LIMIT" not in upper[order_at:]:
+        return False
+    ordering = _columns(statement[order_at:], name)
+    columns = _index_columns(connection, index)
+    if not ordering or columns[: len(ordering)] != ordering:
+        return False
+    where = re.search(rf"\bWHERE\b(?P<body>.*?){_CLAUSE_END}", statement, re.S)
+    return set(_columns(where.group("body"), name) if where else []) <= set(columns)
+
+
+def full_scans(
+    connection: Connection,
+    queries: list[CapturedQuery],
+    large_tables: frozenset[str] = LARGE_TABLES,
+    allowed: tuple[AllowedScan, ...] = ALLOWED_SCANS,
+) -> list[PlanFinding]:
+    findings = []
+    for query in queries:
+        for detail in explain(connection, query):
+            match = _SCAN.match(detail)
+            if not match or match.group("table") not in large_tables:
+                continue
+            table, alias = match.group("table"), match.group("alias")
+            index = _USING_INDEX.search(match.group("rest"))
+            if index and bounded_index_walk(connection, query.statement, table, alias, index.group("index")):
+                continue
+            if any(entry.matches(query.statement, table) for entry in allowed):
+                continue
+            findings.append(
+                PlanFinding(
+                    statement=query.statement,
+                    detail=detail,
+                    table=table,
+                    suggestion=suggest_index(query.statement, table, alias),
+                )
+            )
+    return findings
@@ -1,20 +1,57 @@
 from __future__ import annotations
 
-import time
+import csv
+import io
+import os
+import shutil
 import uuid
+from collections.abc import Mapping
+from datetime import datetime
 from pathlib import Path
+from typing import BinaryIO
+from urllib.parse import urlencode
 
+from anyio import to_thread
 from fastapi import APIRouter, Depends, File, Form, Request, UploadFile
-from fastapi.responses import RedirectResponse
-from sqlalchemy import func
-from sqlalchemy.orm import Session, joinedload
-
-from ..auth import authenticate_admin, get_session_admin
+from fastapi.responses import PlainTextResponse, RedirectResponse, StreamingResponse
+from sqlalchemy import String, func, type_coerce, update
+from sqlalchemy.orm import Query, Session, joinedload
+
+from ..audit import AuditTrail, audit_trail
+from ..auth import (
+    AdminIdentity,
+    LoginBusy,
+    authenticate_admin,
+    get_session_admin,
+    login_throttle,
+    start_admin_session,
+)
+from ..backup import iter_backup_archive
+from ..cache import bump_generation
+from ..channels import BETA, CHANNELS, STABLE
 from ..config import settings
-from ..db import get_db
-from ..models import AdminUser, ApkFile, ApkVersion, AppType, Notice
+from ..db import SessionLocal, get_db
+from ..hotcache import hot_files
+from ..models import (
+    AdminUser,
+    ApkFile,
+    ApkVersion,
+    AppType,
+    AuditLog,
+    DeviceProfile,
+    DownloadLog,
+    Notice,
+    ReleaseChannel,
+)
+from ..pagination import iter_keyset, keyset_page, page_url, requested_page_size
+from ..profiling import DEFAULT_INTERVAL_MS, ProfilerBusy, format_collapsed, sampling_profiler
+from ..sessions import discard_pending_upload
+from ..signing import revoke_files
+from ..storage import get_storage, remove_apk_version_files, store_upload
+from ..tracing import trace_exporter, waterfall
 from ..ui import templates
-from ..utils import ensure_dir, get_client_ip, sha256_bytes, slugify_name, write_audit_log
+from ..utils import DIGEST_CHUNK_SIZE, StreamDigest, digest_stream, ensure_dir, slugify_name
+from ..versioning import version_key
 
 
 router = APIRouter(prefix="/admin", tags=["admin"])
@@ -25,8 +62,16 @@ ALLOWED_CONTENT_TYPES = {
     "application/zip",
 }
 
+LOG_MODELS = {"audit": AuditLog, "download": DownloadLog}
+LOG_COLUMNS = {
+    "audit": ["id", "created_at", "actor_type", "actor_id", "action", "target_type", "target_id", "ip", "user_agent"],
+    "download": ["id", "created_at", "app_type_id", "apk_file_id", "version", "ip", "user_agent"],
+}
+NOTICE_PAGE_SIZE = 20
+LOG_FILTER_KEYS = ("kind", "start", "end", "actor_id", "action", "app_type_id", "version", "ip")
+
 
-def admin_or_redirect(request: Request, db: Session) -> AdminUser | RedirectResponse:
+def admin_or_redirect(request: Request, db: Session) -> AdminIdentity | RedirectResponse:
     admin = get_session_admin(db, request.session)
     if not admin:
         request.session.clear()
@@ -34,6 +79,13 @@ def admin_or_redirect(request: Request, db: Session) -> AdminUser | RedirectResp
     return admin
 
 
+def _int_or_none(value: str | None) -> int | None:
+    try:
+        return int(value) if value not in (None, "") else None
+    except ValueError:
+        return None
+
+
 def render_upload_page(
     request: Request,
     db: Session,
@@ -68,29 +120,6 @@ def render_upload_page(
     )
 
 
-def store_file_bytes(base_dir: Path, app_slug: str, version: str, revision_no: int, filename: str, data: bytes) -> str:
-    safe_name = "".join(c if c.isalnum() or c in {"-", "_", "."} else "_" for c in filename)
-    target_dir = base_dir / app_slug / version
-    ensure_dir(target_dir)
-    target_path = target_dir / f"r{revision_no}_{int(time.time())}_{safe_name}"
-    target_path.write_bytes(data)
-    return str(target_path)
-
-
-def remove_apk_version_files(version: ApkVersion) -> tuple[int, int]:
-    removed = 0
-    failed = 0
-    for file_item in version.files:
-        file_path = Path(file_item.stored_path)
-        try:
-            file_path.unlink(missing_ok=True)
-            removed += 1
-        except OSError:
-            failed += 1
-
-    return removed, failed
-
-
 @router.get("/login")
 def admin_login(request: Request, db: Session = Depends(get_db)):
     current = get_session_admin(db, request.session)
@@ -99,53 +128,64 @@ def admin_login(request: Request, db: Session = Depends(get_db)):
     return templates.TemplateResponse("admin_login.html", {"request": request, "error": None})
 
 
+def _record_login(db: Session, audit: AuditTrail, admin: AdminUser) -> None:
+    audit.record("admin_login", "session", admin.id, actor_id=admin.id)
+    db.commit()
+
+
 @router.post("/login")
-def admin_login_submit(
+async def admin_login_submit(
     request: Request,
     username: str = Form(...),
     password: str = Form(...),
     db: Session = Depends(get_db),
+    audit: AuditTrail = Depends(audit_trail),
 ):
-    admin = authenticate_admin(db, username.strip(), password)
+    username = username.strip()
+    retry_after = login_throttle.retry_after(audit.ip, username)
+    if retry_after:
+        return templates.TemplateResponse(
+            "admin_login.html",
+            {"request": request, "error": "로그인 시도가 너무 많습니다. 잠시 후 다시 시도하세요."},
+            status_code=429,
+            headers={"Retry-After": str(retry_after)},
+        )
+
+    try:
+        admin = await authenticate_admin(db, username, password)
+    except LoginBusy:
+        return templates.TemplateResponse(
+            "admin_login.html",
+            {"request": request, "error": "로그인 요청이 많습니다. 잠시 후 다시 시도하세요."},
+            status_code=503,
+            headers={"Retry-After": "1"},
+        )
     if not admin:
+        login_throttle.failed(audit.ip, username)
         return templates.TemplateResponse(
             "admin_login.html",
             {"request": request, "error": "아이디 또는 비밀번호가 올바르지 않습니다."},
             status_code=401,
         )
 
-    now_ts = int(time.time())
-    request.session["admin_user_id"] = admin.id
-    request.session["last_seen"] = now_ts
-
-    write_audit_log(
-        db,
-        actor_type="admin",
-        actor_id=admin.id,
-        action="admin_login",
-        target_type="session",
-        target_id=admin.id,
-        ip=get_client_ip(request),
-        user_agent=request.headers.get("user-agent"),
-    )
+    login_throttle.succeeded(username)
+    start_admin_session(request.session, admin)
 
+    await to_thread.run_sync(_record_login, db, audit, admin)
     return RedirectResponse(url="/admin", status_code=303)
 
 
 @router.post("/logout")
-def admin_logout(request: Request, db: Session = Depends(get_db)):
+def admin_logout(
+    request: Request,
+    db: Session = Depends(get_db),
+    audit: AuditTrail = Depends(audit_trail),
+):
     current = get_session_admin(db, request.session)
     if current:
-        write_audit_log(
-            db,
-            actor_type="admin",
-            actor_id=current.id,
-            action="admin_logout",
-            target_type="session",
-            target_id=current.id,
-            ip=get_client_ip(request),
-            user_agent=request.headers.get("user-agent"),
-        )
+        audit.record("admin_logout", "session", current.id, actor_id=current.id)
+        db.commit()
+    discard_pending_upload(request.session)
     request.session.clear()
     return RedirectResponse(url="/admin/login", status_code=303)
 
@@ -175,19 +215,91 @@ def admin_dashboard(request: Request, db: Session = Depends(get_db)):
     )
 
 
+@router.get("/hot-files.json")
+def hot_files_json(request: Request, db: Session = Depends(get_db)):
+    current = admin_or_redirect(request, db)
+    if isinstance(current, RedirectResponse):
+        return current
+    return hot_files.stats()
+
+
+@router.get("/traces")
+def traces_page(request: Request, db: Session = Depends(get_db)):
+    current = admin_or_redirect(request, db)
+    if isinstance(current, RedirectResponse):
+        return current
+
+    limit = requested_page_size(request.query_params, default=20)
+    traces = [{**record, "rows": waterfall(record)} for record in trace_exporter.slowest(limit)]
+    return templates.TemplateResponse(
+        "admin_traces.html",
+        {
+            "request": request,
+            "admin": current,
+            "traces": traces,
+            "sample_rate": settings.trace_sample_rate,
+        },
+    )
+
+
+@router.get("/profile")
+def profile_worker(
+    request: Request,
+    db: Session = Depends(get_db),
+    audit: AuditTrail = Depends(audit_trail),
+):
+    current = admin_or_redirect(request, db)
+    if isinstance(current, RedirectResponse):
+        return current
+
+    seconds = min(max(_int_or_none(request.query_params.get("seconds")) or 10, 1), settings.profile_max_seconds)
+    interval_ms = _int_or_none(request.query_params.get("interval_ms")) or DEFAULT_INTERVAL_MS
+    include_idle = request.query_params.get("idle") in ("1", "true", "on")
+    if sampling_profiler.running:
+        return PlainTextResponse("이미 이 워커에서 프로파일링이 진행 중입니다.", status_code=409)
+
+    audit.record("run_profiler", "worker", os.getpid(), actor_id=current.id)
+    db.commit()
+
+    try:
+        stacks = sampling_profiler.sample(seconds, interval_ms, include_idle=include_idle)
+    except ProfilerBusy:
+        return PlainTextResponse("이미 이 워커에서 프로파일링이 진행 중입니다.", status_code=409)
+
+    filename = f"profile_{os.getpid()}_{datetime.now():%Y%m%d_%H%M%S}.folded"
+    return PlainTextResponse(
+        format_collapsed(stacks),
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Worker-Pid": str(os.getpid()),
+            "X-Profile-Samples": str(sum(stacks.values())),
+        },
+    )
+
+
 @router.get("/apps")
 def manage_apps(request: Request, db: Session = Depends(get_db)):
     current = admin_or_redirect(request, db)
     if isinstance(current, RedirectResponse):
         return current
 
-    app_types = db.query(AppType).order_by(AppType.name.asc()).all()
+    limit = requested_page_size(request.query_params)
+    page = keyset_page(
+        db.query(AppType),
+        [AppType.name, AppType.id],
+        cursor=request.query_params.get("cursor"),
+        direction=request.query_params.get("direction", "next"),
+        descending=False,
+        limit=limit,
+    )
     return templates.TemplateResponse(
         "admin_apps.html",
         {
             "request": request,
             "admin": current,
-            "app_types": app_types,
+            "app_types": page.items,
+            "next_url": page_url("/admin/apps", {}, page.next_cursor, "next", limit),
+            "prev_url": page_url("/admin/apps", {}, page.prev_cursor, "prev", limit),
             "message": request.query_params.get("message"),
             "error": request.query_params.get("error"),
         },
@@ -203,6 +315,7 @@ def upsert_app_type(
     description: str = Form(default=""),
     is_active: str | None = Form(default=None),
     db: Session = Depends(get_db),
+    audit: AuditTrail = Depends(audit_trail),
 ):
     current = admin_or_redirect(request, db)
     if isinstance(current, RedirectResponse):
@@ -233,18 +346,9 @@ def upsert_app_type(
         app_type.slug = slug_value
         app_type.description = description.strip() or None
         app_type.is_active = active
+        audit.record("update_app_type", "app_type", app_type, actor_id=current.id)
+        bump_generation(db)
         db.commit()
-
-        write_audit_log(
-            db,
-            actor_type="admin",
-            actor_id=current.id,
-            action="update_app_type",
-            target_type="app_type",
-            target_id=app_type.id,
-            ip=get_client_ip(request),
-            user_agent=request.headers.get("user-agent"),
-        )
         return RedirectResponse(url="/admin/apps?message=앱+종류가+수정되었습니다.", status_code=303)
 
     conflict = db.query(AppType).filter((AppType.name == name) | (AppType.slug == slug_value)).first()
@@ -253,20 +357,205 @@ def upsert_app_type(
 
     app_type = AppType(name=name, slug=slug_value, description=description.strip() or None, is_active=active)
     db.add(app_type)
+    audit.record("create_app_type", "app_type", app_type, actor_id=current.id)
+    bump_generation(db)
     db.commit()
 
-    write_audit_log(
-        db,
-        actor_type="admin",
-        actor_id=current.id,
-        action="create_app_type",
-        target_type="app_type",
-        target_id=app_type.id,
-        ip=get_client_ip(request),
-        user_agent=request.headers.get("user-agent"),
+    return RedirectResponse(url="/admin/apps?message=앱+종류가+등록되었습니다.", status_code=303)
+
+
+@router.get("/apps/{app_type_id}/channels")
+def channels_page(app_type_id: int, request: Request, db: Session = Depends(get_db)):
+    current = admin_or_redirect(request, db)
+    if isinstance(current, RedirectResponse):
+        return current
+
+    app_type = db.query(AppType).filter(AppType.id == app_type_id).first()
+    if not app_type:
+        return RedirectResponse(url="/admin/apps?error=대상을+찾을+수+없습니다.", status_code=303)
+
+    versions = (
+        db.query(ApkVersion)
+        .filter(ApkVersion.app_type_id == app_type.id)
+        .order_by(ApkVersion.version_key.desc(), ApkVersion.id.desc())
+        .all()
+    )
+    rules = {rule.channel: rule for rule in db.query(ReleaseChannel).filter(ReleaseChannel.app_type_id == app_type.id)}
+    return templates.TemplateResponse(
+        "admin_channels.html",
+        {
+            "request": request,
+            "admin": current,
+            "app_type": app_type,
+            "versions": versions,
+            "channels": CHANNELS,
+            "rules": rules,
+            "message": request.query_params.get("message"),
+        },
     )
 
-    return RedirectResponse(url="/admin/apps?message=앱+종류가+등록되었습니다.", status_code=303)
+
+def _apply_channel(
+    db: Session,
+    app_type_id: int,
+    channel: str,
+    version_ids: set[int],
+    pinned_id: int | None,
+    rollout_id: int | None,
+    percent: int | None,
+) -> None:
+    pinned_id = pinned_id if pinned_id in version_ids else None
+    rollout_id = rollout_id if rollout_id in version_ids else None
+    percent = min(max(percent or 0, 0), 100) if rollout_id else 0
+
+    rule = (
+        db.query(ReleaseChannel)
+        .filter(ReleaseChannel.app_type_id == app_type_id, ReleaseChannel.channel == channel)
+        .first()
+    )
+    if pinned_id is None and rollout_id is None:
+        if rule:
+            db.delete(rule)
+        return
+    if rule is None:
+        rule = ReleaseChannel(app_type_id=app_type_id, channel=channel)
+        db.add(rule)
+    rule.apk_version_id = pinned_id
+    rule.rollout_version_id = rollout_id
+    rule.rollout_percent = percent
+
+
+@router.post("/apps/{app_type_id}/channels")
+def save_channels(
+    app_type_id: int,
+    request: Request,
+    stable_version_id: str = Form(default=""),
+    stable_rollout_version_id: str = Form(default=""),
+    stable_rollout_percent: str = Form(default=""),
+    beta_version_id: str = Form(default=""),
+    beta_rollout_version_id: str = Form(default=""),
+    beta_rollout_percent: str = Form(default=""),
+    db: Session = Depends(get_db),
+    audit: AuditTrail = Depends(audit_trail),
+):
+    current = admin_or_redirect(request, db)
+    if isinstance(current, RedirectResponse):
+        return current
+
+    app_type = db.query(AppType).filter(AppType.id == app_type_id).first()
+    if not app_type:
+        return RedirectResponse(url="/admin/apps?error=대상을+찾을+수+없습니다.", status_code=303)
+
+    version_ids = {
+        version_id for (version_id,) in db.query(ApkVersion.id).filter(ApkVersion.app_type_id == app_type.id)
+    }
+    fields = {
+        STABLE: (stable_version_id, stable_rollout_version_id, stable_rollout_percent),
+        BETA: (beta_version_id, beta_rollout_version_id, beta_rollout_percent),
+    }
+    for channel, (pinned, rollout, percent) in fields.items():
+        _apply_channel(
+            db,
+            app_type.id,
+            channel,
+            version_ids,
+            _int_or_none(pinned),
+            _int_or_none(rollout),
+            _int_or_none(percent),
+        )
+
+    audit.record("update_release_channels", "app_type", app_type, actor_id=current.id)
+    bump_generation(db)
+    db.commit()
+    return RedirectResponse(
+        url=f"/admin/apps/{app_type.id}/channels?message=배포+채널이+저장되었습니다.", status_code=303
+    )
+
+
+@router.get("/profiles")
+def profiles_page(request: Request, db: Session = Depends(get_db)):
+    current = admin_or_redirect(request, db)
+    if isinstance(current, RedirectResponse):
+        return current
+
+    return templates.TemplateResponse(
+        "admin_profiles.html",
+        {
+            "request": request,
+            "admin": current,
+            "profiles": db.query(DeviceProfile).order_by(DeviceProfile.name.asc()).all(),
+            "app_types": db.query(AppType).filter(AppType.is_active.is_(True)).order_by(AppType.name.asc()).all(),
+            "message": request.query_params.get("message"),
+            "error": request.query_params.get("error"),
+        },
+    )
+
+
+@router.post("/profiles")
+def save_profile(
+    request: Request,
+    profile_id: int | None = Form(default=None),
+    name: str = Form(...),
+    slug: str = Form(default=""),
+    apps: list[str] = Form(default=[]),
+    db: Session = Depends(get_db),
+    audit: AuditTrail = Depends(audit_trail),
+):
+    current = admin_or_redirect(request, db)
+    if isinstance(current, RedirectResponse):
+        return current
+
+    name = name.strip()
+    if not name:
+        return RedirectResponse(url="/admin/profiles?error=프로필+이름은+필수입니다.", status_code=303)
+    slug_value = slugify_name(slug if slug.strip() else name)
+    known = {s for (s,) in db.query(AppType.slug).filter(AppType.slug.in_(apps))}
+    app_slugs = ",".join(s for s in dict.fromkeys(apps) if s in known)
+    if not app_slugs:
+        return RedirectResponse(url="/admin/profiles?error=앱을+하나+이상+선택하세요.", status_code=303)
+
+    profile = db.query(DeviceProfile).filter(DeviceProfile.id == profile_id).first() if profile_id else None
+    if profile_id and not profile:
+        return RedirectResponse(url="/admin/profiles?error=대상을+찾을+수+없습니다.", status_code=303)
+
+    conflict = db.query(DeviceProfile).filter((DeviceProfile.name == name) | (DeviceProfile.slug == slug_value))
+    if profile:
+        conflict = conflict.filter(DeviceProfile.id != profile.id)
+    if conflict.first():
+        return RedirectResponse(url="/admin/profiles?error=이름+또는+슬러그가+중복됩니다.", status_code=303)
+
+    action = "update_device_profile" if profile else "create_device_profile"
+    if profile is None:
+        profile = DeviceProfile()
+        db.add(profile)
+    profile.name = name
+    profile.slug = slug_value
+    profile.app_slugs = app_slugs
+    audit.record(action, "device_profile", profile, actor_id=current.id)
+    bump_generation(db)
+    db.commit()
+    return RedirectResponse(url="/admin/profiles?message=기기+프로필이+저장되었습니다.", status_code=303)
+
+
+@router.post("/profiles/delete")
+def delete_profile(
+    request: Request,
+    profile_id: int = Form(...),
+    db: Session = Depends(get_db),
+    audit: AuditTrail = Depends(audit_trail),
+):
+    current = admin_or_redirect(request, db)
+    if isinstance(current, RedirectResponse):
+        return current
+
+    profile = db.query(DeviceProfile).filter(DeviceProfile.id == profile_id).first()
+    if not profile:
+        return RedirectResponse(url="/admin/profiles?error=대상을+찾을+수+없습니다.", status_code=303)
+    db.delete(profile)
+    audit.record("delete_device_profile", "device_profile", profile_id, actor_id=current.id)
+    bump_generation(db)
+    db.commit()
+    return RedirectResponse(url="/admin/profiles?message=기기+프로필이+삭제되었습니다.", status_code=303)
 
 
 @router.get("/apks/upload")
@@ -279,7 +568,7 @@ def upload_apk_page(request: Request, db: Session = Depends(get_db)):
     return render_upload_page(request, db, overwrite_prompt=pending)
 
 
-def validate_apk(upload: UploadFile, data: bytes) -> str | None:
+def validate_apk(upload: UploadFile, digest: StreamDigest) -> str | None:
     filename = (upload.filename or "").lower()
     if not filename.endswith(".apk"):
         return "APK 파일(.apk)만 업로드할 수 있습니다."
@@ -287,12 +576,17 @@ def validate_apk(upload: UploadFile, data: bytes) -> str | None:
     if upload.content_type and upload.content_type not in ALLOWED_CONTENT_TYPES:
         return f"허용되지 않은 파일 타입입니다: {upload.content_type}"
 
-    if len(data) < 4 or not data.startswith(b"PK"):
+    if digest.size < 4 or not digest.header.startswith(b"PK"):
         return "APK 헤더 검증에 실패했습니다."
 
     return None
 
 
+def _save_upload(source: BinaryIO, path: Path) -> None:
+    with path.open("wb") as fp:
+        shutil.copyfileobj(source, fp, DIGEST_CHUNK_SIZE)
+
+
 @router.post("/apks/upload")
 async def upload_apk(
     request: Request,
@@ -301,6 +595,7 @@ async def upload_apk(
     release_note: str = Form(default=""),
     apk_file: UploadFile = File(...),
     db: Session = Depends(get_db),
+    audit: AuditTrail = Depends(audit_trail),
 ):
     current = admin_or_redirect(request, db)
     if isinstance(current, RedirectResponse):
@@ -314,10 +609,11 @@ async def upload_apk(
     if not version:
         return render_upload_page(request, db, error="버전은 필수입니다.")
 
-    data = await apk_file.read()
-    err = validate_apk(apk_file, data)
+    digest = await to_thread.run_sync(digest_stream, apk_file.file)
+    err = validate_apk(apk_file, digest)
     if err:
         return render_upload_page(request, db, error=err)
+    await apk_file.seek(0)
 
     existing_version = (
         db.query(ApkVersion)
@@ -327,10 +623,11 @@ async def upload_apk(
     )
 
     if existing_version:
+        discard_pending_upload(request.session)
         ensure_dir(settings.tmp_root)
         token = str(uuid.uuid4())
         tmp_path = settings.tmp_root / f"{token}.apk"
-        tmp_path.write_bytes(data)
+        await to_thread.run_sync(_save_upload, apk_file.file, tmp_path)
 
         pending = {
             "token": token,
@@ -350,27 +647,26 @@ async def upload_apk(
             overwrite_prompt=pending,
         )
 
-    new_version = ApkVersion(app_type_id=app_type.id, version=version, release_note=release_note.strip() or None)
+    new_version = ApkVersion(
+        app_type_id=app_type.id,
+        version=version,
+        version_key=version_key(version),
+        release_note=release_note.strip() or None,
+    )
     db.add(new_version)
     db.flush()
 
     revision_no = 1
-    stored_path = store_file_bytes(
-        settings.files_root,
-        app_type.slug,
-        version,
-        revision_no,
-        apk_file.filename or f"{app_type.slug}-{version}.apk",
-        data,
-    )
+    stored_path = await to_thread.run_sync(store_upload, get_storage(), apk_file.file, digest.sha256, digest.size)
 
     apk_record = ApkFile(
         apk_version_id=new_version.id,
         revision_no=revision_no,
         stored_path=stored_path,
         original_filename=apk_file.filename or f"{app_type.slug}-{version}.apk",
-        file_size=len(data),
-        sha256=sha256_bytes(data),
+        file_size=digest.size,
+        sha256=digest.sha256,
+        crc32=digest.crc32,
         uploaded_by=current.id,
         is_current=True,
     )
@@ -378,20 +674,12 @@ async def upload_apk(
     db.flush()
 
     new_version.current_file_id = apk_record.id
+    audit.record("upload_apk", "apk_version", new_version, actor_id=current.id)
+    bump_generation(db)
     db.commit()
+    hot_files.schedule_warm(stored_path)
 
-    write_audit_log(
-        db,
-        actor_type="admin",
-        actor_id=current.id,
-        action="upload_apk",
-        target_type="apk_version",
-        target_id=new_version.id,
-        ip=get_client_ip(request),
-        user_agent=request.headers.get("user-agent"),
-    )
-
-    request.session.pop("pending_overwrite", None)
+    discard_pending_upload(request.session)
     return render_upload_page(request, db, message="새 APK 버전이 등록되었습니다.")
 
 
@@ -400,6 +688,7 @@ def overwrite_apk(
     request: Request,
     token: str = Form(...),
     db: Session = Depends(get_db),
+    audit: AuditTrail = Depends(audit_trail),
 ):
     current = admin_or_redirect(request, db)
     if isinstance(current, RedirectResponse):
@@ -431,28 +720,23 @@ def overwrite_apk(
         request.session.pop("pending_overwrite", None)
         return render_upload_page(request, db, error="버전 정보를 찾을 수 없습니다.")
 
-    data = tmp_path.read_bytes()
+    with tmp_path.open("rb") as fp:
+        digest = digest_stream(fp)
+        fp.seek(0)
+        stored_path = store_upload(get_storage(), fp, digest.sha256, digest.size)
     revision_no = (max((f.revision_no for f in version.files), default=0)) + 1
 
     for file_item in version.files:
         file_item.is_current = False
 
-    stored_path = store_file_bytes(
-        settings.files_root,
-        app_type.slug,
-        version.version,
-        revision_no,
-        pending.get("original_filename") or f"{app_type.slug}-{version.version}.apk",
-        data,
-    )
-
     apk_record = ApkFile(
         apk_version_id=version.id,
         revision_no=revision_no,
         stored_path=stored_path,
         original_filename=pending.get("original_filename") or f"{app_type.slug}-{version.version}.apk",
-        file_size=len(data),
-        sha256=sha256_bytes(data),
+        file_size=digest.size,
+        sha256=digest.sha256,
+        crc32=digest.crc32,
         uploaded_by=current.id,
         is_current=True,
     )
@@ -463,18 +747,10 @@ def overwrite_apk(
         version.release_note = pending["release_note"]
     version.current_file_id = apk_record.id
 
+    audit.record("overwrite_apk", "apk_version", version, actor_id=current.id)
+    bump_generation(db)
     db.commit()
-
-    write_audit_log(
-        db,
-        actor_type="admin",
-        actor_id=current.id,
-        action="overwrite_apk",
-        target_type="apk_version",
-        target_id=version.id,
-        ip=get_client_ip(request),
-        user_agent=request.headers.get("user-agent"),
-    )
+    hot_files.schedule_warm(stored_path)
 
     tmp_path.unlink(missing_ok=True)
     request.session.pop("pending_overwrite", None)
@@ -486,6 +762,7 @@ def delete_apk_version(
     request: Request,
     apk_version_id: int = Form(...),
     db: Session = Depends(get_db),
+    audit: AuditTrail = Depends(audit_trail),
 ):
     current = admin_or_redirect(request, db)
     if isinstance(current, RedirectResponse):
@@ -504,21 +781,23 @@ def delete_apk_version(
     app_name = version.app_type.name
     version_text = version.version
 
-    removed_count, failed_count = remove_apk_version_files(version)
+    for file_item in version.files:
+        hot_files.forget(file_item.stored_path)
+    removed_count, failed_count = remove_apk_version_files(db, version)
+    revoke_files(db, [f.id for f in version.files])
+    db.execute(
+        update(ReleaseChannel).where(ReleaseChannel.apk_version_id == version_id).values(apk_version_id=None)
+    )
+    db.execute(
+        update(ReleaseChannel)
+        .where(ReleaseChannel.rollout_version_id == version_id)
+        .values(rollout_version_id=None, rollout_percent=0)
+    )
     db.delete(version)
+    audit.record("delete_apk_version", "apk_version", version_id, actor_id=current.id)
+    bump_generation(db)
     db.commit()
 
-    write_audit_log(
-        db,
-        actor_type="admin",
-        actor_id=current.id,
-        action="delete_apk_version",
-        target_type="apk_version",
-        target_id=version_id,
-        ip=get_client_ip(request),
-        user_agent=request.headers.get("user-agent"),
-    )
-
     message = f"{app_name} {version_text} 버전을 삭제했습니다. (파일 {removed_count}개 정리)"
     if failed_count:
         message += f" 파일 {failed_count}개는 수동 정리가 필요합니다."
@@ -531,12 +810,21 @@ def notices_page(request: Request, db: Session = Depends(get_db)):
     if isinstance(current, RedirectResponse):
         return current
 
-    notices = db.query(Notice).order_by(Notice.created_at.desc()).all()
+    limit = requested_page_size(request.query_params, default=NOTICE_PAGE_SIZE)
+    page = keyset_page(
+        db.query(Notice),
+        [Notice.created_at, Notice.id],
+        cursor=request.query_params.get("cursor"),
+        direction=request.query_params.get("direction", "next"),
+        limit=limit,
+    )
     return templates.TemplateResponse(
         "admin_notices.html",
         {
             "request": request,
-            "notices": notices,
+            "notices": page.items,
+            "next_url": page_url("/admin/notices", {}, page.next_cursor, "next", limit),
+            "prev_url": page_url("/admin/notices", {}, page.prev_cursor, "prev", limit),
             "message": request.query_params.get("message"),
             "error": request.query_params.get("error"),
         },
@@ -553,32 +841,21 @@ def save_notice(
     is_pinned: str | None = Form(default=None),
     is_visible: str | None = Form(default=None),
     db: Session = Depends(get_db),
+    audit: AuditTrail = Depends(audit_trail),
 ):
     current = admin_or_redirect(request, db)
     if isinstance(current, RedirectResponse):
         return current
 
-    ip = get_client_ip(request)
-    ua = request.headers.get("user-agent")
-
     if action == "toggle_visibility":
         target = db.query(Notice).filter(Notice.id == notice_id).first()
         if not target:
             return RedirectResponse(url="/admin/notices?error=공지를+찾을+수+없습니다.", status_code=303)
 
         target.is_visible = not target.is_visible
+        audit.record("toggle_notice_visibility", "notice", target, actor_id=current.id)
+        bump_generation(db)
         db.commit()
-
-        write_audit_log(
-            db,
-            actor_type="admin",
-            actor_id=current.id,
-            action="toggle_notice_visibility",
-            target_type="notice",
-            target_id=target.id,
-            ip=ip,
-            user_agent=ua,
-        )
         return RedirectResponse(url="/admin/notices?message=공지+노출상태가+변경되었습니다.", status_code=303)
 
     title = title.strip()
@@ -598,18 +875,9 @@ def save_notice(
         target.content = content
         target.is_pinned = pinned_value
         target.is_visible = visible_value
+        audit.record("update_notice", "notice", target, actor_id=current.id)
+        bump_generation(db)
         db.commit()
-
-        write_audit_log(
-            db,
-            actor_type="admin",
-            actor_id=current.id,
-            action="update_notice",
-            target_type="notice",
-            target_id=target.id,
-            ip=ip,
-            user_agent=ua,
-        )
         return RedirectResponse(url="/admin/notices?message=공지가+수정되었습니다.", status_code=303)
 
     notice = Notice(
@@ -620,16 +888,178 @@ def save_notice(
         created_by=current.id,
     )
     db.add(notice)
+    audit.record("create_notice", "notice", notice, actor_id=current.id)
+    bump_generation(db)
     db.commit()
+    return RedirectResponse(url="/admin/notices?message=공지가+등록되었습니다.", status_code=303)
 
-    write_audit_log(
-        db,
-        actor_type="admin",
-        actor_id=current.id,
-        action="create_notice",
-        target_type="notice",
-        target_id=notice.id,
-        ip=ip,
-        user_agent=ua,
+
+def _time_bound(value: str | None) -> str | None:
+    value = (value or "").strip()
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value).strftime("%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        return None
+
+
+def log_filters_from_request(request: Request) -> dict[str, str]:
+    filters = {key: request.query_params.get(key, "").strip() for key in LOG_FILTER_KEYS}
+    if filters["kind"] not in LOG_MODELS:
+        filters["kind"] = "audit"
+    return filters
+
+
+def build_log_query(db: Session, filters: Mapping[str, str]) -> Query:
+    model = LOG_MODELS[filters["kind"]]
+    query = db.query(model)
+
+    created = type_coerce(model.created_at, String)
+    start = _time_bound(filters.get("start"))
+    if start:
+        query = query.filter(created >= start)
+    end = _time_bound(filters.get("end"))
+    if end:
+        query = query.filter(created < end)
+    if filters.get("ip"):
+        query = query.filter(model.ip == filters["ip"])
+
+    if model is AuditLog:
+        actor_id = _int_or_none(filters.get("actor_id"))
+        if actor_id is not None:
+            query = query.filter(AuditLog.actor_id == actor_id)
+        if filters.get("action"):
+            query = query.filter(AuditLog.action == filters["action"])
+    else:
+        app_type_id = _int_or_none(filters.get("app_type_id"))
+        if app_type_id is not None:
+            query = query.filter(DownloadLog.app_type_id == app_type_id)
+        if filters.get("version"):
+            query = query.filter(DownloadLog.version == filters["version"])
+
+    return query
+
+
+def _log_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    return value
+
+
+def _log_row(item, kind: str) -> dict:
+    return {column: _log_value(getattr(item, column)) for column in LOG_COLUMNS[kind]}
+
+
+def load_log_page(db: Session, request: Request, filters: Mapping[str, str]):
+    model = LOG_MODELS[filters["kind"]]
+    return keyset_page(
+        build_log_query(db, filters),
+        [model.created_at, model.id],
+        cursor=request.query_params.get("cursor"),
+        direction=request.query_params.get("direction", "next"),
+        limit=requested_page_size(request.query_params),
+    )
+
+
+@router.get("/logs")
+def logs_page(request: Request, db: Session = Depends(get_db)):
+    current = admin_or_redirect(request, db)
+    if isinstance(current, RedirectResponse):
+        return current
+
+    filters = log_filters_from_request(request)
+    limit = requested_page_size(request.query_params)
+    page = load_log_page(db, request, filters)
+    app_types = db.query(AppType).order_by(AppType.name.asc()).all()
+    export_params = urlencode({key: value for key, value in filters.items() if value})
+
+    return templates.TemplateResponse(
+        "admin_logs.html",
+        {
+            "request": request,
+            "filters": filters,
+            "columns": LOG_COLUMNS[filters["kind"]],
+            "rows": [_log_row(item, filters["kind"]) for item in page.items],
+            "app_type_names": {app.id: app.name for app in app_types},
+            "app_types": app_types,
+            "next_url": page_url("/admin/logs", filters, page.next_cursor, "next", limit),
+            "prev_url": page_url("/admin/logs", filters, page.prev_cursor, "prev", limit),
+            "export_url": f"/admin/logs.csv?{export_params}",
+        },
+    )
+
+
+@router.get("/logs.json")
+def logs_json(request: Request, db: Session = Depends(get_db)):
+    current = admin_or_redirect(request, db)
+    if isinstance(current, RedirectResponse):
+        return current
+
+    filters = log_filters_from_request(request)
+    page = load_log_page(db, request, filters)
+    return {
+        "kind": filters["kind"],
+        "items": [_log_row(item, filters["kind"]) for item in page.items],
+        "next_cursor": page.next_cursor,
+        "prev_cursor": page.prev_cursor,
+    }
+
+
+def iter_log_csv(filters: Mapping[str, str], batch_size: int = 1000):
+    kind = filters["kind"]
+    model = LOG_MODELS[kind]
+    columns = LOG_COLUMNS[kind]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write("\ufeff")
+    writer.writerow(columns)
+
+    db = SessionLocal()
+    try:
+        rows = iter_keyset(build_log_query(db, filters), [model.created_at, model.id], batch_size=batch_size)
+        for item in rows:
+            writer.writerow([_log_value(getattr(item, column)) for column in columns])
+            if buffer.tell() >= 64 * 1024:
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate(0)
+        yield buffer.getvalue().encode("utf-8")
+    finally:
+        db.close()
+
+
+@router.get("/logs.csv")
+def logs_csv(request: Request, db: Session = Depends(get_db)):
+    current = admin_or_redirect(request, db)
+    if isinstance(current, RedirectResponse):
+        return current
+
+    filters = log_filters_from_request(request)
+    filename = f"{filters['kind']}_logs_{datetime.now():%Y%m%d_%H%M%S}.csv"
+    return StreamingResponse(
+        iter_log_csv(filters),
+        media_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/backup")
+def download_backup(
+    request: Request,
+    db: Session = Depends(get_db),
+    audit: AuditTrail = Depends(audit_trail),
+):
+    current = admin_or_redirect(request, db)
+    if isinstance(current, RedirectResponse):
+        return current
+
+    audit.record("download_backup", "backup", actor_id=current.id)
+    db.commit()
+
+    filename = f"apkhub_backup_{datetime.now():%Y%m%d_%H%M%S}.tar"
+    return StreamingResponse(
+        iter_backup_archive(),
+        media_type="application/x-tar",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
-    return RedirectResponse(url="/admin/notices?message=공지가+등록되었습니다.", status_code=303)
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import hmac
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..db import get_db
+from ..mirror import build_catalog_manifest
+from ..models import ApkFile
+from ..signing import blob_url, ping_url
+from ..storage import get_storage
+from .public import APK_MEDIA_TYPE, channel_from, device_id_from, home_catalog, stream_blob
+
+
+router = APIRouter(prefix="/api", tags=["api"])
+
+
+def require_mirror_token(request: Request) -> None:
+    if not settings.mirror_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    supplied = request.headers.get("authorization", "").removeprefix("Bearer ").strip()
+    if not hmac.compare_digest(supplied.encode(), settings.mirror_token.encode()):
+        raise HTTPException(status_code=401, detail="Invalid mirror token")
+
+
+@router.get("/apps/{slug}/latest")
+def latest_release(slug: str, request: Request, db: Session = Depends(get_db)):
+    channel = channel_from(request)
+    app = next((item for item in home_catalog.get(db).apps if item.slug == slug), None)
+    if app is None:
+        raise HTTPException(status_code=404, detail="App type not found")
+
+    release, rollout = app.release_for(channel, device_id_from(request))
+    if release is None or release.download is None:
+        raise HTTPException(status_code=404, detail="No downloadable version")
+    grant = release.download
+    return {
+        "app": app.slug,
+        "channel": channel,
+        "version": release.version,
+        "rollout": rollout,
+        "filename": grant.filename,
+        "size": grant.size,
+        "sha256": grant.sha256,
+        "download_url": blob_url(grant),
+        "ping_url": ping_url(grant),
+    }
+
+
+@router.get("/mirror/manifest", dependencies=[Depends(require_mirror_token)])
+def mirror_manifest(db: Session = Depends(get_db)):
+    return build_catalog_manifest(db)
+
+
+@router.get("/mirror/blobs/{sha256}", dependencies=[Depends(require_mirror_token)])
+def mirror_blob(sha256: str, request: Request, db: Session = Depends(get_db)):
+    apk_file = db.query(ApkFile).filter(ApkFile.sha256 == sha256.lower()).first()
+    if not apk_file:
+        raise HTTPException(status_code=404, detail="Blob not found")
+
+    storage = get_storage()
+    path = storage.local_path(apk_file.stored_path)
+    if path is None:
+        return stream_blob(storage, apk_file.stored_path, sha256, request)
+    return FileResponse(path=path, media_type=APK_MEDIA_TYPE)
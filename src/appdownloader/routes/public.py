@@ -1,54 +1,339 @@
 from __future__ import annotations
 
-from pathlib import Path
+import re
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timezone
+from urllib.parse import quote
 
-from fastapi import APIRouter, Depends, HTTPException, Request
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from sqlalchemy import and_, select
+from sqlalchemy.orm import Session, aliased, joinedload
 
-from ..db import get_db
-from ..models import ApkFile, ApkVersion, AppType, Notice
+from ..bundle import BundleEntry, ZipBundle
+from ..cache import CATALOG, GenerationCache
+from ..channels import CHANNELS, STABLE, ChannelRule, Release, resolve_release
+from ..config import settings
+from ..db import SessionLocal, get_db
+from ..download_logs import download_log_queue
+from ..hotcache import FirstByteTimer, hot_files, iter_mapped
+from ..models import ApkFile, ApkVersion, AppType, DeviceProfile, Notice, ReleaseChannel
+from ..pagination import keyset_page, page_url, requested_page_size
+from ..search import search_catalog
+from ..signing import DownloadGrant, TokenError, grant_for, revoked_files, verify_download, verify_ping
+from ..spool import spool_download_log, spool_download_logs
+from ..storage import StorageBackend, blob_key, get_storage
 from ..ui import templates
-from ..utils import get_client_ip, write_download_log
+from ..utils import get_client_ip, write_download_log, write_download_logs
 
 
 router = APIRouter()
 
+VERSION_PAGE_SIZE = 20
+MAX_BUNDLE_APPS = 50
+APK_MEDIA_TYPE = "application/vnd.android.package-archive"
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+SHA256_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
 
-@router.get("/")
-def home(request: Request, db: Session = Depends(get_db)):
+
+def _parse_range(header: str | None, size: int) -> tuple[int, int] | None:
+    found = RANGE_PATTERN.match((header or "").strip())
+    if not found or not any(found.groups()):
+        return None
+    start_text, end_text = found.groups()
+    if start_text:
+        start = int(start_text)
+        end = min(int(end_text) + 1, size) if end_text else size
+    else:
+        start = max(size - int(end_text), 0)
+        end = size
+    if start >= end:
+        raise HTTPException(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+    return start, end
+
+
+def _requested_range(request: Request, size: int, etag: str | None) -> tuple[int, int] | None:
+    if_range = request.headers.get("if-range")
+    if if_range and if_range != etag:
+        return None
+    return _parse_range(request.headers.get("range"), size)
+
+
+def _ranged_response(
+    size: int,
+    read_range: Callable[[int, int], Iterable[bytes]],
+    filename: str,
+    request: Request,
+    extra_headers: dict[str, str] | None = None,
+    media_type: str = APK_MEDIA_TYPE,
+) -> Response:
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f"attachment; filename*=utf-8''{quote(filename)}",
+        **(extra_headers or {}),
+    }
+    byte_range = _requested_range(request, size, headers.get("ETag"))
+    if byte_range is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(read_range(0, size), media_type=media_type, headers=headers)
+
+    start, end = byte_range
+    headers["Content-Length"] = str(end - start)
+    headers["Content-Range"] = f"bytes {start}-{end - 1}/{size}"
+    return StreamingResponse(read_range(start, end), status_code=206, media_type=media_type, headers=headers)
+
+
+def stream_blob(
+    storage: StorageBackend,
+    key: str,
+    filename: str,
+    request: Request,
+    extra_headers: dict[str, str] | None = None,
+) -> Response:
+    stat = storage.stat(key)
+    if stat is None:
+        raise HTTPException(status_code=404, detail="Stored file not found")
+
+    def read_range(start: int, end: int):
+        if start == 0 and end == stat.size:
+            return storage.get(key)
+        return storage.open_range(key, start, end)
+
+    return _ranged_response(stat.size, read_range, filename, request, extra_headers)
+
+
+def serve_blob(key: str, filename: str, request: Request, extra_headers: dict[str, str] | None = None) -> Response:
+    started = time.perf_counter()
+    hot_files.record_download(key)
+    mapped = hot_files.mapped(key)
+    if mapped is not None:
+        response = _ranged_response(
+            mapped.size,
+            lambda start, end: iter_mapped(mapped, start, end),
+            filename,
+            request,
+            extra_headers,
+        )
+        return FirstByteTimer(response, "mmap", started, hot_files)
+
+    label = hot_files.label_for(key)
+    storage = get_storage()
+    path = storage.local_path(key)
+    if path is None:
+        response = stream_blob(storage, key, filename, request, extra_headers)
+    else:
+        response = FileResponse(path=path, filename=filename, media_type=APK_MEDIA_TYPE, headers=extra_headers)
+    return FirstByteTimer(response, label, started, hot_files)
+
+
+@dataclass(frozen=True)
+class HomeApp:
+    id: int
+    name: str
+    slug: str
+    description: str | None
+    latest_version: str | None
+    latest_download: DownloadGrant | None
+    channels: dict[str, ChannelRule] = field(default_factory=dict)
+    # latest_* is what the stable home page shows (the stable pin if any);
+    # newest is the highest version and the default for every channel.
+    newest: Release | None = None
+
+    def release_for(self, channel: str = STABLE, device_id: str | None = None) -> tuple[Release | None, bool]:
+        return resolve_release(self.slug, self.newest, self.channels, channel, device_id)
+
+
+@dataclass(frozen=True)
+class HomeNotice:
+    title: str
+    content: str
+    is_pinned: bool
+    created_at: datetime
+
+
+@dataclass(frozen=True)
+class HomeProfile:
+    name: str
+    slug: str
+    apps: list[str]
+
+
+@dataclass(frozen=True)
+class HomeCatalog:
+    notices: list[HomeNotice]
+    apps: list[HomeApp]
+    profiles: list[HomeProfile]
+
+
+def load_home_catalog(db: Session) -> HomeCatalog:
     notices = (
-        db.query(Notice)
+        db.query(Notice.title, Notice.content, Notice.is_pinned, Notice.created_at)
         .filter(Notice.is_visible.is_(True))
         .order_by(Notice.is_pinned.desc(), Notice.created_at.desc())
         .all()
     )
 
-    app_types = (
-        db.query(AppType)
+    # One index probe per app instead of ranking every version of every app.
+    newest_version_id = (
+        select(ApkVersion.id)
+        .where(ApkVersion.app_type_id == AppType.id)
+        .order_by(ApkVersion.version_key.desc(), ApkVersion.id.desc())
+        .limit(1)
+        .correlate(AppType)
+        .scalar_subquery()
+    )
+    apps = (
+        db.query(
+            AppType.id,
+            AppType.name,
+            AppType.slug,
+            AppType.description,
+            ApkVersion.version,
+            ApkFile,
+        )
+        .outerjoin(ApkVersion, ApkVersion.id == newest_version_id)
+        .outerjoin(ApkFile, ApkFile.id == ApkVersion.current_file_id)
         .filter(AppType.is_active.is_(True))
         .order_by(AppType.name.asc())
         .all()
     )
 
-    latest_map: dict[int, ApkVersion | None] = {}
-    for app_type in app_types:
-        latest_version = (
-            db.query(ApkVersion)
-            .options(joinedload(ApkVersion.current_file))
-            .filter(ApkVersion.app_type_id == app_type.id)
-            .order_by(ApkVersion.created_at.desc())
-            .first()
+    profiles = db.query(DeviceProfile).order_by(DeviceProfile.name.asc()).all()
+    channels = load_channel_rules(db)
+
+    home_apps = []
+    for app_id, name, slug, description, version, apk_file in apps:
+        rules = channels.get(app_id, {})
+        newest = Release(version, grant_for(apk_file, app_id, version) if apk_file else None) if version else None
+        latest = rules[STABLE].pinned if rules.get(STABLE) and rules[STABLE].pinned else newest
+        home_apps.append(
+            HomeApp(
+                id=app_id,
+                name=name,
+                slug=slug,
+                description=description,
+                latest_version=latest.version if latest else None,
+                latest_download=latest.download if latest else None,
+                channels=rules,
+                newest=newest,
+            )
+        )
+
+    return HomeCatalog(
+        notices=[HomeNotice(*row) for row in notices],
+        profiles=[HomeProfile(name=p.name, slug=p.slug, apps=p.app_slug_list) for p in profiles],
+        apps=home_apps,
+    )
+
+
+def load_channel_rules(db: Session) -> dict[int, dict[str, ChannelRule]]:
+    pinned_version = aliased(ApkVersion)
+    pinned_file = aliased(ApkFile)
+    rollout_version = aliased(ApkVersion)
+    rollout_file = aliased(ApkFile)
+    baseline_version = aliased(ApkVersion)
+    baseline_file = aliased(ApkFile)
+    below = aliased(ApkVersion)
+    # Without a pin, devices outside the rollout stay on the highest version
+    # below the one being rolled out.
+    baseline_id = (
+        select(below.id)
+        .where(below.app_type_id == ReleaseChannel.app_type_id, below.version_key < rollout_version.version_key)
+        .order_by(below.version_key.desc(), below.id.desc())
+        .limit(1)
+        .correlate(ReleaseChannel, rollout_version)
+        .scalar_subquery()
+    )
+    rows = (
+        db.query(
+            ReleaseChannel.app_type_id,
+            ReleaseChannel.channel,
+            ReleaseChannel.rollout_percent,
+            pinned_version.version,
+            pinned_file,
+            rollout_version.version,
+            rollout_file,
+            baseline_version.version,
+            baseline_file,
+        )
+        .outerjoin(pinned_version, pinned_version.id == ReleaseChannel.apk_version_id)
+        .outerjoin(pinned_file, pinned_file.id == pinned_version.current_file_id)
+        .outerjoin(rollout_version, rollout_version.id == ReleaseChannel.rollout_version_id)
+        .outerjoin(rollout_file, rollout_file.id == rollout_version.current_file_id)
+        .outerjoin(
+            baseline_version,
+            and_(ReleaseChannel.apk_version_id.is_(None), baseline_version.id == baseline_id),
+        )
+        .outerjoin(baseline_file, baseline_file.id == baseline_version.current_file_id)
+        .all()
+    )
+
+    def release(app_id: int, version: str | None, apk_file: ApkFile | None) -> Release | None:
+        if version is None:
+            return None
+        return Release(version, grant_for(apk_file, app_id, version) if apk_file else None)
+
+    rules: dict[int, dict[str, ChannelRule]] = {}
+    for app_id, channel, percent, pinned, pinned_apk, rollout, rollout_apk, baseline, baseline_apk in rows:
+        rules.setdefault(app_id, {})[channel] = ChannelRule(
+            pinned=release(app_id, pinned, pinned_apk) or release(app_id, baseline, baseline_apk),
+            rollout=release(app_id, rollout, rollout_apk),
+            rollout_percent=percent,
         )
-        latest_map[app_type.id] = latest_version
+    return rules
 
+
+home_catalog = GenerationCache(CATALOG, load_home_catalog)
+
+
+def load_live_blobs(db: Session) -> frozenset[str]:
+    return frozenset(sha256 for (sha256,) in db.query(ApkFile.sha256).distinct())
+
+
+# Blob URLs never expire, so content whose last file row was deleted must stop
+# being served by hash even while the blob itself is still in storage or mapped.
+live_blobs = GenerationCache(CATALOG, load_live_blobs)
+
+
+def device_id_from(request: Request) -> str | None:
+    value = (request.query_params.get("device") or request.headers.get("x-device-id") or "").strip()
+    return value[:128] or None
+
+
+def channel_from(request: Request) -> str:
+    channel = request.query_params.get("channel", STABLE).strip().lower()
+    if channel not in CHANNELS:
+        raise HTTPException(status_code=400, detail=f"Unknown channel: {channel}")
+    return channel
+
+
+@router.get("/")
+def home(request: Request, db: Session = Depends(get_db)):
+    catalog = home_catalog.get(db)
+    channel = channel_from(request)
+    device_id = device_id_from(request)
+    apps = catalog.apps
+    if channel != STABLE or device_id:
+        apps = []
+        for app in catalog.apps:
+            release, _rollout = app.release_for(channel, device_id)
+            apps.append(
+                replace(
+                    app,
+                    latest_version=release.version if release else None,
+                    latest_download=release.download if release else None,
+                )
+            )
     return templates.TemplateResponse(
         "index.html",
         {
             "request": request,
-            "notices": notices,
-            "app_types": app_types,
-            "latest_map": latest_map,
+            "notices": catalog.notices,
+            "app_types": apps,
+            "profiles": catalog.profiles,
         },
     )
 
@@ -63,12 +348,15 @@ def app_detail(slug: str, request: Request, db: Session = Depends(get_db)):
     if not app_type:
         raise HTTPException(status_code=404, detail="App type not found")
 
-    versions = (
+    limit = requested_page_size(request.query_params, default=VERSION_PAGE_SIZE)
+    page = keyset_page(
         db.query(ApkVersion)
         .options(joinedload(ApkVersion.current_file))
-        .filter(ApkVersion.app_type_id == app_type.id)
-        .order_by(ApkVersion.created_at.desc())
-        .all()
+        .filter(ApkVersion.app_type_id == app_type.id),
+        [ApkVersion.version_key, ApkVersion.id],
+        cursor=request.query_params.get("cursor"),
+        direction=request.query_params.get("direction", "next"),
+        limit=limit,
     )
 
     return templates.TemplateResponse(
@@ -76,7 +364,25 @@ def app_detail(slug: str, request: Request, db: Session = Depends(get_db)):
         {
             "request": request,
             "app_type": app_type,
-            "versions": versions,
+            "versions": page.items,
+            "downloads": {
+                v.id: grant_for(v.current_file, app_type.id, v.version) for v in page.items if v.current_file
+            },
+            "next_url": page_url(f"/apps/{slug}", {}, page.next_cursor, "next", limit),
+            "prev_url": page_url(f"/apps/{slug}", {}, page.prev_cursor, "prev", limit),
+        },
+    )
+
+
+@router.get("/search")
+def search(request: Request, q: str = "", db: Session = Depends(get_db)):
+    results = search_catalog(db, q) if q.strip() else None
+    return templates.TemplateResponse(
+        "search.html",
+        {
+            "request": request,
+            "query": q,
+            "results": results,
         },
     )
 
@@ -92,22 +398,171 @@ def download(file_id: int, request: Request, db: Session = Depends(get_db)):
     if not apk_file:
         raise HTTPException(status_code=404, detail="File not found")
 
-    path = Path(apk_file.stored_path)
-    if not path.exists() or not path.is_file():
+    if not get_storage().exists(apk_file.stored_path):
         raise HTTPException(status_code=404, detail="Stored file not found")
 
     app_type = apk_file.apk_version.app_type
-    write_download_log(
-        db,
-        apk_file_id=apk_file.id,
-        app_type_id=app_type.id,
-        version=apk_file.apk_version.version,
+    log_fields = {
+        "apk_file_id": apk_file.id,
+        "app_type_id": app_type.id,
+        "version": apk_file.apk_version.version,
+        "ip": get_client_ip(request),
+        "user_agent": request.headers.get("user-agent"),
+    }
+    if settings.edge_mode:
+        spool_download_log(**log_fields)
+    else:
+        write_download_log(db, **log_fields)
+
+    return serve_blob(apk_file.stored_path, apk_file.original_filename, request)
+
+
+def _check_revoked(grant: DownloadGrant) -> DownloadGrant:
+    with SessionLocal() as db:
+        if grant.file_id in revoked_files.get(db):
+            raise HTTPException(status_code=410, detail="Download link has been revoked")
+    return grant
+
+
+def _queue_download_log(grant: DownloadGrant, request: Request, ping_id: str | None = None) -> None:
+    download_log_queue.submit(
+        apk_file_id=grant.file_id,
+        app_type_id=grant.app_type_id,
+        version=grant.version,
         ip=get_client_ip(request),
         user_agent=request.headers.get("user-agent"),
+        ping_id=ping_id,
     )
 
-    return FileResponse(
-        path=path,
-        filename=apk_file.original_filename,
-        media_type="application/vnd.android.package-archive",
+
+@router.get("/d/{token}")
+def signed_download(token: str, request: Request):
+    try:
+        grant = _check_revoked(verify_download(token))
+    except TokenError as exc:
+        raise HTTPException(status_code=exc.status_code, detail=str(exc)) from None
+    _queue_download_log(grant, request)
+    return serve_blob(grant.key, grant.filename, request)
+
+
+@router.post("/ping/{token}", status_code=204)
+def download_ping(token: str, request: Request):
+    # Each ping token is counted once; the log writer drops replays by ping_id.
+    try:
+        grant, ping_id = verify_ping(token)
+    except TokenError as exc:
+        raise HTTPException(status_code=exc.status_code, detail=str(exc)) from None
+    _queue_download_log(_check_revoked(grant), request, ping_id)
+    return Response(status_code=204)
+
+
+def _if_none_match(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return header.strip() == "*" or etag in [tag.strip().removeprefix("W/") for tag in header.split(",")]
+
+
+@router.get("/blobs/{sha256}/{filename}")
+def immutable_blob(sha256: str, filename: str, request: Request):
+    if not SHA256_PATTERN.match(sha256):
+        raise HTTPException(status_code=404, detail="Blob not found")
+
+    with SessionLocal() as db:
+        if sha256 not in live_blobs.get(db):
+            raise HTTPException(status_code=404, detail="Blob not found")
+
+    etag = f'"{sha256}"'
+    headers = {"Cache-Control": IMMUTABLE_CACHE_CONTROL, "ETag": etag}
+    if _if_none_match(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    storage = get_storage()
+    key = blob_key(sha256)
+    if not storage.exists(key):
+        with SessionLocal() as db:
+            legacy = db.query(ApkFile.stored_path).filter(ApkFile.sha256 == sha256).first()
+        if legacy is None:
+            raise HTTPException(status_code=404, detail="Blob not found")
+        key = legacy.stored_path
+    return serve_blob(key, filename, request, headers)
+
+
+@router.get("/bundle")
+def bundle_download(
+    request: Request,
+    apps: list[str] = Query(default=[]),
+    profile: str | None = None,
+    db: Session = Depends(get_db),
+):
+    catalog = home_catalog.get(db)
+    if profile:
+        device_profile = next((p for p in catalog.profiles if p.slug == profile), None)
+        if device_profile is None:
+            raise HTTPException(status_code=404, detail="Device profile not found")
+        slugs = device_profile.apps
+        bundle_name = device_profile.slug
+    else:
+        slugs = [slug.strip() for value in apps for slug in value.split(",") if slug.strip()]
+        bundle_name = "apps"
+    slugs = list(dict.fromkeys(slugs))
+    if not slugs or len(slugs) > MAX_BUNDLE_APPS:
+        raise HTTPException(status_code=400, detail=f"Select between 1 and {MAX_BUNDLE_APPS} apps")
+
+    by_slug = {app.slug: app for app in catalog.apps}
+    missing = [slug for slug in slugs if slug not in by_slug or by_slug[slug].latest_download is None]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"No downloadable file for: {', '.join(missing)}")
+
+    grants = [by_slug[slug].latest_download for slug in slugs]
+    files = db.query(ApkFile).filter(ApkFile.id.in_([g.file_id for g in grants])).all()
+    # Hashing whole APKs here would stall the request; files from before
+    # crc32 was recorded are filled by `appdownloader backfill-crc32`.
+    if any(f.crc32 is None for f in files):
+        raise HTTPException(status_code=503, detail="Bundle checksums are not ready yet")
+    storage = get_storage()
+    checksums = {f.id: f.crc32 for f in files}
+    created = {f.id: f.created_at for f in files}
+    bundle = ZipBundle(
+        [
+            BundleEntry(
+                name=f"{slug}/{grant.filename}",
+                key=grant.key,
+                size=grant.size,
+                crc32=checksums[grant.file_id],
+                modified_at=created[grant.file_id],
+                apk_file_id=grant.file_id,
+                app_type_id=grant.app_type_id,
+                version=grant.version,
+            )
+            for slug, grant in zip(slugs, grants)
+        ]
+    )
+
+    byte_range = _requested_range(request, bundle.size, bundle.etag)
+    if byte_range is None or byte_range[0] == 0:
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        rows = [
+            {
+                "apk_file_id": entry.apk_file_id,
+                "app_type_id": entry.app_type_id,
+                "version": entry.version,
+                "ip": get_client_ip(request),
+                "user_agent": request.headers.get("user-agent"),
+                "created_at": now,
+            }
+            for entry in bundle.entries
+        ]
+        if settings.edge_mode:
+            spool_download_logs(rows)
+        else:
+            write_download_logs(db, rows)
+
+    return _ranged_response(
+        bundle.size,
+        lambda start, end: bundle.iter_range(storage, start, end),
+        f"{bundle_name}-{datetime.now():%Y%m%d}.zip",
+        request,
+        {"ETag": bundle.etag},
+        media_type="application/zip",
     )
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+
+from markupsafe import Markup, escape
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+
+HIGHLIGHT_START = "\x02"
+HIGHLIGHT_END = "\x03"
+MIN_TRIGRAM_LENGTH = 3
+SNIPPET_WIDTH = 80
+
+@dataclass(frozen=True)
+class SearchHit:
+    kind: str
+    title: str
+    url: str
+    snippet: Markup
+    rank: float
+
+
+@dataclass(frozen=True)
+class SearchResults:
+    query: str
+    apps: list[SearchHit]
+    versions: list[SearchHit]
+    notices: list[SearchHit]
+
+    @property
+    def total(self) -> int:
+        return len(self.apps) + len(self.versions) + len(self.notices)
+
+
+def split_terms(query: str) -> list[str]:
+    return [term for term in re.split(r"\s+", query.strip()) if term][:8]
+
+
+def _match_expression(terms: list[str]) -> str | None:
+    long_terms = [t for t in terms if len(t) >= MIN_TRIGRAM_LENGTH]
+    if not long_terms:
+        return None
+    return " ".join('"' + t.replace('"', '""') + '"' for t in long_terms)
+
+
+def _like_pattern(term: str) -> str:
+    return "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def render_highlight(value: str | None) -> Markup:
+    escaped = str(escape(value or ""))
+    return Markup(escaped.replace(HIGHLIGHT_START, "<mark>").replace(HIGHLIGHT_END, "</mark>"))
+
+
+def make_snippet(value: str | None, terms: list[str], width: int = SNIPPET_WIDTH) -> Markup:
+    value = value or ""
+    lowered = value.lower()
+    positions = [lowered.find(t.lower()) for t in terms if lowered.find(t.lower()) >= 0]
+    start = max(min(positions, default=0) - width // 4, 0)
+    excerpt = value[start : start + width]
+    pattern = re.compile("|".join(re.escape(t) for t in terms), re.IGNORECASE) if terms else None
+    if pattern:
+        excerpt = pattern.sub(lambda m: f"{HIGHLIGHT_START}{m.group(0)}{HIGHLIGHT_END}", excerpt)
+    prefix = "…" if start > 0 else ""
+    suffix = "…" if start + width < len(value) else ""
+    return render_highlight(prefix + excerpt + suffix)
+
+
+def _search_table(
+    db: Session,
+    fts_name: str,
+    *,
+    select_sql: str,
+    source_sql: str,
+    id_column: str,
+    join_sql: str,
+    where_sql: str,
+    text_columns: list[str],
+    terms: list[str],
+    limit: int,
+) -> list[dict]:
+    match = _match_expression(terms)
+    short_terms = [t for t in terms if len(t) < MIN_TRIGRAM_LENGTH]
+    params: dict = {"limit": limit}
+    conditions = [where_sql]
+
+    for i, term in enumerate(short_terms):
+        params[f"like_{i}"] = _like_pattern(term)
+        any_column = " OR ".join(f"{c} LIKE :like_{i} ESCAPE '\\'" for c in text_columns)
+        conditions.append(f"({any_column})")
+
+    if not match:
+        sql = (
+            f"SELECT {select_sql}, 0.0 AS rank FROM {source_sql} {join_sql} "
+            f"WHERE {' AND '.join(conditions)} ORDER BY {id_column} DESC LIMIT :limit"
+        )
+        return [dict(row) for row in db.execute(text(sql), params).mappings().all()]
+
+    # Visibility and short-term filters apply before the bm25 cut so hidden
+    # rows never push visible matches out of the limit. Snippets are cut in
+    # Python because snippet() re-runs the phrase query for every returned row.
+    params["match"] = match
+    sql = (
+        f"SELECT {select_sql}, {fts_name}.rank AS rank FROM {fts_name} "
+        f"JOIN {source_sql} ON {id_column} = {fts_name}.rowid {join_sql} "
+        f"WHERE {fts_name} MATCH :match AND {' AND '.join(conditions)} "
+        f"ORDER BY {fts_name}.rank LIMIT :limit"
+    )
+    return [dict(row) for row in db.execute(text(sql), params).mappings().all()]
+
+
+def search_catalog(db: Session, query: str, limit: int = 20) -> SearchResults:
+    terms = split_terms(query)
+    if not terms:
+        return SearchResults(query=query, apps=[], versions=[], notices=[])
+
+    app_rows = _search_table(
+        db,
+        "app_types_fts",
+        select_sql="a.name AS name, a.slug AS slug, a.description AS description",
+        source_sql="app_types a",
+        id_column="a.id",
+        join_sql="",
+        where_sql="a.is_active = 1",
+        text_columns=["a.name", "a.description"],
+        terms=terms,
+        limit=limit,
+    )
+    version_rows = _search_table(
+        db,
+        "apk_versions_fts",
+        select_sql="a.name AS name, a.slug AS slug, v.version AS version, v.release_note AS release_note",
+        source_sql="apk_versions v",
+        id_column="v.id",
+        join_sql="JOIN app_types a ON a.id = v.app_type_id",
+        where_sql="a.is_active = 1",
+        text_columns=["v.release_note"],
+        terms=terms,
+        limit=limit,
+    )
+    notice_rows = _search_table(
+        db,
+        "notices_fts",
+        select_sql="n.id AS id, n.title AS title, n.content AS content",
+        source_sql="notices n",
+        id_column="n.id",
+        join_sql="",
+        where_sql="n.is_visible = 1",
+        text_columns=["n.title", "n.content"],
+        terms=terms,
+        limit=limit,
+    )
+
+    return SearchResults(
+        query=query,
+        apps=[
+            SearchHit(
+                kind="app",
+                title=row["name"],
+                url=f"/apps/{row['slug']}",
+                snippet=make_snippet(row["description"] or row["name"], terms),
+                rank=row["rank"],
+            )
+            for row in app_rows
+        ],
+        versions=[
+            SearchHit(
+                kind="version",
+                title=f"{row['name']} {row['version']}",
+                url=f"/apps/{row['slug']}",
+                snippet=make_snippet(row["release_note"], terms),
+                rank=row["rank"],
+            )
+            for row in version_rows
+        ],
+        notices=[
+            SearchHit(
+                kind="notice",
+                title=row["title"],
+                url="/",
+                snippet=make_snippet(row["content"], terms),
+                rank=row["rank"],
+            )
+            for row in notice_rows
+        ],
+    )
@@ -0,0 +1,352 @@
+from __future__ import annotations
+
+import hashlib
+import random
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from sqlalchemy import Connection, func, insert, select, text, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from .cache import bump_generation
+from .models import AdminUser, ApkFile, ApkVersion, AppType, AuditLog, DownloadLog, Notice
+from .storage import LocalStorage, blob_key
+from .versioning import version_key
+
+
+POPULARITY_SLOTS = 65536
+CLIENT_SLOTS = 4096
+LOG_BATCH_SIZE = 1_000_000
+USER_AGENTS = (
+    "okhttp/4.12.0",
+    "Dalvik/2.1.0 (Linux; U; Android 13; SM-T636B)",
+    "Dalvik/2.1.0 (Linux; U; Android 11; TC52)",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/126.0",
+)
+AUDIT_ACTIONS = (
+    ("admin_login", "session"),
+    ("upload_apk", "apk_version"),
+    ("overwrite_apk", "apk_version"),
+    ("update_app_type", "app_type"),
+    ("create_notice", "notice"),
+    ("admin_logout", "session"),
+)
+ACTION_SLOTS = 1024
+
+# random() is drawn inside the recursive CTE: used directly in a join
+# condition SQLite evaluates it once for the whole statement. Slot counts are
+# powers of two so masking keeps the draws non-negative and uniform.
+_DOWNLOAD_LOG_SQL = """
+INSERT INTO download_logs (apk_file_id, app_type_id, version, ip, user_agent, created_at)
+WITH RECURSIVE seq(n, r1, r2) AS (
+    SELECT :first, random(), random()
+    UNION ALL SELECT n + 1, random(), random() FROM seq WHERE n < :last
+)
+SELECT f.apk_file_id, f.app_type_id, f.version, c.ip, c.user_agent,
+       datetime(:start + n * :span / :total, 'unixepoch')
+FROM seq
+JOIN seed_files f ON f.slot = (r1 & :file_mask)
+JOIN seed_clients c ON c.slot = (r2 & :client_mask)
+"""
+
+_AUDIT_LOG_SQL = """
+INSERT INTO audit_logs (actor_type, actor_id, action, target_type, target_id, ip, user_agent, created_at)
+WITH RECURSIVE seq(n, r1, r2, r3) AS (
+    SELECT :first, random(), random(), random()
+    UNION ALL SELECT n + 1, random(), random(), random() FROM seq WHERE n < :last
+)
+SELECT 'admin', :actor_id, a.action, a.target_type, (r3 & 2147483647) % :targets + 1, c.ip, c.user_agent,
+       datetime(:start + n * :span / :total, 'unixepoch')
+FROM seq
+JOIN seed_actions a ON a.slot = (r1 & :action_mask)
+JOIN seed_clients c ON c.slot = (r2 & :client_mask)
+"""
+
+
+@dataclass(frozen=True)
+class SeedPlan:
+    apps: int = 20
+    versions_per_app: int = 30
+    revisions_per_version: int = 1
+    notices: int = 200
+    audit_logs: int = 100_000
+    download_logs: int = 1_000_000
+    clients: int = 5000
+    days: int = 365
+    skew: float = 1.2
+    file_size: int = 30 * 1024**2
+    random_seed: int = 42
+
+
+@dataclass
+class SeedReport:
+    counts: dict[str, int] = field(default_factory=dict)
+    timings: dict[str, float] = field(default_factory=dict)
+    placeholder_files: int = 0
+
+    @property
+    def elapsed(self) -> float:
+        return sum(self.timings.values())
+
+
+def zipf_weights(count: int, skew: float) -> list[float]:
+    return [1 / (rank**skew) for rank in range(1, count + 1)]
+
+
+def allocate_slots(weights: list[float], slots: int) -> list[int]:
+    # Index i of the result is the item that owns slot i; uniformly random slot
+    # picks then reproduce the weight distribution without per-row Python work.
+    total = sum(weights)
+    owners = []
+    cumulative = 0.0
+    for index, weight in enumerate(weights):
+        cumulative += weight
+        owners.extend([index] * (round(cumulative / total * slots) - len(owners)))
+    return owners
+
+
+def _placeholder(root: LocalStorage, sha256: str, size: int) -> None:
+    path = root.path_for(blob_key(sha256))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("wb") as fp:
+        fp.write(b"PK\x03\x04")
+        fp.truncate(size)
+
+
+def _ensure_fresh(connection: Connection) -> None:
+    for model in (AppType, ApkVersion, ApkFile, DownloadLog):
+        if connection.execute(select(func.count()).select_from(model)).scalar_one():
+            raise ValueError(f"{model.__tablename__} is not empty; seed needs a fresh database")
+
+
+def _seed_catalog(
+    connection: Connection,
+    plan: SeedPlan,
+    rng: random.Random,
+    files_root: Path | None,
+    admin_id: int | None,
+) -> tuple[list[dict], list[dict]]:
+    started = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=plan.days)
+    step = timedelta(days=plan.days) / max(plan.versions_per_app, 1)
+    storage = LocalStorage(files_root) if files_root is not None else None
+
+    apps: list[dict] = []
+    versions: list[dict] = []
+    files: list[dict] = []
+    version_id = file_id = 0
+    for app_no in range(1, plan.apps + 1):
+        apps.append(
+            {
+                "id": app_no,
+                "name": f"Seed App {app_no:04d}",
+                "slug": f"seed-app-{app_no:04d}",
+                "description": f"synthetic app #{app_no}",
+                "is_active": True,
+            }
+        )
+        for minor in range(plan.versions_per_app):
+            version_id += 1
+            version = f"{1 + minor // 10}.{minor % 10}.{rng.randrange(20)}"
+            created_at = started + step * minor
+            versions.append(
+                {
+                    "id": version_id,
+                    "app_type_id": app_no,
+                    "version": version,
+                    "version_key": version_key(version),
+                    "release_note": f"seed release {version}",
+                    "created_at": created_at,
+                    "updated_at": created_at,
+                }
+            )
+            for revision in range(1, plan.revisions_per_version + 1):
+                file_id += 1
+                sha256 = hashlib.sha256(f"seed:{plan.random_seed}:{file_id}".encode()).hexdigest()
+                size = rng.randint(plan.file_size // 2, plan.file_size * 3 // 2)
+                files.append(
+                    {
+                        "id": file_id,
+                        "apk_version_id": version_id,
+                        "revision_no": revision,
+                        "stored_path": blob_key(sha256),
+                        "original_filename": f"seed-app-{app_no:04d}-{version}.apk",
+                        "file_size": size,
+                        "sha256": sha256,
+                        "uploaded_by": admin_id,
+                        "is_current": revision == plan.revisions_per_version,
+                        "created_at": created_at,
+                    }
+                )
+                if storage is not None:
+                    _placeholder(storage, sha256, size)
+
+    if apps:
+        connection.execute(insert(AppType), apps)
+    if versions:
+        connection.execute(insert(ApkVersion), versions)
+    if files:
+        connection.execute(insert(ApkFile), files)
+        current = (
+            select(ApkFile.id)
+            .where(ApkFile.apk_version_id == ApkVersion.id, ApkFile.is_current.is_(True))
+            .scalar_subquery()
+        )
+        connection.execute(update(ApkVersion).values(current_file_id=current))
+    return versions, files
+
+
+def _popular_files(plan: SeedPlan, versions: list[dict], files: list[dict]) -> list[tuple]:
+    # Popularity is skewed twice: across apps, and within an app towards its
+    # newest releases, which is what real fleets look like after an update.
+    current = {f["apk_version_id"]: f["id"] for f in files if f["is_current"]}
+    app_weights = zipf_weights(plan.apps, plan.skew)
+    version_weights = zipf_weights(plan.versions_per_app, plan.skew * 2)
+    candidates, weights = [], []
+    for index, version in enumerate(versions):
+        newest_rank = plan.versions_per_app - 1 - index % plan.versions_per_app
+        candidates.append((current[version["id"]], version["app_type_id"], version["version"]))
+        weights.append(app_weights[version["app_type_id"] - 1] * version_weights[newest_rank])
+    return [(slot, *candidates[owner]) for slot, owner in enumerate(allocate_slots(weights, POPULARITY_SLOTS))]
+
+
+def _seed_clients(plan: SeedPlan, rng: random.Random) -> list[tuple]:
+    clients = [
+        (f"10.{rng.randrange(4)}.{rng.randrange(256)}.{rng.randrange(1, 255)}", rng.choice(USER_AGENTS))
+        for _ in range(max(plan.clients, 1))
+    ]
+    rng.shuffle(clients)
+    owners = allocate_slots(zipf_weights(len(clients), plan.skew / 2), CLIENT_SLOTS)
+    return [(slot, *clients[owner]) for slot, owner in enumerate(owners)]
+
+
+def _bulk_logs(
+    connection: Connection,
+    model,
+    statement: str,
+    count: int,
+    params: dict,
+    progress: Callable[[str, int, int], None] | None,
+) -> None:
+    table = model.__table__
+    # Rows arrive in created_at order, so indexes leading with it only ever
+    # append; the others are cheaper to build once after the load than to
+    # maintain row by row.
+    deferred = [index for index in table.indexes if index.columns[0].name != "created_at"]
+    for index in deferred:
+        index.drop(connection)
+    for first in range(0, count, LOG_BATCH_SIZE):
+        last = min(first + LOG_BATCH_SIZE, count) - 1
+        connection.execute(text(statement), {**params, "first": first, "last": last, "total": count})
+        if progress:
+            progress(table.name, last + 1, count)
+    for index in deferred:
+        index.create(connection)
+
+
+def seed_database(
+    engine: Engine,
+    plan: SeedPlan,
+    *,
+    files_root: Path | None = None,
+    progress: Callable[[str, int, int], None] | None = None,
+) -> SeedReport:
+    if engine.dialect.name != "sqlite":
+        raise ValueError("seed currently supports SQLite databases only")
+
+    rng = random.Random(plan.random_seed)
+    report = SeedReport()
+    start_epoch = int(time.time()) - plan.days * 86400
+    span = plan.days * 86400
+
+    with engine.begin() as connection:
+        connection.exec_driver_sql("PRAGMA synchronous = OFF")
+        _ensure_fresh(connection)
+        admin_id = connection.execute(select(AdminUser.id).order_by(AdminUser.id).limit(1)).scalar()
+
+        started = time.perf_counter()
+        versions, files = _seed_catalog(connection, plan, rng, files_root, admin_id)
+        if plan.notices:
+            base = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=plan.days)
+            connection.execute(
+                insert(Notice),
+                [
+                    {
+                        "title": f"seed notice {i}",
+                        "content": f"synthetic notice body {i} " + "lorem ipsum " * 20,
+                        "is_pinned": i < 2,
+                        "is_visible": True,
+                        "created_by": admin_id,
+                        "created_at": base + timedelta(days=plan.days) * i / plan.notices,
+                    }
+                    for i in range(plan.notices)
+                ],
+            )
+        report.timings["catalog"] = time.perf_counter() - started
+        report.placeholder_files = len(files) if files_root is not None else 0
+
+        connection.exec_driver_sql(
+            "CREATE TEMP TABLE seed_clients (slot INTEGER PRIMARY KEY, ip TEXT, user_agent TEXT)"
+        )
+        connection.exec_driver_sql(
+            "INSERT INTO seed_clients VALUES (?, ?, ?)", _seed_clients(plan, rng)
+        )
+
+        if plan.download_logs and files:
+            started = time.perf_counter()
+            connection.exec_driver_sql(
+                "CREATE TEMP TABLE seed_files (slot INTEGER PRIMARY KEY, apk_file_id INTEGER, "
+                "app_type_id INTEGER, version TEXT)"
+            )
+            connection.exec_driver_sql("INSERT INTO seed_files VALUES (?, ?, ?, ?)", _popular_files(plan, versions, files))
+            _bulk_logs(
+                connection,
+                DownloadLog,
+                _DOWNLOAD_LOG_SQL,
+                plan.download_logs,
+                {
+                    "start": start_epoch,
+                    "span": span,
+                    "file_mask": POPULARITY_SLOTS - 1,
+                    "client_mask": CLIENT_SLOTS - 1,
+                },
+                progress,
+            )
+            report.timings["download_logs"] = time.perf_counter() - started
+
+        if plan.audit_logs:
+            started = time.perf_counter()
+            connection.exec_driver_sql(
+                "CREATE TEMP TABLE seed_actions (slot INTEGER PRIMARY KEY, action TEXT, target_type TEXT)"
+            )
+            action_weights = zipf_weights(len(AUDIT_ACTIONS), 1.0)
+            connection.exec_driver_sql(
+                "INSERT INTO seed_actions VALUES (?, ?, ?)",
+                [(slot, *AUDIT_ACTIONS[owner]) for slot, owner in enumerate(allocate_slots(action_weights, ACTION_SLOTS))],
+            )
+            _bulk_logs(
+                connection,
+                AuditLog,
+                _AUDIT_LOG_SQL,
+                plan.audit_logs,
+                {
+                    "start": start_epoch,
+                    "span": span,
+                    "actor_id": admin_id,
+                    "targets": max(len(versions), 1),
+                    "action_mask": ACTION_SLOTS - 1,
+                    "client_mask": CLIENT_SLOTS - 1,
+                },
+                progress,
+            )
+            report.timings["audit_logs"] = time.perf_counter() - started
+
+    with Session(engine) as db:
+        bump_generation(db)
+        db.commit()
+        for model in (AppType, ApkVersion, ApkFile, Notice, AuditLog, DownloadLog):
+            report.counts[model.__tablename__] = db.execute(select(func.count()).select_from(model)).scalar_one()
+    return report
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import logging
+import os
+import time
+
+import uvicorn
+from uvicorn.supervisors.multiprocess import Multiprocess, Process
+
+from .config import settings
+
+
+logger = logging.getLogger("uvicorn.error")
+
+ROLLING_WARMUP_SECONDS = 2.0
+
+
+class RollingMultiprocess(Multiprocess):
+    # uvicorn's SIGHUP handler stops a worker before starting its replacement;
+    # start the replacement first so capacity never drops below N workers.
+    def restart_all(self) -> None:
+        for idx, old in enumerate(list(self.processes)):
+            new = Process(self.config, self.target, self.sockets)
+            new.start()
+            if not new.is_alive(timeout=self.config.timeout_worker_healthcheck):
+                logger.warning("Replacement worker [%s] is not responding", new.pid)
+            time.sleep(ROLLING_WARMUP_SECONDS)
+            old.terminate()
+            old.join()
+            self.processes[idx] = new
+            logger.info("Replaced worker [%s] with [%s]", old.pid, new.pid)
+
+
+def build_config(workers: int | None = None, app: str = "appdownloader.main:app") -> uvicorn.Config:
+    return uvicorn.Config(
+        app,
+        host=settings.host,
+        port=settings.port,
+        workers=workers or settings.workers,
+        loop=settings.event_loop,
+        http=settings.http_protocol,
+        limit_concurrency=settings.limit_concurrency or None,
+        backlog=settings.backlog,
+        timeout_keep_alive=settings.keep_alive_seconds,
+        timeout_graceful_shutdown=settings.graceful_shutdown_seconds,
+        h11_max_incomplete_event_size=settings.h11_max_incomplete_event_size or None,
+        reload=False,
+    )
+
+
+def run_server(workers: int | None = None) -> None:
+    if workers:
+        # Spawned workers re-read settings; SESSION_BACKEND=auto depends on it.
+        os.environ["APP_WORKERS"] = str(workers)
+    config = build_config(workers)
+    server = uvicorn.Server(config)
+    if config.workers > 1:
+        from .main import RUNTIME_PREPARED_ENV, prepare_runtime
+
+        # Create the schema and bootstrap admin once, before workers race for
+        # it; spawned workers inherit the flag and skip it on startup.
+        prepare_runtime()
+        os.environ[RUNTIME_PREPARED_ENV] = "1"
+        sock = config.bind_socket()
+        RollingMultiprocess(config, target=server.run, sockets=[sock]).run()
+    else:
+        server.run()
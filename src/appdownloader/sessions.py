@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+import json
+import logging
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from anyio import to_thread
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+
+from .config import settings
+from .models import AdminSession
+from .tracing import span
+
+
+logger = logging.getLogger(__name__)
+
+PENDING_OVERWRITE = "pending_overwrite"
+ROTATE_SESSION = "_rotate"
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class MemorySessionStore:
+    blocking = False
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max(max_entries, 1)
+        self._lock = threading.Lock()
+        self._items: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._dropped: list[str] = []
+
+    def load(self, session_id: str) -> dict | None:
+        with self._lock:
+            item = self._items.get(session_id)
+            if item is None or item[0] <= time.time():
+                return None
+            self._items.move_to_end(session_id)
+            return json.loads(item[1])
+
+    def save(self, session_id: str, data: dict, max_age: int) -> None:
+        with self._lock:
+            self._items[session_id] = (time.time() + max_age, json.dumps(data))
+            self._items.move_to_end(session_id)
+            while len(self._items) > self.max_entries:
+                _evicted_id, (_expires, payload) = self._items.popitem(last=False)
+                self._dropped.append(payload)
+
+    def delete(self, session_id: str) -> dict | None:
+        with self._lock:
+            item = self._items.pop(session_id, None)
+        return json.loads(item[1]) if item else None
+
+    def reap(self) -> list[dict]:
+        now = time.time()
+        with self._lock:
+            expired = [session_id for session_id, (expires, _payload) in self._items.items() if expires <= now]
+            payloads = [self._items.pop(session_id)[1] for session_id in expired] + self._dropped
+            self._dropped = []
+        return [json.loads(payload) for payload in payloads]
+
+
+class SqliteSessionStore:
+    blocking = True
+
+    def __init__(self, session_factory: Callable[[], Session] | None = None):
+        if session_factory is None:
+            from .db import SessionLocal
+
+            session_factory = SessionLocal
+        self.session_factory = session_factory
+
+    def load(self, session_id: str) -> dict | None:
+        db = self.session_factory()
+        try:
+            row = db.get(AdminSession, session_id)
+            if row is None or row.expires_at <= _utcnow():
+                return None
+            return json.loads(row.data)
+        finally:
+            db.close()
+
+    def save(self, session_id: str, data: dict, max_age: int) -> None:
+        db = self.session_factory()
+        try:
+            db.merge(
+                AdminSession(
+                    id=session_id,
+                    data=json.dumps(data),
+                    expires_at=_utcnow() + timedelta(seconds=max_age),
+                )
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def delete(self, session_id: str) -> dict | None:
+        db = self.session_factory()
+        try:
+            row = db.get(AdminSession, session_id)
+            if row is None:
+                return None
+            data = json.loads(row.data)
+            db.delete(row)
+            db.commit()
+            return data
+        finally:
+            db.close()
+
+    def reap(self) -> list[dict]:
+        db = self.session_factory()
+        try:
+            now = _utcnow()
+            rows = db.execute(select(AdminSession.data).where(AdminSession.expires_at <= now)).scalars().all()
+            if rows:
+                db.execute(delete(AdminSession).where(AdminSession.expires_at <= now))
+                db.commit()
+            return [json.loads(data) for data in rows]
+        finally:
+            db.close()
+
+
+SessionStore = MemorySessionStore | SqliteSessionStore
+
+
+def build_session_store() -> SessionStore:
+    backend = settings.session_backend
+    if backend == "auto":
+        backend = "memory" if settings.workers <= 1 else "sqlite"
+    if backend == "memory":
+        return MemorySessionStore(settings.session_memory_max_entries)
+    if backend == "sqlite":
+        return SqliteSessionStore()
+    raise ValueError(f"unknown SESSION_BACKEND: {settings.session_backend}")
+
+
+def rotate_session(session_data: dict) -> None:
+    # The middleware moves the data to a fresh id and drops the old entry, so
+    # an id planted before login is worthless afterwards.
+    session_data[ROTATE_SESSION] = True
+
+
+def discard_pending_upload(session_data: dict) -> None:
+    pending = session_data.pop(PENDING_OVERWRITE, None)
+    if pending and pending.get("tmp_path"):
+        Path(pending["tmp_path"]).unlink(missing_ok=True)
+
+
+def reap_sessions(store: SessionStore, tmp_root: Path | None = None, max_age: float | None = None) -> int:
+    expired = store.reap()
+    for data in expired:
+        discard_pending_upload(data)
+
+    # Pending uploads never outlive a session, so anything older is orphaned
+    # (e.g. the in-memory store was lost in a restart).
+    tmp_root = settings.tmp_root if tmp_root is None else tmp_root
+    cutoff = time.time() - (settings.session_max_age_seconds if max_age is None else max_age)
+    if tmp_root.is_dir():
+        for path in tmp_root.glob("*.apk"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink(missing_ok=True)
+            except OSError:
+                continue
+    return len(expired)
+
+
+class ServerSessionMiddleware:
+    def __init__(
+        self,
+        app,
+        store: SessionStore,
+        *,
+        cookie_name: str = "session_id",
+        max_age: int | None = None,
+        path: str = "/",
+        same_site: str = "lax",
+        https_only: bool = False,
+        reap_interval: float | None = None,
+    ):
+        self.app = app
+        self.store = store
+        self.cookie_name = cookie_name
+        self.max_age = settings.session_max_age_seconds if max_age is None else max_age
+        self.path = path
+        self.security_flags = f"httponly; samesite={same_site}" + ("; secure" if https_only else "")
+        self.reap_interval = settings.session_reap_interval_seconds if reap_interval is None else reap_interval
+        self._reaper: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+
+    def _start_reaper(self) -> None:
+        with self._start_lock:
+            if self._reaper is None and self.reap_interval > 0:
+                self._reaper = threading.Thread(target=self._reap_forever, name="session-reaper", daemon=True)
+                self._reaper.start()
+
+    def _reap_forever(self) -> None:
+        while True:
+            time.sleep(self.reap_interval)
+            try:
+                reap_sessions(self.store)
+            except Exception:
+                logger.exception("failed to reap expired sessions")
+
+    async def _run(self, func, *args):
+        if self.store.blocking:
+            return await to_thread.run_sync(func, *args)
+        return func(*args)
+
+    def _drop(self, session_id: str) -> None:
+        discard_pending_upload(self.store.delete(session_id) or {})
+
+    def _cookie(self, value: str, max_age: int) -> str:
+        return f"{self.cookie_name}={value}; path={self.path}; Max-Age={max_age}; {self.security_flags}"
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+        if self._reaper is None:
+            self._start_reaper()
+
+        session_id = HTTPConnection(scope).cookies.get(self.cookie_name)
+        data = None
+        if session_id:
+            with span("session.load", "session"):
+                data = await self._run(self.store.load, session_id)
+        if data is None:
+            session_id = None
+        scope["session"] = data or {}
+        snapshot = json.dumps(scope["session"], sort_keys=True)
+
+        async def send_wrapper(message) -> None:
+            nonlocal session_id
+            if message["type"] == "http.response.start":
+                session = scope["session"]
+                headers = MutableHeaders(scope=message)
+                rotate = session.pop(ROTATE_SESSION, False)
+                if not session:
+                    if session_id:
+                        with span("session.delete", "session"):
+                            await self._run(self._drop, session_id)
+                        headers.append("Set-Cookie", self._cookie("null", 0) + "; expires=Thu, 01 Jan 1970 00:00:00 GMT")
+                elif session_id is None or rotate or json.dumps(session, sort_keys=True) != snapshot:
+                    if rotate and session_id:
+                        with span("session.delete", "session"):
+                            await self._run(self.store.delete, session_id)
+                        session_id = None
+                    session_id = session_id or secrets.token_urlsafe(32)
+                    with span("session.save", "session"):
+                        await self._run(self.store.save, session_id, session, self.max_age)
+                    headers.append("Set-Cookie", self._cookie(session_id, self.max_age))
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import hmac
+import json
+import secrets
+import time
+from collections.abc import Iterable
+from dataclasses import astuple, dataclass, fields
+from datetime import datetime, timedelta, timezone
+from urllib.parse import quote
+
+from sqlalchemy.orm import Session
+
+from .cache import GenerationCache, bump_generation
+from .config import settings
+from .models import RevokedFile
+
+
+REVOCATIONS = "revocations"
+PING_NONCE_BYTES = 12
+PING_ID_LENGTH = 32
+
+
+class TokenError(Exception):
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+@dataclass(frozen=True)
+class DownloadGrant:
+    file_id: int
+    key: str
+    sha256: str
+    size: int
+    filename: str
+    app_type_id: int
+    version: str
+
+
+GRANT_FIELDS = len(fields(DownloadGrant))
+
+
+def grant_for(apk_file, app_type_id: int, version: str) -> DownloadGrant:
+    return DownloadGrant(
+        file_id=apk_file.id,
+        key=apk_file.stored_path,
+        sha256=apk_file.sha256,
+        size=apk_file.file_size,
+        filename=apk_file.original_filename,
+        app_type_id=app_type_id,
+        version=version,
+    )
+
+
+def _signing_key() -> bytes:
+    return hmac.new(settings.secret_key.encode(), b"download-token", hashlib.sha256).digest()
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(value: str) -> bytes:
+    return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+
+
+def sign_download(grant: DownloadGrant, expires_at: int | None = None, nonce: str | None = None) -> str:
+    if expires_at is None:
+        expires_at = int(time.time()) + settings.download_token_ttl_seconds
+    values = [*astuple(grant), expires_at] if nonce is None else [*astuple(grant), expires_at, nonce]
+    payload = _b64encode(json.dumps(values, separators=(",", ":")).encode())
+    signature = _b64encode(hmac.new(_signing_key(), payload.encode(), hashlib.sha256).digest())
+    return f"{payload}.{signature}"
+
+
+def _verify(token: str, now: float | None) -> tuple[DownloadGrant, str | None]:
+    payload, _, signature = token.partition(".")
+    expected = _b64encode(hmac.new(_signing_key(), payload.encode(), hashlib.sha256).digest())
+    if not signature or not hmac.compare_digest(signature, expected):
+        raise TokenError("Invalid download token", 403)
+    try:
+        values = json.loads(_b64decode(payload))
+        grant = DownloadGrant(*values[:GRANT_FIELDS])
+        expires_at, *nonce = values[GRANT_FIELDS:]
+    except (ValueError, TypeError):
+        raise TokenError("Invalid download token", 403) from None
+    if expires_at < (time.time() if now is None else now):
+        raise TokenError("Download link has expired", 410)
+    return grant, nonce[0] if nonce else None
+
+
+def verify_download(token: str, now: float | None = None) -> DownloadGrant:
+    return _verify(token, now)[0]
+
+
+def verify_ping(token: str, now: float | None = None) -> tuple[DownloadGrant, str]:
+    # Every rendered ping link carries its own nonce; tokens signed without one
+    # fall back to their signature so a replay still maps to the same id.
+    grant, nonce = _verify(token, now)
+    return grant, nonce or token.rpartition(".")[2][:PING_ID_LENGTH]
+
+
+def download_url(grant: DownloadGrant | None) -> str | None:
+    if grant is None:
+        return None
+    return f"/d/{sign_download(grant)}"
+
+
+def blob_url(grant: DownloadGrant) -> str:
+    return f"/blobs/{grant.sha256}/{quote(grant.filename)}"
+
+
+def ping_url(grant: DownloadGrant) -> str:
+    return f"/ping/{sign_download(grant, nonce=secrets.token_urlsafe(PING_NONCE_BYTES))}"
+
+
+def _revocation_cutoff() -> datetime:
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return now - timedelta(seconds=settings.download_token_ttl_seconds)
+
+
+def revoke_files(db: Session, file_ids: Iterable[int]) -> None:
+    file_ids = set(file_ids)
+    if not file_ids:
+        return
+    # Entries older than the token TTL can no longer match a valid token.
+    db.query(RevokedFile).filter(RevokedFile.revoked_at < _revocation_cutoff()).delete()
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    for file_id in file_ids:
+        db.merge(RevokedFile(apk_file_id=file_id, revoked_at=now))
+    bump_generation(db, REVOCATIONS)
+
+
+def _load_revoked(db: Session) -> frozenset[int]:
+    rows = db.query(RevokedFile.apk_file_id).filter(RevokedFile.revoked_at >= _revocation_cutoff())
+    return frozenset(file_id for (file_id,) in rows)
+
+
+revoked_files = GenerationCache(REVOCATIONS, _load_revoked)
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .models import SpoolIngest
+from .utils import ensure_dir, insert_download_logs
+
+
+SPOOL_PREFIX = "downloads-"
+MINUTE_FORMAT = "%Y%m%d%H%M"
+# Spool file names embed the minute they were written in, so a ledger entry
+# only has to outlive the crash it guards against.
+LEDGER_RETENTION = timedelta(days=7)
+
+
+def spool_dir() -> Path:
+    return settings.tmp_root / "spool"
+
+
+def spool_download_logs(rows: list[dict], *, now: datetime | None = None) -> None:
+    now = now or datetime.now(timezone.utc)
+    target_dir = spool_dir()
+    ensure_dir(target_dir)
+    path = target_dir / f"{SPOOL_PREFIX}{now.strftime(MINUTE_FORMAT)}-{os.getpid()}.jsonl"
+    lines = [
+        json.dumps({**row, "created_at": row["created_at"].isoformat(sep=" ")}, ensure_ascii=False) + "\n"
+        for row in rows
+    ]
+    with path.open("a", encoding="utf-8") as fp:
+        fp.write("".join(lines))
+
+
+def spool_download_log(
+    *,
+    apk_file_id: int,
+    app_type_id: int,
+    version: str,
+    ip: str | None,
+    user_agent: str | None,
+) -> None:
+    spool_download_logs(
+        [
+            {
+                "apk_file_id": apk_file_id,
+                "app_type_id": app_type_id,
+                "version": version,
+                "ip": ip,
+                "user_agent": user_agent,
+                "created_at": datetime.now(timezone.utc).replace(tzinfo=None),
+            }
+        ]
+    )
+
+
+def ingest_download_spool(db: Session, *, now: datetime | None = None, batch_size: int = 5000) -> int:
+    source_dir = spool_dir()
+    if not source_dir.exists():
+        return 0
+
+    # Files of the current minute may still be appended to by running workers.
+    now = now or datetime.now(timezone.utc)
+    current_minute = now.strftime(MINUTE_FORMAT)
+    ingested = 0
+    for path in sorted(source_dir.glob(f"{SPOOL_PREFIX}*.jsonl")):
+        if path.name[len(SPOOL_PREFIX) :].split("-")[0] >= current_minute:
+            continue
+        # The ledger row commits with the log rows, so a crash before the
+        # unlink leaves a file that is recognised and removed next time.
+        if db.get(SpoolIngest, path.name) is None:
+            rows = []
+            with path.open(encoding="utf-8") as fp:
+                for line in fp:
+                    if not line.strip():
+                        continue
+                    row = json.loads(line)
+                    row["created_at"] = datetime.fromisoformat(row["created_at"])
+                    rows.append(row)
+            for start in range(0, len(rows), batch_size):
+                insert_download_logs(db, rows[start : start + batch_size])
+            db.add(SpoolIngest(name=path.name, rows=len(rows)))
+            db.commit()
+            ingested += len(rows)
+        path.unlink()
+
+    cutoff = now.replace(tzinfo=None) - LEDGER_RETENTION
+    db.execute(delete(SpoolIngest).where(SpoolIngest.ingested_at < cutoff))
+    db.commit()
+    return ingested
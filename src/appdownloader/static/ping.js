@@ -0,0 +1,8 @@
+document.addEventListener("click", function (event) {
+  var link = event.target.closest && event.target.closest("a[data-ping]");
+  if (!link) return;
+  var url = link.getAttribute("data-ping");
+  if (!(navigator.sendBeacon && navigator.sendBeacon(url))) {
+    fetch(url, { method: "POST", keepalive: true }).catch(function () {});
+  }
+});
@@ -0,0 +1,559 @@
+from __future__ import annotations
+
+import hashlib
+import hmac
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO
+from urllib.parse import quote, urlsplit
+
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .models import ApkFile, ApkVersion
+from .tracing import span, traced_iter
+from .utils import ensure_dir
+
+if TYPE_CHECKING:
+    import httpx
+
+
+CHUNK_SIZE = 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+class StorageError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class BlobStat:
+    key: str
+    size: int
+    mtime: float | None = None
+
+
+def blob_key(sha256: str) -> str:
+    return f"{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+
+def legacy_path(key: str) -> Path | None:
+    path = Path(key)
+    return path if path.is_absolute() else None
+
+
+def _iter_file(path: Path, start: int = 0, end: int | None = None) -> Iterator[bytes]:
+    with path.open("rb") as fp:
+        fp.seek(start)
+        remaining = None if end is None else end - start
+        while remaining is None or remaining > 0:
+            chunk = fp.read(CHUNK_SIZE if remaining is None else min(CHUNK_SIZE, remaining))
+            if not chunk:
+                return
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+
+
+def _stat_path(key: str, path: Path) -> BlobStat | None:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return BlobStat(key=key, size=st.st_size, mtime=st.st_mtime)
+
+
+class StorageBackend:
+    def put(self, key: str, source: BinaryIO, size: int | None = None) -> BlobStat:
+        raise NotImplementedError
+
+    def put_file(self, key: str, path: Path) -> BlobStat:
+        with path.open("rb") as fp:
+            return self.put(key, fp, path.stat().st_size)
+
+    def get(self, key: str) -> Iterator[bytes]:
+        return self.open_range(key, 0, None)
+
+    def open_range(self, key: str, start: int, end: int | None) -> Iterator[bytes]:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def stat(self, key: str) -> BlobStat | None:
+        raise NotImplementedError
+
+    def exists(self, key: str) -> bool:
+        return self.stat(key) is not None
+
+    def local_path(self, key: str) -> Path | None:
+        return legacy_path(key)
+
+    def fetch(self, key: str) -> Path | None:
+        return self.local_path(key)
+
+
+class LocalStorage(StorageBackend):
+    def __init__(self, root: Path):
+        self.root = root
+
+    def path_for(self, key: str) -> Path:
+        legacy = legacy_path(key)
+        if legacy:
+            return legacy
+        path = (self.root / key).resolve()
+        if self.root.resolve() not in path.parents:
+            raise StorageError(f"invalid storage key: {key}")
+        return path
+
+    def put(self, key: str, source: BinaryIO, size: int | None = None) -> BlobStat:
+        target = self.path_for(key)
+        ensure_dir(target.parent)
+        tmp_path = target.with_name(f".{target.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            with tmp_path.open("wb") as out:
+                for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+                    out.write(chunk)
+            os.replace(tmp_path, target)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+        return _stat_path(key, target)
+
+    def put_file(self, key: str, path: Path) -> BlobStat:
+        target = self.path_for(key)
+        if target.exists() and target.stat().st_size == path.stat().st_size:
+            return _stat_path(key, target)
+        return super().put_file(key, path)
+
+    def open_range(self, key: str, start: int, end: int | None) -> Iterator[bytes]:
+        path = self.path_for(key)
+        if not path.is_file():
+            raise StorageError(f"blob not found: {key}")
+        return _iter_file(path, start, end)
+
+    def delete(self, key: str) -> None:
+        self.path_for(key).unlink(missing_ok=True)
+
+    def stat(self, key: str) -> BlobStat | None:
+        return _stat_path(key, self.path_for(key))
+
+    def local_path(self, key: str) -> Path | None:
+        path = self.path_for(key)
+        return path if path.is_file() else None
+
+
+class S3Storage(StorageBackend):
+    def __init__(
+        self,
+        endpoint_url: str,
+        bucket: str,
+        access_key: str,
+        secret_key: str,
+        region: str = "us-east-1",
+        client: httpx.Client | None = None,
+    ):
+        self.endpoint_url = endpoint_url.rstrip("/")
+        self.bucket = bucket
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        if client is None:
+            import httpx
+
+            client = httpx.Client(timeout=httpx.Timeout(30.0, read=300.0))
+        self.client = client
+
+    def _url_path(self, key: str) -> str:
+        return quote(f"/{self.bucket}/{key}", safe="/-_.~")
+
+    def _signed_headers(self, method: str, url_path: str, extra: dict[str, str] | None = None) -> dict[str, str]:
+        now = datetime.now(timezone.utc)
+        amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+        datestamp = now.strftime("%Y%m%d")
+        host = urlsplit(self.endpoint_url).netloc
+        headers = {
+            "host": host,
+            "x-amz-content-sha256": "UNSIGNED-PAYLOAD",
+            "x-amz-date": amz_date,
+        }
+        signed = sorted(headers)
+        canonical_request = "\n".join(
+            [
+                method,
+                url_path,
+                "",
+                "".join(f"{name}:{headers[name]}\n" for name in signed),
+                ";".join(signed),
+                "UNSIGNED-PAYLOAD",
+            ]
+        )
+        scope = f"{datestamp}/{self.region}/s3/aws4_request"
+        string_to_sign = "\n".join(
+            ["AWS4-HMAC-SHA256", amz_date, scope, hashlib.sha256(canonical_request.encode()).hexdigest()]
+        )
+        signing_key = f"AWS4{self.secret_key}".encode()
+        for part in (datestamp, self.region, "s3", "aws4_request"):
+            signing_key = hmac.new(signing_key, part.encode(), hashlib.sha256).digest()
+        signature = hmac.new(signing_key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+        headers["authorization"] = (
+            f"AWS4-HMAC-SHA256 Credential={self.access_key}/{scope}, "
+            f"SignedHeaders={';'.join(signed)}, Signature={signature}"
+        )
+        headers.update(extra or {})
+        return headers
+
+    def _request(self, method: str, key: str, **kwargs) -> httpx.Response:
+        url_path = self._url_path(key)
+        headers = self._signed_headers(method, url_path, kwargs.pop("headers", None))
+        return self.client.request(method, self.endpoint_url + url_path, headers=headers, **kwargs)
+
+    def put(self, key: str, source: BinaryIO, size: int | None = None) -> BlobStat:
+        if legacy_path(key):
+            raise StorageError("cannot write legacy absolute paths to object storage")
+        if size is None:
+            size = os.fstat(source.fileno()).st_size
+        body = iter(lambda: source.read(CHUNK_SIZE), b"")
+        response = self._request("PUT", key, content=body, headers={"content-length": str(size)})
+        if response.status_code >= 300:
+            raise StorageError(f"PUT {key} failed: {response.status_code}")
+        return BlobStat(key=key, size=size)
+
+    def open_range(self, key: str, start: int, end: int | None) -> Iterator[bytes]:
+        legacy = legacy_path(key)
+        if legacy:
+            return _iter_file(legacy, start, end)
+        return self._stream(key, start, end)
+
+    def _stream(self, key: str, start: int, end: int | None) -> Iterator[bytes]:
+        headers = {}
+        if start or end is not None:
+            headers["range"] = f"bytes={start}-{'' if end is None else end - 1}"
+        url_path = self._url_path(key)
+        request_headers = self._signed_headers("GET", url_path, headers)
+        with self.client.stream("GET", self.endpoint_url + url_path, headers=request_headers) as response:
+            if response.status_code not in (200, 206):
+                raise StorageError(f"GET {key} failed: {response.status_code}")
+            yield from response.iter_bytes(CHUNK_SIZE)
+
+    def delete(self, key: str) -> None:
+        legacy = legacy_path(key)
+        if legacy:
+            legacy.unlink(missing_ok=True)
+            return
+        response = self._request("DELETE", key)
+        if response.status_code >= 300 and response.status_code != 404:
+            raise StorageError(f"DELETE {key} failed: {response.status_code}")
+
+    def stat(self, key: str) -> BlobStat | None:
+        legacy = legacy_path(key)
+        if legacy:
+            return _stat_path(key, legacy)
+        response = self._request("HEAD", key)
+        if response.status_code == 404:
+            return None
+        if response.status_code >= 300:
+            raise StorageError(f"HEAD {key} failed: {response.status_code}")
+        return BlobStat(key=key, size=int(response.headers.get("content-length", 0)))
+
+
+class CachedStorage(StorageBackend):
+    # Request handlers never wait for the remote: a miss streams straight from
+    # the backend while a background thread fills the cache. Evicted files are
+    # renamed aside and unlinked after EVICTION_GRACE_SECONDS so responses that
+    # already resolved the path can still open and stream them.
+    EVICTION_GRACE_SECONDS = 60.0
+    FILL_WORKERS = 2
+
+    def __init__(self, backend: StorageBackend, cache_dir: Path, max_bytes: int):
+        self.backend = backend
+        self.cache = LocalStorage(cache_dir)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, int] = OrderedDict()
+        self._total = 0
+        self._filling: dict[str, threading.Event] = {}
+        self._retired: list[tuple[float, Path]] = []
+        self._pool: ThreadPoolExecutor | None = None
+        self._load_existing(cache_dir)
+
+    def _load_existing(self, cache_dir: Path) -> None:
+        if not cache_dir.exists():
+            return
+        files = []
+        for path in cache_dir.rglob("*"):
+            if not path.is_file():
+                continue
+            if path.name.startswith("."):
+                if path.name.endswith(".evicted"):
+                    self._retired.append((0.0, path))
+                continue
+            files.append(path)
+        for path in sorted(files, key=lambda p: p.stat().st_atime):
+            size = path.stat().st_size
+            self._entries[path.relative_to(cache_dir).as_posix()] = size
+            self._total += size
+        self._evict()
+
+    def _touch(self, key: str, size: int) -> None:
+        with self._lock:
+            known = key in self._entries
+            if known:
+                self._entries.move_to_end(key)
+            else:
+                self._entries[key] = size
+                self._total += size
+        if known:
+            self._purge_retired()
+        else:
+            self._evict()
+
+    def _retire(self, key: str) -> bool:
+        path = self.cache.path_for(key)
+        retired = path.with_name(f".{path.name}.{uuid.uuid4().hex}.evicted")
+        try:
+            os.replace(path, retired)
+        except FileNotFoundError:
+            return True
+        except OSError:
+            # Windows refuses to rename a file that is open for a response.
+            return False
+        self._retired.append((time.monotonic() + self.EVICTION_GRACE_SECONDS, retired))
+        return True
+
+    def _purge_retired(self) -> None:
+        if not self._retired:
+            return
+        now = time.monotonic()
+        with self._lock:
+            due = [path for at, path in self._retired if at <= now]
+            self._retired = [(at, path) for at, path in self._retired if at > now]
+        for path in due:
+            try:
+                path.unlink(missing_ok=True)
+            except OSError:
+                with self._lock:
+                    self._retired.append((now + self.EVICTION_GRACE_SECONDS, path))
+
+    def _evict(self) -> None:
+        with self._lock:
+            victims = []
+            while self._total > self.max_bytes and len(self._entries) > 1:
+                key, size = self._entries.popitem(last=False)
+                self._total -= size
+                victims.append((key, size))
+        busy = [(key, size) for key, size in victims if not self._retire(key)]
+        if busy:
+            with self._lock:
+                for key, size in busy:
+                    self._entries[key] = size
+                    self._entries.move_to_end(key, last=False)
+                    self._total += size
+        self._purge_retired()
+
+    def _forget(self, key: str) -> None:
+        with self._lock:
+            size = self._entries.pop(key, None)
+            if size is not None:
+                self._total -= size
+
+    @property
+    def cached_bytes(self) -> int:
+        return self._total
+
+    def put(self, key: str, source: BinaryIO, size: int | None = None) -> BlobStat:
+        return self.backend.put(key, source, size)
+
+    def put_file(self, key: str, path: Path) -> BlobStat:
+        return self.backend.put_file(key, path)
+
+    def _cached(self, key: str) -> Path | None:
+        direct = self.backend.local_path(key)
+        if direct:
+            return direct
+        cached = self.cache.local_path(key)
+        if cached is not None:
+            self._touch(key, cached.stat().st_size)
+        return cached
+
+    def local_path(self, key: str) -> Path | None:
+        cached = self._cached(key)
+        if cached is None:
+            self.prefetch(key)
+        return cached
+
+    def prefetch(self, key: str) -> None:
+        with self._lock:
+            if key in self._filling:
+                return
+            self._filling[key] = threading.Event()
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.FILL_WORKERS, thread_name_prefix="storage-cache")
+            pool = self._pool
+        pool.submit(self._fill_logged, key)
+
+    def _fill_logged(self, key: str) -> None:
+        try:
+            self._fill(key)
+        except Exception:
+            logger.exception("failed to cache %s", key)
+
+    def _fill(self, key: str) -> Path:
+        try:
+            cached = self.cache.local_path(key)
+            if cached is None:
+                target = self.cache.path_for(key)
+                ensure_dir(target.parent)
+                tmp_path = target.with_name(f".{target.name}.{uuid.uuid4().hex}.tmp")
+                try:
+                    with tmp_path.open("wb") as out:
+                        for chunk in self.backend.get(key):
+                            out.write(chunk)
+                    os.replace(tmp_path, target)
+                finally:
+                    tmp_path.unlink(missing_ok=True)
+                cached = target
+            self._touch(key, cached.stat().st_size)
+            return cached
+        finally:
+            with self._lock:
+                done = self._filling.pop(key, None)
+            if done is not None:
+                done.set()
+
+    def fetch(self, key: str) -> Path | None:
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+        with self._lock:
+            pending = self._filling.get(key)
+            if pending is None:
+                self._filling[key] = threading.Event()
+        if pending is not None:
+            pending.wait()
+            return self._cached(key)
+        return self._fill(key)
+
+    def open_range(self, key: str, start: int, end: int | None) -> Iterator[bytes]:
+        path = self.local_path(key)
+        if path is None:
+            return self.backend.open_range(key, start, end)
+        return _iter_file(path, start, end)
+
+    def delete(self, key: str) -> None:
+        self._forget(key)
+        self.cache.delete(key)
+        self.backend.delete(key)
+
+    def stat(self, key: str) -> BlobStat | None:
+        cached = self._cached(key)
+        if cached is not None:
+            return _stat_path(key, cached)
+        return self.backend.stat(key)
+
+    def exists(self, key: str) -> bool:
+        return self._cached(key) is not None or self.backend.exists(key)
+
+
+class TracedStorage(StorageBackend):
+    def __init__(self, backend: StorageBackend):
+        self.backend = backend
+
+    def put(self, key: str, source: BinaryIO, size: int | None = None) -> BlobStat:
+        with span("storage.put", "file", key=key):
+            return self.backend.put(key, source, size)
+
+    def put_file(self, key: str, path: Path) -> BlobStat:
+        with span("storage.put_file", "file", key=key):
+            return self.backend.put_file(key, path)
+
+    def get(self, key: str) -> Iterator[bytes]:
+        return traced_iter(self.backend.get(key), "storage.open", "file", key=key)
+
+    def open_range(self, key: str, start: int, end: int | None) -> Iterator[bytes]:
+        chunks = self.backend.open_range(key, start, end)
+        return traced_iter(chunks, "storage.open_range", "file", key=key, start=start, end=end)
+
+    def delete(self, key: str) -> None:
+        with span("storage.delete", "file", key=key):
+            self.backend.delete(key)
+
+    def stat(self, key: str) -> BlobStat | None:
+        with span("storage.stat", "file", key=key):
+            return self.backend.stat(key)
+
+    def exists(self, key: str) -> bool:
+        with span("storage.exists", "file", key=key):
+            return self.backend.exists(key)
+
+    def local_path(self, key: str) -> Path | None:
+        with span("storage.local_path", "file", key=key):
+            return self.backend.local_path(key)
+
+    def fetch(self, key: str) -> Path | None:
+        with span("storage.fetch", "file", key=key):
+            return self.backend.fetch(key)
+
+
+def build_storage() -> StorageBackend:
+    if settings.storage_backend == "s3":
+        backend: StorageBackend = S3Storage(
+            settings.s3_endpoint_url,
+            settings.s3_bucket,
+            settings.s3_access_key,
+            settings.s3_secret_key,
+            settings.s3_region,
+        )
+    elif settings.storage_backend == "local":
+        backend = LocalStorage(settings.files_root)
+    else:
+        raise StorageError(f"unknown STORAGE_BACKEND: {settings.storage_backend}")
+
+    if settings.storage_cache_dir:
+        backend = CachedStorage(backend, settings.storage_cache_dir, settings.storage_cache_max_bytes)
+    if settings.trace_sample_rate > 0:
+        backend = TracedStorage(backend)
+    return backend
+
+
+@lru_cache(maxsize=1)
+def get_storage() -> StorageBackend:
+    return build_storage()
+
+
+def store_upload(storage: StorageBackend, source: BinaryIO, sha256: str, size: int | None = None) -> str:
+    key = blob_key(sha256)
+    if not storage.exists(key):
+        storage.put(key, source, size)
+    return key
+
+
+def remove_apk_version_files(db: Session, version: ApkVersion) -> tuple[int, int]:
+    storage = get_storage()
+    removed = 0
+    failed = 0
+    for key in dict.fromkeys(f.stored_path for f in version.files):
+        shared = (
+            db.query(ApkFile.id)
+            .filter(ApkFile.stored_path == key, ApkFile.apk_version_id != version.id)
+            .first()
+        )
+        if shared:
+            continue
+        try:
+            storage.delete(key)
+            removed += 1
+        except (OSError, StorageError):
+            failed += 1
+
+    return removed, failed
@@ -0,0 +1,297 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import json
+import logging
+import queue
+import random
+import threading
+import time
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+
+from jinja2 import Template
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .config import settings
+
+
+logger = logging.getLogger(__name__)
+
+TRACE_FILE = "traces.jsonl"
+MAX_STATEMENT_LENGTH = 300
+
+_current_trace: ContextVar[Trace | None] = ContextVar("appdownloader_trace", default=None)
+_current_span: ContextVar[int | None] = ContextVar("appdownloader_span", default=None)
+
+
+@dataclass
+class Trace:
+    name: str
+    trace_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    started_at: str = field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+    origin: float = field(default_factory=time.perf_counter)
+    spans: list[dict] = field(default_factory=list)
+    _ids: Iterator[int] = field(default_factory=lambda: itertools.count(1))
+
+    def next_id(self) -> int:
+        return next(self._ids)
+
+    def record(self, span_id: int, parent_id: int | None, name: str, kind: str, start: float, end: float, attrs: dict):
+        self.spans.append(
+            {
+                "id": span_id,
+                "parent": parent_id,
+                "name": name,
+                "kind": kind,
+                "start_ms": round((start - self.origin) * 1000, 3),
+                "duration_ms": round((end - start) * 1000, 3),
+                **({"attrs": attrs} if attrs else {}),
+            }
+        )
+
+    def to_dict(self, duration_ms: float, status: int | None) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration_ms": round(duration_ms, 3),
+            "status": status,
+            "spans": sorted(self.spans, key=lambda item: (item["start_ms"], item["id"])),
+        }
+
+
+def current_trace() -> Trace | None:
+    return _current_trace.get()
+
+
+@contextmanager
+def span(name: str, kind: str = "internal", **attrs):
+    trace = _current_trace.get()
+    if trace is None:
+        yield attrs
+        return
+    span_id = trace.next_id()
+    parent_id = _current_span.get()
+    token = _current_span.set(span_id)
+    start = time.perf_counter()
+    try:
+        yield attrs
+    finally:
+        end = time.perf_counter()
+        _current_span.reset(token)
+        trace.record(span_id, parent_id, name, kind, start, end, attrs)
+
+
+def traced_iter(chunks: Iterator[bytes], name: str, kind: str = "internal", **attrs) -> Iterator[bytes]:
+    # Streams are consumed after the call that created them returns (often on
+    # another thread), so the span is bound to the trace now and closed when
+    # the last chunk has been read.
+    trace = _current_trace.get()
+    if trace is None:
+        return chunks
+    return _traced_chunks(trace, _current_span.get(), chunks, name, kind, attrs)
+
+
+def _traced_chunks(
+    trace: Trace, parent_id: int | None, chunks: Iterator[bytes], name: str, kind: str, attrs: dict
+) -> Iterator[bytes]:
+    span_id = trace.next_id()
+    start = time.perf_counter()
+    size = 0
+    try:
+        for chunk in chunks:
+            size += len(chunk)
+            yield chunk
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+        trace.record(span_id, parent_id, name, kind, start, time.perf_counter(), {**attrs, "bytes": size})
+
+
+def _before_cursor_execute(_conn, _cursor, statement, _parameters, context, executemany):
+    trace = _current_trace.get()
+    if trace is not None and context is not None:
+        context._trace_start = (trace, _current_span.get(), time.perf_counter())
+
+
+def _after_cursor_execute(_conn, _cursor, statement, _parameters, context, executemany):
+    started = getattr(context, "_trace_start", None)
+    if started is None:
+        return
+    trace, parent_id, start = started
+    attrs = {"statement": statement[:MAX_STATEMENT_LENGTH]}
+    if executemany:
+        attrs["executemany"] = True
+    trace.record(trace.next_id(), parent_id, statement.split(None, 1)[0].upper(), "sql", start, time.perf_counter(), attrs)
+
+
+def instrument_engine(engine: Engine) -> None:
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class TracedTemplate(Template):
+    def render(self, *args, **kwargs) -> str:
+        with span(f"render {self.name}", "template"):
+            return super().render(*args, **kwargs)
+
+
+class JsonlExporter:
+    def __init__(self, directory: Path | None = None, max_bytes: int | None = None, backups: int | None = None):
+        self.directory = settings.trace_dir if directory is None else directory
+        self.max_bytes = settings.trace_max_bytes if max_bytes is None else max_bytes
+        self.backups = settings.trace_backups if backups is None else backups
+        self._queue: queue.SimpleQueue[dict] = queue.SimpleQueue()
+        self._start_lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._pending = 0
+        self._done = threading.Condition()
+
+    def submit(self, record: dict) -> None:
+        with self._done:
+            self._pending += 1
+        self._queue.put(record)
+        if self._thread is None:
+            self._start()
+
+    def _start(self) -> None:
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            record = self._queue.get()
+            try:
+                self.write(record)
+            except Exception:
+                logger.exception("failed to export trace")
+            finally:
+                with self._done:
+                    self._pending -= 1
+                    self._done.notify_all()
+
+    def files(self) -> list[Path]:
+        names = [TRACE_FILE] + [f"traces.{i}.jsonl" for i in range(1, self.backups + 1)]
+        return [self.directory / name for name in names if (self.directory / name).exists()]
+
+    def _rotate(self) -> None:
+        for index in range(self.backups - 1, 0, -1):
+            source = self.directory / f"traces.{index}.jsonl"
+            if source.exists():
+                source.replace(self.directory / f"traces.{index + 1}.jsonl")
+        current = self.directory / TRACE_FILE
+        if self.backups > 0:
+            current.replace(self.directory / "traces.1.jsonl")
+        else:
+            current.unlink(missing_ok=True)
+
+    def write(self, record: dict) -> None:
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / TRACE_FILE
+        if path.exists() and path.stat().st_size + len(line) > self.max_bytes:
+            self._rotate()
+        with path.open("a", encoding="utf-8") as fp:
+            fp.write(line)
+
+    def flush(self, timeout: float = 5.0) -> None:
+        with self._done:
+            self._done.wait_for(lambda: self._pending <= 0, timeout)
+
+    def slowest(self, limit: int = 20) -> list[dict]:
+        def iter_records():
+            for path in self.files():
+                with path.open(encoding="utf-8") as fp:
+                    for line in fp:
+                        try:
+                            yield json.loads(line)
+                        except ValueError:
+                            continue
+
+        return heapq.nlargest(limit, iter_records(), key=lambda record: record.get("duration_ms", 0))
+
+
+trace_exporter = JsonlExporter()
+
+
+def waterfall(record: dict) -> list[dict]:
+    total = max(record.get("duration_ms") or 0, 0.001)
+    spans = record.get("spans", [])
+    depth = {None: -1}
+    children: dict[int | None, list[dict]] = {}
+    for item in spans:
+        children.setdefault(item.get("parent"), []).append(item)
+
+    rows = []
+
+    def visit(parent_id: int | None) -> None:
+        for item in children.get(parent_id, []):
+            depth[item["id"]] = depth.get(parent_id, -1) + 1
+            rows.append(
+                {
+                    **item,
+                    "depth": depth[item["id"]],
+                    "offset_pct": round(min(item["start_ms"] / total, 1) * 100, 2),
+                    "width_pct": round(max(min(item["duration_ms"] / total, 1) * 100, 0.3), 2),
+                }
+            )
+            visit(item["id"])
+
+    visit(None)
+    known = {item["id"] for item in spans}
+    for item in spans:
+        if item.get("parent") is not None and item["parent"] not in known:
+            rows.append({**item, "depth": 0, "offset_pct": 0, "width_pct": 0.3})
+    return rows
+
+
+class TracingMiddleware:
+    def __init__(self, app, *, sample_rate: float | None = None, exporter: JsonlExporter | None = None):
+        self.app = app
+        self.sample_rate = settings.trace_sample_rate if sample_rate is None else sample_rate
+        self.exporter = trace_exporter if exporter is None else exporter
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace(name=f"{scope['method']} {scope['path']}")
+        trace_token = _current_trace.set(trace)
+        span_token = _current_span.set(0)
+        status: int | None = None
+        first_byte: float | None = None
+
+        async def traced_send(message) -> None:
+            nonlocal status, first_byte
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                first_byte = time.perf_counter()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, traced_send)
+        finally:
+            end = time.perf_counter()
+            _current_span.reset(span_token)
+            _current_trace.reset(trace_token)
+            route = getattr(scope.get("route"), "path", None)
+            attrs = {"path": scope["path"], "status": status}
+            if route:
+                attrs["route"] = route
+                trace.name = f"{scope['method']} {route}"
+            if first_byte is not None:
+                attrs["first_byte_ms"] = round((first_byte - trace.origin) * 1000, 3)
+            trace.record(0, None, trace.name, "route", trace.origin, end, attrs)
+            self.exporter.submit(trace.to_dict((end - trace.origin) * 1000, status))
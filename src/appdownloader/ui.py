@@ -1,5 +1,13 @@
 from fastapi.templating import Jinja2Templates
 
+from .assets import asset_url
 from .config import settings
+from .signing import blob_url, ping_url
+from .tracing import TracedTemplate
 
 templates = Jinja2Templates(directory=str(settings.templates_dir))
+templates.env.template_class = TracedTemplate
+templates.env.globals["edge_mode"] = settings.edge_mode
+templates.env.globals["asset_url"] = asset_url
+templates.env.globals["blob_url"] = blob_url
+templates.env.globals["ping_url"] = ping_url
@@ -2,15 +2,20 @@ from __future__ import annotations
 
 import hashlib
 import re
+import zlib
+from dataclasses import dataclass
 from pathlib import Path
+from typing import BinaryIO
 
 from fastapi import Request
+from sqlalchemy.dialects.sqlite import insert
 from sqlalchemy.orm import Session
 
-from .models import AuditLog, DownloadLog
+from .models import DownloadLog
 
 
 SLUG_RE = re.compile(r"[^a-z0-9]+")
+DIGEST_CHUNK_SIZE = 1024 * 1024
 
 
 def slugify_name(value: str) -> str:
@@ -19,8 +24,26 @@ def slugify_name(value: str) -> str:
     return base or "app"
 
 
-def sha256_bytes(data: bytes) -> str:
-    return hashlib.sha256(data).hexdigest()
+@dataclass(frozen=True)
+class StreamDigest:
+    size: int
+    sha256: str
+    crc32: int
+    header: bytes
+
+
+def digest_stream(source: BinaryIO, chunk_size: int = DIGEST_CHUNK_SIZE) -> StreamDigest:
+    digest = hashlib.sha256()
+    crc32 = 0
+    size = 0
+    header = b""
+    for chunk in iter(lambda: source.read(chunk_size), b""):
+        if len(header) < 4:
+            header += chunk[: 4 - len(header)]
+        digest.update(chunk)
+        crc32 = zlib.crc32(chunk, crc32)
+        size += len(chunk)
+    return StreamDigest(size=size, sha256=digest.hexdigest(), crc32=crc32, header=header)
 
 
 def get_client_ip(request: Request) -> str | None:
@@ -32,31 +55,6 @@ def get_client_ip(request: Request) -> str | None:
     return None
 
 
-def write_audit_log(
-    db: Session,
-    *,
-    actor_type: str,
-    actor_id: int | None,
-    action: str,
-    target_type: str,
-    target_id: int | None,
-    ip: str | None,
-    user_agent: str | None,
-) -> None:
-    db.add(
-        AuditLog(
-            actor_type=actor_type,
-            actor_id=actor_id,
-            action=action,
-            target_type=target_type,
-            target_id=target_id,
-            ip=ip,
-            user_agent=user_agent,
-        )
-    )
-    db.commit()
-
-
 def write_download_log(
     db: Session,
     *,
@@ -78,5 +76,20 @@ def write_download_log(
     db.commit()
 
 
+def insert_download_logs(db: Session, rows: list[dict]) -> None:
+    # A replayed ping carries the ping_id of an existing row and is dropped here.
+    statement = insert(DownloadLog).on_conflict_do_nothing(
+        index_elements=[DownloadLog.ping_id],
+        index_where=DownloadLog.ping_id.is_not(None),
+    )
+    db.execute(statement, [{"ping_id": None, **row} for row in rows])
+
+
+def write_download_logs(db: Session, rows: list[dict]) -> None:
+    if rows:
+        insert_download_logs(db, rows)
+        db.commit()
+
+
 def ensure_dir(path: Path) -> None:
     path.mkdir(parents=True, exist_ok=True)
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import re
+
+
+# Numbers are written as a two-digit length followed by the digits, so runs of
+# any length up to MAX_DIGITS sort by value; longer runs are clamped.
+LENGTH_WIDTH = 2
+MAX_DIGITS = 10**LENGTH_WIDTH - 1
+# Within one core prefix: pre-release ("!") < release ("-") < longer core (".").
+PRERELEASE_MARK = "!"
+RELEASE_MARK = "-"
+SEGMENT_SEPARATOR = "."
+
+_TOKEN = re.compile(r"\d+|[^\d]+")
+
+
+def _number(digits: str) -> str:
+    digits = (digits.lstrip("0") or "0")[:MAX_DIGITS]
+    return f"{len(digits):0{LENGTH_WIDTH}d}{digits}"
+
+
+def _segment(text: str) -> str:
+    return "".join(_number(token) if token.isdigit() else token.lower() for token in _TOKEN.findall(text))
+
+
+def version_key(version: str) -> str:
+    value = version.strip()
+    if value[:1] in ("v", "V") and value[1:2].isdigit():
+        value = value[1:]
+    value = value.split("+", 1)[0]
+    core, _sep, prerelease = value.partition("-")
+
+    segments = [_segment(part) for part in core.split(".") if part]
+    while len(segments) > 1 and segments[-1] == _number("0"):
+        segments.pop()
+    key = SEGMENT_SEPARATOR.join(segments)
+    if prerelease:
+        identifiers = [_segment(part) for part in re.split(r"[.\-_]", prerelease) if part]
+        return key + PRERELEASE_MARK + SEGMENT_SEPARATOR.join(identifiers)
+    return key + RELEASE_MARK
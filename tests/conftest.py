@@ -13,12 +13,14 @@ def app_ctx(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
     data_dir = tmp_path / "data"
     files_dir = data_dir / "apk"
     tmp_dir = data_dir / "tmp"
+    archive_dir = data_dir / "archive"
 
     monkeypatch.setenv("APP_NAME", "Test APK Hub")
     monkeypatch.setenv("APP_SECRET_KEY", "test-secret-key")
     monkeypatch.setenv("DATABASE_URL", f"sqlite:///{(data_dir / 'app.db').as_posix()}")
     monkeypatch.setenv("FILES_ROOT", files_dir.as_posix())
     monkeypatch.setenv("TMP_ROOT", tmp_dir.as_posix())
+    monkeypatch.setenv("ARCHIVE_ROOT", archive_dir.as_posix())
     monkeypatch.setenv("AUTO_BOOTSTRAP_ADMIN", "true")
     monkeypatch.setenv("ADMIN_USERNAME", "admin")
     monkeypatch.setenv("ADMIN_PASSWORD", "admin1234")
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
+import importlib
 import re
-from pathlib import Path
 
 
 def test_admin_login_and_guard(app_ctx):
@@ -230,4 +230,5 @@ def test_delete_uploaded_version_flow(app_ctx):
     finally:
         db.close()
 
-    assert not Path(stored_path).exists()
+    config = importlib.import_module("appdownloader.config")
+    assert not (config.settings.files_root / stored_path).exists()
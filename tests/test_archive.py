@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import importlib
+from datetime import datetime
+
+
+def test_archive_moves_old_download_logs_to_segments(app_ctx, tmp_path):
+    _client, db_mod, models = app_ctx
+    archive = importlib.import_module("appdownloader.archive")
+
+    db = db_mod.SessionLocal()
+    try:
+        for created_at in (
+            datetime(2025, 1, 5, 10, 0, 0),
+            datetime(2025, 1, 20, 10, 0, 0),
+            datetime(2025, 2, 3, 10, 0, 0),
+            datetime(2026, 6, 1, 10, 0, 0),
+        ):
+            db.add(models.DownloadLog(version="1.0.0", ip="10.0.0.1", created_at=created_at))
+        db.commit()
+
+        archived = archive.archive_logs(
+            db,
+            "download_logs",
+            older_than_days=30,
+            batch_size=2,
+            now=datetime(2026, 6, 10),
+            root=tmp_path,
+        )
+        assert archived == 3
+        assert db.query(models.DownloadLog).count() == 1
+
+        segments = archive.load_index("download_logs", root=tmp_path)
+        assert [s["month"] for s in segments] == ["2025-01", "2025-02"]
+        assert sum(s["rows"] for s in segments) == 3
+
+        rows = list(archive.iter_logs(db, "download_logs", root=tmp_path))
+        assert [r["created_at"].month for r in rows] == [1, 1, 2, 6]
+
+        january = list(
+            archive.iter_logs(
+                db,
+                "download_logs",
+                start=datetime(2025, 1, 1),
+                end=datetime(2025, 2, 1),
+                root=tmp_path,
+            )
+        )
+        assert len(january) == 2
+
+        again = archive.archive_logs(
+            db,
+            "download_logs",
+            older_than_days=30,
+            now=datetime(2026, 6, 10),
+            root=tmp_path,
+        )
+        assert again == 0
+    finally:
+        db.close()
+
+
+def test_archive_never_deletes_rows_missing_from_segments(app_ctx, tmp_path):
+    _client, db_mod, models = app_ctx
+    archive = importlib.import_module("appdownloader.archive")
+
+    with db_mod.SessionLocal() as db:
+        # created_at does not follow id: the low id lands after the first cutoff.
+        for created_at in (
+            datetime(2025, 1, 25, 10, 0, 0),
+            datetime(2025, 1, 5, 10, 0, 0),
+            datetime(2025, 1, 6, 10, 0, 0),
+        ):
+            db.add(models.DownloadLog(version="1.0.0", ip="10.0.0.1", created_at=created_at))
+        db.commit()
+
+        first = archive.archive_logs(db, "download_logs", older_than_days=0, now=datetime(2025, 1, 10), root=tmp_path)
+        assert first == 2
+        assert [r.created_at.day for r in db.query(models.DownloadLog).all()] == [25]
+
+        second = archive.archive_logs(db, "download_logs", older_than_days=0, now=datetime(2025, 2, 10), root=tmp_path)
+        assert second == 1
+        assert db.query(models.DownloadLog).count() == 0
+
+        rows = list(archive.iter_logs(db, "download_logs", root=tmp_path))
+        assert sorted(r["created_at"].day for r in rows) == [5, 6, 25]
+        assert sum(s["rows"] for s in archive.load_index("download_logs", root=tmp_path)) == 3
+
+
+def test_archive_resumes_a_segment_left_half_deleted(app_ctx, tmp_path, monkeypatch):
+    _client, db_mod, models = app_ctx
+    archive = importlib.import_module("appdownloader.archive")
+
+    with db_mod.SessionLocal() as db:
+        for day in range(1, 7):
+            db.add(models.DownloadLog(version="1.0.0", ip="10.0.0.1", created_at=datetime(2025, 1, day, 10)))
+        db.commit()
+
+        delete_archived = archive._delete_archived
+
+        def crash_after_first_batch(db, table_name, segment, batch_size):
+            delete_archived(db, table_name, {**segment, "last_id": segment["first_id"] + batch_size - 1}, batch_size)
+            raise KeyboardInterrupt
+
+        monkeypatch.setattr(archive, "_delete_archived", crash_after_first_batch)
+        try:
+            archive.archive_logs(db, "download_logs", older_than_days=0, batch_size=2, now=datetime(2025, 2, 1), root=tmp_path)
+        except KeyboardInterrupt:
+            pass
+        assert db.query(models.DownloadLog).count() == 4
+        monkeypatch.setattr(archive, "_delete_archived", delete_archived)
+
+        assert archive.archive_logs(db, "download_logs", older_than_days=0, batch_size=2, now=datetime(2025, 2, 1), root=tmp_path) == 0
+        assert db.query(models.DownloadLog).count() == 0
+
+        segments = archive.load_index("download_logs", root=tmp_path)
+        assert [s["rows"] for s in segments] == [6]
+        assert len(list((tmp_path / "download_logs" / "2025-01").glob("*.jsonl.gz"))) == 1
+        assert sorted(r["created_at"].day for r in archive.iter_logs(db, "download_logs", root=tmp_path)) == [1, 2, 3, 4, 5, 6]
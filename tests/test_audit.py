@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import importlib
+
+import pytest
+from sqlalchemy import event, text
+
+
+def test_admin_action_and_audit_row_share_one_transaction(app_ctx):
+    client, db_mod, models = app_ctx
+    client.post("/admin/login", data={"username": "admin", "password": "admin1234"}, follow_redirects=False)
+
+    commits = []
+    listener = lambda _conn: commits.append(1)  # noqa: E731
+    event.listen(db_mod.engine, "commit", listener)
+    try:
+        client.post("/admin/notices", data={"title": "점검", "content": "야간 점검", "is_visible": "on"})
+    finally:
+        event.remove(db_mod.engine, "commit", listener)
+    assert len(commits) == 1
+
+    db = db_mod.SessionLocal()
+    try:
+        notice = db.query(models.Notice).one()
+        audit = db.query(models.AuditLog).filter(models.AuditLog.action == "create_notice").one()
+        assert audit.target_id == notice.id
+        assert audit.user_agent == "testclient"
+
+        db.execute(
+            text("CREATE TRIGGER fail_audit BEFORE INSERT ON audit_logs BEGIN SELECT RAISE(ABORT, 'audit down'); END")
+        )
+        db.commit()
+    finally:
+        db.close()
+
+    with pytest.raises(Exception, match="audit down"):
+        client.post("/admin/notices", data={"title": "남으면 안 됨", "content": "x", "is_visible": "on"})
+
+    db = db_mod.SessionLocal()
+    try:
+        assert db.query(models.Notice).count() == 1
+    finally:
+        db.close()
+
+
+def test_bulk_audit_events_use_one_batched_insert(app_ctx):
+    _client, db_mod, models = app_ctx
+    audit_mod = importlib.import_module("appdownloader.audit")
+
+    db = db_mod.SessionLocal()
+    try:
+        notices = [models.Notice(title=f"n{i}", content="c") for i in range(5)]
+        db.add_all(notices)
+        audit = audit_mod.AuditTrail(db, ip="10.0.0.1")
+        audit.record_many("create_notice", "notice", notices, actor_id=None, actor_type="system")
+
+        inserts = []
+
+        def capture(_conn, _cursor, statement, _params, _context, executemany):
+            if statement.startswith("INSERT INTO audit_logs"):
+                inserts.append(executemany)
+
+        event.listen(db_mod.engine, "before_cursor_execute", capture)
+        try:
+            db.commit()
+        finally:
+            event.remove(db_mod.engine, "before_cursor_execute", capture)
+        assert inserts == [True]
+        assert audit.pending == 0
+
+        rows = db.query(models.AuditLog.target_id).order_by(models.AuditLog.id).all()
+        assert [target_id for (target_id,) in rows] == [n.id for n in notices]
+    finally:
+        db.close()
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import importlib
+import io
+import json
+import tarfile
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+
+def _login_and_upload(client, db_mod, models, slug: str, version: str, payload: bytes) -> None:
+    client.post("/admin/login", data={"username": "admin", "password": "admin1234"}, follow_redirects=False)
+    client.post("/admin/apps", data={"name": slug, "slug": slug, "is_active": "on"}, follow_redirects=False)
+    db = db_mod.SessionLocal()
+    try:
+        app_type_id = db.query(models.AppType).filter(models.AppType.slug == slug).one().id
+    finally:
+        db.close()
+    client.post(
+        "/admin/apks/upload",
+        data={"app_type_id": str(app_type_id), "version": version},
+        files={"apk_file": (f"{slug}.apk", payload, "application/vnd.android.package-archive")},
+    )
+
+
+def test_backup_stream_incremental_and_restore(app_ctx, tmp_path: Path):
+    client, db_mod, models = app_ctx
+    backup = importlib.import_module("appdownloader.backup")
+    config = importlib.import_module("appdownloader.config")
+
+    _login_and_upload(client, db_mod, models, "first-app", "1.0.0", b"PK\x03\x04first")
+
+    response = client.get("/admin/backup")
+    assert response.status_code == 200
+    with tarfile.open(fileobj=io.BytesIO(response.content)) as tar:
+        names = tar.getnames()
+        manifest = json.load(tar.extractfile("manifest.json"))
+    assert names[:2] == ["manifest.json", "app.db"]
+    assert len(manifest["files"]) == 1
+    assert f"blobs/{manifest['files'][0]['sha256']}" in names
+
+    full = tmp_path / "full.tar"
+    full.write_bytes(response.content)
+
+    _login_and_upload(client, db_mod, models, "second-app", "2.0.0", b"PK\x03\x04second")
+    incremental = tmp_path / "incr.tar"
+    incr_manifest = backup.write_backup(incremental, base_archive=full)
+    assert [f["in_base"] for f in incr_manifest["files"]] == [True, False]
+    with tarfile.open(incremental) as tar:
+        blob_names = [n for n in tar.getnames() if n.startswith("blobs/")]
+    assert len(blob_names) == 1
+
+    db_mod.engine.dispose()
+    for path in [p for p in config.settings.files_root.rglob("*") if p.is_file()]:
+        path.unlink()
+
+    report = backup.restore_backup(incremental, [full], force=True)
+    assert report.ok
+    assert report.verified_files == 2
+
+    db = db_mod.SessionLocal()
+    try:
+        files = db.query(models.ApkFile).order_by(models.ApkFile.id).all()
+        contents = [(config.settings.files_root / f.stored_path).read_bytes() for f in files]
+        assert contents == [b"PK\x03\x04first", b"PK\x03\x04second"]
+    finally:
+        db.close()
+
+
+def test_backup_spools_snapshot_to_disk_and_never_leaves_partial_archives(app_ctx, tmp_path: Path, monkeypatch):
+    client, db_mod, models = app_ctx
+    backup = importlib.import_module("appdownloader.backup")
+    config = importlib.import_module("appdownloader.config")
+
+    _login_and_upload(client, db_mod, models, "big-app", "1.0.0", b"PK\x03\x04big")
+    with db_mod.SessionLocal() as db:
+        db.add_all(models.Notice(title=f"notice {i}", content="x" * 100_000) for i in range(200))
+        db.commit()
+
+    output = tmp_path / "full.tar"
+    tracemalloc.start()
+    try:
+        manifest = backup.write_backup(output)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert manifest["database"]["size"] > 20 * 1024**2
+    assert peak < 8 * 1024**2
+    assert not list(config.settings.tmp_root.glob("backup-*.db"))
+
+    def broken_get(self, key):
+        yield b"PK"
+        raise OSError("disk went away")
+
+    storage_cls = type(importlib.import_module("appdownloader.storage").get_storage())
+    monkeypatch.setattr(storage_cls, "get", broken_get)
+    failed = tmp_path / "failed.tar"
+    with pytest.raises(OSError):
+        backup.write_backup(failed)
+    assert not failed.exists()
+    assert not failed.with_name("failed.tar.part").exists()
+    assert not list(config.settings.tmp_root.glob("backup-*.db"))
+
+
+def test_restore_never_writes_corrupt_blobs_or_swaps_a_bad_database(app_ctx, tmp_path: Path):
+    client, db_mod, models = app_ctx
+    backup = importlib.import_module("appdownloader.backup")
+    config = importlib.import_module("appdownloader.config")
+
+    _login_and_upload(client, db_mod, models, "safe-app", "1.0.0", b"PK\x03\x04good")
+    good = tmp_path / "good.tar"
+    backup.write_backup(good)
+
+    corrupt = tmp_path / "corrupt.tar"
+    with tarfile.open(good) as source, tarfile.open(corrupt, "w") as target:
+        for member in source:
+            data = source.extractfile(member).read()
+            if member.name.startswith("blobs/"):
+                data = b"PK\x03\x04evil"
+            target.addfile(member, io.BytesIO(data))
+
+    db_mod.engine.dispose()
+    db_path = db_mod.sqlite_database_path()
+    stored = next(p for p in config.settings.files_root.rglob("*") if p.is_file())
+
+    # The damaged member is skipped and the intact blob already in storage is kept.
+    report = backup.restore_backup(corrupt, force=True)
+    assert report.ok and report.restored_files == 0
+    assert stored.read_bytes() == b"PK\x03\x04good"
+
+    stored.write_bytes(b"PK\x03\x04gone")
+    before = db_path.read_bytes()
+    with pytest.raises(backup.RestoreError) as raised:
+        backup.restore_backup(corrupt, force=True)
+    assert len(raised.value.report.mismatched) == 1
+    assert stored.read_bytes() == b"PK\x03\x04gone"
+    assert db_path.read_bytes() == before
+    assert not list(db_path.parent.glob("*.restore*"))
+    assert not list(config.settings.tmp_root.glob("restore-*"))
+
+    report = backup.restore_backup(good, force=True)
+    assert report.ok and report.restored_files == 1
+    assert stored.read_bytes() == b"PK\x03\x04good"
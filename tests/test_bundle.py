@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import io
+import zipfile
+from datetime import datetime
+
+from sqlalchemy import update
+
+
+def _upload(client, db_mod, models, slug: str, payload: bytes) -> None:
+    client.post("/admin/apps", data={"name": slug, "slug": slug, "is_active": "on"})
+    db = db_mod.SessionLocal()
+    try:
+        app_type_id = db.query(models.AppType).filter(models.AppType.slug == slug).one().id
+    finally:
+        db.close()
+    client.post(
+        "/admin/apks/upload",
+        data={"app_type_id": str(app_type_id), "version": "1.0.0"},
+        files={"apk_file": (f"{slug}.apk", payload, "application/vnd.android.package-archive")},
+    )
+
+
+def test_bundle_streams_zip_with_ranges_and_bulk_logs(app_ctx, capsys):
+    client, db_mod, models = app_ctx
+    payloads = {
+        "scanner": b"PK\x03\x04" + b"s" * 3000,
+        "printer": b"PK\x03\x04" + b"p" * 70,
+        "kiosk": b"PK\x03\x04" + b"k" * 1500,
+    }
+    client.post("/admin/login", data={"username": "admin", "password": "admin1234"}, follow_redirects=False)
+    for slug, payload in payloads.items():
+        _upload(client, db_mod, models, slug, payload)
+
+    db = db_mod.SessionLocal()
+    try:
+        db.execute(update(models.ApkFile).values(crc32=None))
+        db.commit()
+    finally:
+        db.close()
+
+    assert client.get("/bundle?apps=scanner,printer&apps=kiosk").status_code == 503
+    from appdownloader.cli import main
+
+    main(["backfill-crc32", "--batch-size", "2"])
+    assert "filled crc32 for 3 files" in capsys.readouterr().out
+
+    response = client.get("/bundle?apps=scanner,printer&apps=kiosk")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+    assert int(response.headers["content-length"]) == len(response.content)
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        assert archive.testzip() is None
+        assert archive.namelist() == ["scanner/scanner.apk", "printer/printer.apk", "kiosk/kiosk.apk"]
+        assert all(info.compress_type == zipfile.ZIP_STORED for info in archive.infolist())
+        assert archive.read("kiosk/kiosk.apk") == payloads["kiosk"]
+
+    full = response.content
+    etag = response.headers["etag"]
+    url = "/bundle?apps=scanner,printer,kiosk"
+    for start, end in [(0, 10), (25, 3100), (3050, len(full) - 1), (len(full) - 40, len(full) - 1)]:
+        part = client.get(url, headers={"Range": f"bytes={start}-{end}", "If-Range": etag})
+        assert part.status_code == 206
+        assert part.content == full[start : end + 1]
+    assert client.get(url, headers={"Range": "bytes=5-", "If-Range": '"stale"'}).status_code == 200
+
+    db = db_mod.SessionLocal()
+    try:
+        assert db.query(models.ApkFile).filter(models.ApkFile.crc32.is_(None)).count() == 0
+        assert db.query(models.DownloadLog).count() == 3 * 3
+    finally:
+        db.close()
+
+    assert client.get("/bundle?apps=scanner,missing").status_code == 404
+    assert client.get("/bundle").status_code == 400
+
+
+def test_device_profile_bundle(app_ctx):
+    client, db_mod, models = app_ctx
+    client.post("/admin/login", data={"username": "admin", "password": "admin1234"}, follow_redirects=False)
+    _upload(client, db_mod, models, "mes", b"PK\x03\x04mes")
+    _upload(client, db_mod, models, "wms", b"PK\x03\x04wms")
+
+    saved = client.post(
+        "/admin/profiles",
+        data={"name": "포장 라인 단말", "slug": "packing-line", "apps": ["wms", "mes", "unknown"]},
+        follow_redirects=False,
+    )
+    assert saved.status_code == 303
+    assert "/bundle?profile=packing-line" in client.get("/").text
+
+    response = client.get("/bundle?profile=packing-line")
+    assert response.status_code == 200
+    assert "packing-line-" in response.headers["content-disposition"]
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        assert archive.namelist() == ["wms/wms.apk", "mes/mes.apk"]
+    assert client.get("/bundle?profile=nope").status_code == 404
+
+
+class _RangeFile(io.RawIOBase):
+    def __init__(self, bundle):
+        self.bundle = bundle
+        self.position = 0
+
+    def seekable(self):
+        return True
+
+    def readable(self):
+        return True
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self.position, io.SEEK_END: self.bundle.size}[whence]
+        self.position = base + offset
+        return self.position
+
+    def tell(self):
+        return self.position
+
+    def readinto(self, buffer):
+        end = min(self.position + len(buffer), self.bundle.size)
+        data = b"".join(self.bundle.iter_range(None, self.position, end))
+        buffer[: len(data)] = data
+        self.position += len(data)
+        return len(data)
+
+
+def test_large_bundles_switch_to_zip64_offsets():
+    from appdownloader.bundle import BundleEntry, ZipBundle
+
+    size = 1_500_000_000
+    entries = [
+        BundleEntry(f"app{i}/app{i}.apk", f"key{i}", size, 0, datetime(2026, 1, 2, 3, 4, 6), i, i, "1.0")
+        for i in range(4)
+    ]
+    bundle = ZipBundle(entries)
+    with zipfile.ZipFile(io.BufferedReader(_RangeFile(bundle))) as archive:
+        infos = archive.infolist()
+    assert [info.file_size for info in infos] == [size] * 4
+    assert infos[3].header_offset > 0xFFFFFFFF
+    assert infos[0].date_time == (2026, 1, 2, 3, 4, 6)
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import importlib
+
+
+def test_generation_cache_invalidates_across_workers(app_ctx):
+    client, db_mod, models = app_ctx
+    cache = importlib.import_module("appdownloader.cache")
+    public = importlib.import_module("appdownloader.routes.public")
+
+    loads = []
+
+    def loader(db):
+        loads.append(1)
+        return [a.slug for a in db.query(models.AppType).order_by(models.AppType.slug)]
+
+    # worker_b stands in for another process: it is not expired by local commits
+    # and only learns about the change through the DB generation row.
+    worker_a = cache.GenerationCache("catalog", loader, check_interval=3600)
+    worker_b = cache.GenerationCache("catalog", loader, check_interval=0)
+    cache._registry["catalog"].remove(worker_b)
+
+    db = db_mod.SessionLocal()
+    try:
+        assert worker_a.get(db) == []
+        assert worker_b.get(db) == []
+        assert worker_a.get(db) == []
+        assert len(loads) == 2
+
+        db.add(models.AppType(name="Cache App", slug="cache-app", is_active=True))
+        cache.bump_generation(db)
+        db.commit()
+        assert cache.current_generation(db, "catalog") >= 1
+
+        assert worker_a.get(db) == ["cache-app"]
+        assert worker_b.get(db) == ["cache-app"]
+    finally:
+        db.close()
+
+    client.post("/admin/login", data={"username": "admin", "password": "admin1234"}, follow_redirects=False)
+    assert "cache-app" in client.get("/").text
+    client.post("/admin/apps", data={"name": "Second", "slug": "second-app", "is_active": "on"})
+    assert "second-app" in client.get("/").text
+    with db_mod.SessionLocal() as db:
+        assert public.home_catalog.get(db).apps[-1].slug == "second-app"
+
+
+def test_server_config_reads_launcher_settings(app_ctx, monkeypatch):
+    monkeypatch.setenv("APP_WORKERS", "4")
+    monkeypatch.setenv("APP_LIMIT_CONCURRENCY", "500")
+    monkeypatch.setenv("APP_H11_MAX_INCOMPLETE_EVENT_SIZE", "65536")
+    config_mod = importlib.reload(importlib.import_module("appdownloader.config"))
+    server = importlib.reload(importlib.import_module("appdownloader.server"))
+
+    config = server.build_config()
+    assert config_mod.settings.workers == 4
+    assert config.workers == 4
+    assert config.limit_concurrency == 500
+    assert config.backlog == 2048
+    assert config.h11_max_incomplete_event_size == 65536
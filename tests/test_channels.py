@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+from sqlalchemy import event
+
+
+def _setup_app(client, db_mod, models) -> dict[str, int]:
+    client.post("/admin/login", data={"username": "admin", "password": "admin1234"}, follow_redirects=False)
+    client.post("/admin/apps", data={"name": "MES", "slug": "mes", "is_active": "on"})
+    db = db_mod.SessionLocal()
+    try:
+        app_type_id = db.query(models.AppType).filter(models.AppType.slug == "mes").one().id
+    finally:
+        db.close()
+    for version in ("2.2.0", "2.3.0", "2.4.0-beta.1"):
+        client.post(
+            "/admin/apks/upload",
+            data={"app_type_id": str(app_type_id), "version": version},
+            files={"apk_file": (f"mes-{version}.apk", b"PK\x03\x04" + version.encode(), "application/zip")},
+        )
+    db = db_mod.SessionLocal()
+    try:
+        versions = {v.version: v.id for v in db.query(models.ApkVersion)}
+    finally:
+        db.close()
+    versions["app_type_id"] = app_type_id
+    return versions
+
+
+def test_device_buckets_are_stable_and_uniform():
+    from appdownloader.channels import device_bucket
+
+    buckets = [device_bucket(f"device-{i}", "mes", "2.3.0") for i in range(10000)]
+    assert buckets == [device_bucket(f"device-{i}", "mes", "2.3.0") for i in range(10000)]
+    assert 850 < sum(1 for bucket in buckets if bucket < 10) < 1150
+
+
+def test_staged_rollout_resolves_from_cached_catalog(app_ctx):
+    client, db_mod, models = app_ctx
+    from appdownloader.channels import device_bucket
+
+    ids = _setup_app(client, db_mod, models)
+    saved = client.post(
+        f"/admin/apps/{ids['app_type_id']}/channels",
+        data={
+            "stable_version_id": str(ids["2.2.0"]),
+            "stable_rollout_version_id": str(ids["2.3.0"]),
+            "stable_rollout_percent": "10",
+            "beta_version_id": str(ids["2.4.0-beta.1"]),
+        },
+        follow_redirects=False,
+    )
+    assert saved.status_code == 303
+    page = client.get(saved.headers["location"])
+    assert f'<option value="{ids["2.3.0"]}" selected>2.3.0</option>' in page.text
+
+    assert client.get("/api/apps/mes/latest").json()["version"] == "2.2.0"
+    assert "2.2.0" in client.get("/").text
+
+    statements = []
+    listener = lambda _c, _cur, statement, *_rest: statements.append(statement)  # noqa: E731
+    event.listen(db_mod.engine, "before_cursor_execute", listener)
+    try:
+        results = {
+            f"dev-{i}": client.get(f"/api/apps/mes/latest?device=dev-{i}").json() for i in range(200)
+        }
+        beta = client.get("/api/apps/mes/latest", params={"channel": "beta"}, headers={"X-Device-Id": "dev-1"})
+    finally:
+        event.remove(db_mod.engine, "before_cursor_execute", listener)
+    assert not [s for s in statements if "cache_generations" not in s]
+
+    for device, body in results.items():
+        in_rollout = device_bucket(device, "mes", "2.3.0") < 10
+        assert body["version"] == ("2.3.0" if in_rollout else "2.2.0")
+        assert body["rollout"] is in_rollout
+    assert 0 < sum(body["rollout"] for body in results.values()) < 60
+    assert beta.json()["version"] == "2.4.0-beta.1"
+    assert beta.json()["download_url"].startswith("/blobs/")
+
+    rollout_device = next(device for device, body in results.items() if body["rollout"])
+    assert "2.3.0" in client.get(f"/?device={rollout_device}").text
+
+    client.post("/admin/apks/delete", data={"apk_version_id": str(ids["2.3.0"])})
+    assert client.get(f"/api/apps/mes/latest?device={rollout_device}").json()["version"] == "2.2.0"
+    assert client.get("/api/apps/mes/latest?channel=nightly").status_code == 400
+    assert client.get("/api/apps/missing/latest").status_code == 404
+
+
+def test_unpinned_beta_gets_newest_next_to_pinned_stable(app_ctx):
+    client, db_mod, models = app_ctx
+
+    ids = _setup_app(client, db_mod, models)
+    client.post(f"/admin/apps/{ids['app_type_id']}/channels", data={"stable_version_id": str(ids["2.2.0"])})
+
+    assert client.get("/api/apps/mes/latest").json()["version"] == "2.2.0"
+    assert client.get("/api/apps/mes/latest", params={"channel": "beta"}).json()["version"] == "2.4.0-beta.1"
+    assert "2.4.0-beta.1" not in client.get("/").text
+    assert "2.4.0-beta.1" in client.get("/", params={"channel": "beta"}).text
+
+    client.post(
+        f"/admin/apps/{ids['app_type_id']}/channels",
+        data={
+            "stable_version_id": str(ids["2.2.0"]),
+            "beta_rollout_version_id": str(ids["2.4.0-beta.1"]),
+            "beta_rollout_percent": "0",
+        },
+    )
+    assert client.get("/api/apps/mes/latest", params={"channel": "beta"}).json()["version"] == "2.3.0"
+
+
+def test_rollout_without_pin_keeps_other_devices_on_the_previous_version(app_ctx):
+    client, db_mod, models = app_ctx
+    from appdownloader.channels import device_bucket
+
+    ids = _setup_app(client, db_mod, models)
+    client.post(
+        f"/admin/apps/{ids['app_type_id']}/channels",
+        data={"stable_rollout_version_id": str(ids["2.3.0"]), "stable_rollout_percent": "10"},
+    )
+
+    versions = {
+        device: client.get("/api/apps/mes/latest", params={"device": device}).json()["version"]
+        for device in (f"dev-{i}" for i in range(200))
+    }
+    for device, version in versions.items():
+        assert version == ("2.3.0" if device_bucket(device, "mes", "2.3.0") < 10 else "2.2.0")
+    assert 0 < list(versions.values()).count("2.3.0") < 60
+    assert client.get("/api/apps/mes/latest").json()["version"] == "2.2.0"
+    assert client.get("/api/apps/mes/latest", params={"channel": "beta"}).json()["version"] == "2.4.0-beta.1"
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import gzip
+import importlib
+import re
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+
+def test_hashed_assets_are_precompressed_and_immutable(tmp_path: Path):
+    from appdownloader.assets import AssetFiles, build_assets, load_manifest, prune_assets
+
+    css = "body { color: #123; }\n" * 100
+    (tmp_path / "style.css").write_text(css, encoding="utf-8")
+    manifest = build_assets(tmp_path)
+    hashed = manifest["style.css"]
+    assert re.fullmatch(r"style\.[0-9a-f]{12}\.css", hashed)
+    assert gzip.decompress((tmp_path / "dist" / f"{hashed}.gz").read_bytes()).decode() == css
+    assert load_manifest(tmp_path) == manifest
+
+    app = FastAPI()
+    app.mount("/static", AssetFiles(directory=str(tmp_path)), name="static")
+    client = TestClient(app)
+
+    response = client.get(f"/static/dist/{hashed}", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["content-type"].startswith("text/css")
+    assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
+    assert response.text == css
+
+    identity = client.get(f"/static/dist/{hashed}", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in identity.headers
+    assert identity.text == css
+    assert client.get("/static/style.css").headers["cache-control"] == "no-cache"
+
+    (tmp_path / "style.css").write_text(css + "p {}\n", encoding="utf-8")
+    rebuilt = build_assets(tmp_path)
+    assert rebuilt["style.css"] != hashed
+    assert client.get(f"/static/dist/{hashed}").text == css
+
+    assert prune_assets(tmp_path, keep=2) == []
+    assert (tmp_path / "dist" / hashed).exists()
+    assert tmp_path / "dist" / hashed in prune_assets(tmp_path, keep=1)
+    assert not (tmp_path / "dist" / hashed).exists()
+    assert (tmp_path / "dist" / rebuilt["style.css"]).exists()
+
+
+def test_html_is_compressed_but_apk_downloads_are_not(app_ctx):
+    client, db_mod, models = app_ctx
+    compression = importlib.import_module("appdownloader.compression")
+
+    assert compression.choose_encoding("gzip;q=0, deflate") is None
+    assert compression.choose_encoding("br;q=1.0, gzip;q=0.5") in compression.supported_encodings()
+
+    client.post("/admin/login", data={"username": "admin", "password": "admin1234"}, follow_redirects=False)
+    client.post("/admin/apps", data={"name": "zip-app", "slug": "zip-app", "is_active": "on"})
+    db = db_mod.SessionLocal()
+    try:
+        app_type_id = db.query(models.AppType).filter(models.AppType.slug == "zip-app").one().id
+    finally:
+        db.close()
+    payload = b"PK\x03\x04" + b"\x00" * 4000
+    client.post(
+        "/admin/apks/upload",
+        data={"app_type_id": str(app_type_id), "version": "1.0.0"},
+        files={"apk_file": ("zip.apk", payload, "application/vnd.android.package-archive")},
+    )
+
+    page = client.get("/apps/zip-app", headers={"Accept-Encoding": "gzip"})
+    assert page.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in page.headers["vary"]
+    assert "zip-app" in page.text
+
+    link = re.search(r'href="(/blobs/[^"]+)"', page.text).group(1)
+    download = client.get(link, headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in download.headers
+    assert download.headers["content-length"] == str(len(payload))
+    assert download.content == payload
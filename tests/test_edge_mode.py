@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import importlib
+import re
+import sys
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import OperationalError
+
+
+def test_edge_mode_serves_public_routes_from_read_only_db(app_ctx, monkeypatch: pytest.MonkeyPatch):
+    client, db_mod, models = app_ctx
+    client.post("/admin/login", data={"username": "admin", "password": "admin1234"}, follow_redirects=False)
+    client.post("/admin/apps", data={"name": "edge-app", "slug": "edge-app", "is_active": "on"})
+    db = db_mod.SessionLocal()
+    try:
+        app_type_id = db.query(models.AppType).filter(models.AppType.slug == "edge-app").one().id
+    finally:
+        db.close()
+    client.post(
+        "/admin/apks/upload",
+        data={"app_type_id": str(app_type_id), "version": "1.0.0"},
+        files={"apk_file": ("edge.apk", b"PK\x03\x04edge", "application/vnd.android.package-archive")},
+    )
+
+    monkeypatch.setenv("SERVE_MODE", "edge")
+    for name in list(sys.modules):
+        if name == "appdownloader" or name.startswith("appdownloader."):
+            del sys.modules[name]
+    edge_main = importlib.import_module("appdownloader.main")
+    edge_db = importlib.import_module("appdownloader.db")
+    spool = importlib.import_module("appdownloader.spool")
+    assert "appdownloader.routes.admin" not in sys.modules
+    assert "appdownloader.auth" not in sys.modules
+
+    with TestClient(edge_main.app) as edge:
+        home = edge.get("/")
+        assert home.status_code == 200
+        assert 'href="/admin"' not in home.text
+        assert edge.get("/admin").status_code == 404
+        assert edge.get("/apps/edge-app").status_code == 200
+
+        page = edge.get("/apps/edge-app").text
+        response = edge.get(re.search(r'href="(/blobs/[^"]+)"', page).group(1))
+        assert response.status_code == 200
+        assert response.content == b"PK\x03\x04edge"
+        assert edge.post(re.search(r'data-ping="([^"]+)"', page).group(1)).status_code == 204
+
+    read_only = edge_db.SessionLocal()
+    try:
+        with pytest.raises(OperationalError):
+            read_only.connection().exec_driver_sql("DELETE FROM notices")
+    finally:
+        read_only.close()
+
+    # Time is pinned to the minute the spool file was written in, so the test
+    # does not depend on whether the wall clock crossed a minute boundary.
+    (spooled,) = spool.spool_dir().glob("*.jsonl")
+    minute = spooled.name[len(spool.SPOOL_PREFIX) :].split("-")[0]
+    written_at = datetime.strptime(minute, spool.MINUTE_FORMAT).replace(tzinfo=timezone.utc)
+
+    writer = db_mod.SessionLocal()
+    try:
+        assert spool.ingest_download_spool(writer, now=written_at + timedelta(seconds=59)) == 0
+        assert spool.ingest_download_spool(writer, now=written_at + timedelta(minutes=2)) == 1
+        log = writer.query(models.DownloadLog).one()
+        assert log.version == "1.0.0"
+        assert not list(spool.spool_dir().glob("*.jsonl"))
+    finally:
+        writer.close()
+
+
+def test_spool_ingest_survives_a_crash_between_commit_and_unlink(app_ctx, monkeypatch: pytest.MonkeyPatch):
+    _client, db_mod, models = app_ctx
+    spool = importlib.import_module("appdownloader.spool")
+
+    written_at = datetime(2026, 10, 19, 9, 30, tzinfo=timezone.utc)
+    spool.spool_download_logs(
+        [
+            {
+                "apk_file_id": None,
+                "app_type_id": None,
+                "version": f"1.0.{i}",
+                "ip": "10.0.0.1",
+                "user_agent": "edge",
+                "created_at": written_at.replace(tzinfo=None),
+            }
+            for i in range(3)
+        ],
+        now=written_at,
+    )
+    later = written_at + timedelta(minutes=5)
+
+    def crash(self, missing_ok=False):
+        raise OSError("worker killed")
+
+    with db_mod.SessionLocal() as writer:
+        with monkeypatch.context() as patched:
+            patched.setattr(type(spool.spool_dir()), "unlink", crash)
+            with pytest.raises(OSError):
+                spool.ingest_download_spool(writer, now=later)
+        assert len(list(spool.spool_dir().glob("*.jsonl"))) == 1
+
+        assert spool.ingest_download_spool(writer, now=later) == 0
+        assert writer.query(models.DownloadLog).count() == 3
+        assert not list(spool.spool_dir().glob("*.jsonl"))
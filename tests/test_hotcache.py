@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import asyncio
+import importlib
+import re
+
+import pytest
+
+
+@pytest.fixture
+def mmap_budget(monkeypatch: pytest.MonkeyPatch) -> int:
+    monkeypatch.setenv("HOT_MMAP_BUDGET_BYTES", "6000")
+    monkeypatch.setenv("HOT_WARM_INTERVAL_SECONDS", "3600")
+    return 6000
+
+
+def _upload(client, db_mod, models, slug: str, payload: bytes) -> str:
+    client.post("/admin/apps", data={"name": slug, "slug": slug, "is_active": "on"})
+    db = db_mod.SessionLocal()
+    try:
+        app_type_id = db.query(models.AppType).filter(models.AppType.slug == slug).one().id
+    finally:
+        db.close()
+    client.post(
+        "/admin/apks/upload",
+        data={"app_type_id": str(app_type_id), "version": "1.0.0"},
+        files={"apk_file": (f"{slug}.apk", payload, "application/vnd.android.package-archive")},
+    )
+    return re.search(r'href="(/blobs/[^"]+)"', client.get(f"/apps/{slug}").text).group(1)
+
+
+def test_popular_files_are_warmed_and_served_from_mmap(mmap_budget, app_ctx):
+    client, db_mod, models = app_ctx
+    hotcache = importlib.import_module("appdownloader.hotcache")
+    storage_mod = importlib.import_module("appdownloader.storage")
+    hot = hotcache.hot_files
+
+    client.post("/admin/login", data={"username": "admin", "password": "admin1234"}, follow_redirects=False)
+    popular_payload = b"PK\x03\x04" + b"p" * 5000
+    popular = _upload(client, db_mod, models, "popular-app", popular_payload)
+    other = _upload(client, db_mod, models, "other-app", b"PK\x03\x04" + b"o" * 5000)
+
+    for _ in range(3):
+        assert client.get(popular).content == popular_payload
+    client.get(other)
+
+    hot.refresh()
+    popular_key = storage_mod.blob_key(popular.split("/")[2])
+    other_key = storage_mod.blob_key(other.split("/")[2])
+    assert [key for key, _score in hot.tracker.top(2)] == [popular_key, other_key]
+    assert hot.mapped(popular_key) is not None
+    assert hot.mapped(other_key) is None
+    assert hot.mapped_bytes <= mmap_budget
+    assert hot.label_for(other_key) == "warm"
+
+    assert client.get(popular).content == popular_payload
+    partial = client.get(popular, headers={"Range": "bytes=4-9"})
+    assert partial.status_code == 206
+    assert partial.content == b"pppppp"
+    assert partial.headers["content-range"] == "bytes 4-9/5004"
+
+    class RecordingMap:
+        def __init__(self, data):
+            self.data = data
+            self.on_loop: list[bool] = []
+
+        def __getitem__(self, item):
+            try:
+                asyncio.get_running_loop()
+                self.on_loop.append(True)
+            except RuntimeError:
+                self.on_loop.append(False)
+            return self.data[item]
+
+    mapped = hot.mapped(popular_key)
+    recording = RecordingMap(mapped.data)
+    hot._mapped[popular_key] = hotcache.MappedBlob(recording, mapped.size)
+    assert client.get(popular).content == popular_payload
+    assert recording.on_loop and not any(recording.on_loop)
+    hot._mapped[popular_key] = mapped
+
+    stats = client.get("/admin/hot-files.json").json()
+    assert stats["mapped"] == [popular_key]
+    assert stats["first_byte_ms"]["mmap"]["count"] == 3
+    assert sum(item["count"] for item in stats["first_byte_ms"].values()) == 7
+
+
+def test_popularity_scores_decay_with_half_life():
+    from appdownloader.hotcache import PopularityTracker
+
+    tracker = PopularityTracker(half_life_seconds=60)
+    for _ in range(3):
+        tracker.record("old", now=0)
+    tracker.record("new", now=120)
+    top = tracker.top(2, now=120)
+    assert [key for key, _score in top] == ["new", "old"]
+    assert top[1][1] == pytest.approx(0.75)
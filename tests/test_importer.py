@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import importlib
+import json
+from pathlib import Path
+
+
+def test_bulk_import_is_resumable(app_ctx, tmp_path: Path):
+    _client, db_mod, models = app_ctx
+    importer = importlib.import_module("appdownloader.importer")
+    config = importlib.import_module("appdownloader.config")
+
+    source = tmp_path / "archive"
+    (source / "nested").mkdir(parents=True)
+    (source / "sales-app_1.0.0.apk").write_bytes(b"PK\x03\x04sales-1")
+    (source / "nested" / "sales-app-1.1.0.apk").write_bytes(b"PK\x03\x04sales-2")
+    (source / "pos_2.0.0.apk").write_bytes(b"PK\x03\x04pos")
+    (source / "broken_1.0.0.apk").write_bytes(b"not-a-zip")
+    (source / "readme.apk").write_bytes(b"PK\x03\x04no-version")
+
+    rules = importer.load_rules(None)
+    db = db_mod.SessionLocal()
+    try:
+        report = importer.import_directory(db, source, rules, create_apps=True, workers=2, progress=None)
+        assert report.scanned == 5
+        assert report.imported == 3
+        assert len(report.invalid) == 1
+        assert len(report.unmatched) == 1
+
+        sales = db.query(models.AppType).filter(models.AppType.slug == "sales-app").one()
+        versions = db.query(models.ApkVersion).filter(models.ApkVersion.app_type_id == sales.id).all()
+        assert sorted(v.version for v in versions) == ["1.0.0", "1.1.0"]
+        assert all(v.current_file_id for v in versions)
+        stored = db.query(models.ApkFile).filter(models.ApkFile.apk_version_id == versions[0].id).one()
+        assert (config.settings.files_root / stored.stored_path).read_bytes().startswith(b"PK")
+
+        again = importer.import_directory(db, source, rules, create_apps=True, workers=2, progress=None)
+        assert again.imported == 0
+        assert again.skipped_existing == 3
+    finally:
+        db.close()
+
+
+def test_import_matches_apps_by_slug_and_keeps_names_unique(app_ctx, tmp_path: Path):
+    _client, db_mod, models = app_ctx
+    importer = importlib.import_module("appdownloader.importer")
+
+    source = tmp_path / "archive"
+    source.mkdir()
+    (source / "pos_2.0.0.apk").write_bytes(b"PK\x03\x04pos")
+    (source / "SCAN_1.0.0.apk").write_bytes(b"PK\x03\x04scan")
+    rules_file = tmp_path / "rules.json"
+    rules_file.write_text(
+        json.dumps(
+            [
+                {"pattern": r"^SCAN_(?P<version>[\d.]+)\.apk$", "app": "scanner", "name": "바코드 스캐너"},
+                {"pattern": importer.DEFAULT_PATTERN},
+            ]
+        ),
+        encoding="utf-8",
+    )
+
+    with db_mod.SessionLocal() as db:
+        db.add(models.AppType(name="pos", slug="pos-legacy", is_active=True))
+        db.add(models.AppType(name="Scanner", slug="scanner", is_active=True))
+        db.commit()
+
+        rules = importer.load_rules(rules_file)
+        report = importer.import_directory(db, source, rules, create_apps=True, workers=1, progress=None)
+        assert report.imported == 2
+
+        apps = {a.slug: a.name for a in db.query(models.AppType).all()}
+        assert apps == {"pos-legacy": "pos", "pos": "pos (pos)", "scanner": "Scanner"}
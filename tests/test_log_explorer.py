@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+
+def test_log_explorer_keyset_pages_and_csv(app_ctx):
+    client, db_mod, models = app_ctx
+
+    login = client.post(
+        "/admin/login",
+        data={"username": "admin", "password": "admin1234"},
+        follow_redirects=False,
+    )
+    assert login.status_code == 303
+
+    db = db_mod.SessionLocal()
+    try:
+        for i in range(7):
+            db.add(
+                models.DownloadLog(
+                    version=f"1.0.{i}",
+                    ip="10.0.0.9" if i % 2 else "10.0.0.8",
+                    created_at=datetime(2026, 3, 1, 9, 0, 0),
+                )
+            )
+        db.commit()
+    finally:
+        db.close()
+
+    first = client.get("/admin/logs.json", params={"kind": "download", "limit": 3})
+    assert first.status_code == 200
+    body = first.json()
+    assert [row["version"] for row in body["items"]] == ["1.0.6", "1.0.5", "1.0.4"]
+    assert body["prev_cursor"] is None
+
+    second = client.get(
+        "/admin/logs.json",
+        params={"kind": "download", "limit": 3, "cursor": body["next_cursor"]},
+    ).json()
+    assert [row["version"] for row in second["items"]] == ["1.0.3", "1.0.2", "1.0.1"]
+
+    back = client.get(
+        "/admin/logs.json",
+        params={"kind": "download", "limit": 3, "cursor": second["prev_cursor"], "direction": "prev"},
+    ).json()
+    assert [row["version"] for row in back["items"]] == ["1.0.6", "1.0.5", "1.0.4"]
+
+    filtered = client.get("/admin/logs.json", params={"kind": "download", "ip": "10.0.0.9"}).json()
+    assert len(filtered["items"]) == 3
+
+    audit = client.get("/admin/logs.json", params={"kind": "audit", "action": "admin_login"}).json()
+    assert len(audit["items"]) == 1
+
+    page = client.get("/admin/logs", params={"kind": "download"})
+    assert page.status_code == 200
+    assert "1.0.6" in page.text
+
+    export = client.get("/admin/logs.csv", params={"kind": "download", "start": "2026-03-01T09:00"})
+    assert export.status_code == 200
+    lines = export.content.decode("utf-8-sig").strip().splitlines()
+    assert lines[0].startswith("id,created_at")
+    assert len(lines) == 8
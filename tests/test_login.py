@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import asyncio
+import importlib
+
+import pytest
+from sqlalchemy import event
+
+
+def _login(client, password: str = "admin1234"):
+    return client.post("/admin/login", data={"username": "admin", "password": password}, follow_redirects=False)
+
+
+def test_admin_identity_is_cached_until_password_changes(app_ctx):
+    client, db_mod, _models = app_ctx
+    auth = importlib.import_module("appdownloader.auth")
+    assert _login(client).status_code == 303
+    client.get("/admin")
+
+    statements = []
+    listener = lambda _c, _cur, statement, *_rest: statements.append(statement)  # noqa: E731
+    event.listen(db_mod.engine, "before_cursor_execute", listener)
+    try:
+        for _ in range(3):
+            assert client.get("/admin/notices").status_code == 200
+    finally:
+        event.remove(db_mod.engine, "before_cursor_execute", listener)
+    assert not [s for s in statements if "FROM admin_users" in s]
+
+    db = db_mod.SessionLocal()
+    try:
+        auth.set_admin_password(db, "admin", "new-password-1")
+    finally:
+        db.close()
+
+    response = client.get("/admin", follow_redirects=False)
+    assert response.status_code == 303
+    assert response.headers["location"] == "/admin/login"
+    assert _login(client, "admin1234").status_code == 401
+    assert _login(client, "new-password-1").status_code == 303
+
+
+def test_login_failures_are_throttled_per_username(app_ctx):
+    client, _db_mod, _models = app_ctx
+    for _ in range(5):
+        assert _login(client, "wrong").status_code == 401
+
+    blocked = _login(client)
+    assert blocked.status_code == 429
+    assert int(blocked.headers["retry-after"]) > 0
+    assert client.get("/").status_code == 200
+
+
+def test_password_verifier_rejects_when_saturated(app_ctx):
+    auth = importlib.import_module("appdownloader.auth")
+    verifier = auth.PasswordVerifier(workers=1, max_pending=1)
+    password_hash = auth.hash_password("secret")
+
+    async def scenario():
+        first = asyncio.ensure_future(verifier.verify("secret", password_hash))
+        await asyncio.sleep(0)
+        with pytest.raises(auth.LoginBusy):
+            await verifier.verify("secret", password_hash)
+        assert await first is True
+        assert await verifier.verify("nope", password_hash) is False
+
+    asyncio.run(scenario())
@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import os
+import re
+import threading
+import time
+import tracemalloc
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from urllib.parse import urlencode
+
+import anyio
+import pytest
+
+
+APK_SIZE = 200 * 1024**2
+BODY_CHUNK = 64 * 1024
+# Ceilings are fixed and far below APK_SIZE: any whole-file buffer in the
+# request path blows through them.
+PYTHON_HEAP_BUDGET = 16 * 1024**2
+RSS_BUDGET = 64 * 1024**2
+BOUNDARY = "memorybudgetboundary"
+
+
+@dataclass
+class AsgiResult:
+    status: int = 0
+    headers: dict[str, str] = field(default_factory=dict)
+    body_size: int = 0
+    body_head: bytes = b""
+
+
+@dataclass
+class MemoryUsage:
+    heap_peak: int
+    rss_growth: int | None
+
+
+def _apk_chunks(fill: int) -> Iterator[bytes]:
+    block = b"PK\x03\x04" + bytes([fill]) * (BODY_CHUNK - 4)
+    yield block
+    block = bytes([fill]) * BODY_CHUNK
+    for _ in range(APK_SIZE // BODY_CHUNK - 1):
+        yield block
+
+
+def _multipart(fields: dict[str, str], filename: str, fill: int) -> Iterator[bytes]:
+    for name, value in fields.items():
+        yield (
+            f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'
+        ).encode()
+    yield (
+        f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="apk_file"; filename="{filename}"\r\n'
+        "Content-Type: application/vnd.android.package-archive\r\n\r\n"
+    ).encode()
+    yield from _apk_chunks(fill)
+    yield f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+def _rss_bytes() -> int | None:
+    try:
+        with open("/proc/self/statm", encoding="ascii") as fp:
+            return int(fp.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+class AsgiDriver:
+    """Talks to the app without TestClient, which buffers whole bodies in memory."""
+
+    def __init__(self, client, cookie: str):
+        self.client = client
+        self.cookie = cookie
+
+    async def _call(self, method: str, path: str, headers: dict[str, str], body: Iterator[bytes]) -> AsgiResult:
+        result = AsgiResult()
+        finished = anyio.Event()
+        path, _sep, query = path.partition("?")
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "root_path": "",
+            "headers": [(k.lower().encode(), v.encode()) for k, v in {**headers, "cookie": self.cookie}.items()],
+            "client": ("127.0.0.1", 50000),
+            "server": ("testserver", 80),
+        }
+        chunks = iter(body)
+        body_done = False
+
+        async def receive():
+            nonlocal body_done
+            chunk = next(chunks, None)
+            if chunk is not None:
+                return {"type": "http.request", "body": chunk, "more_body": True}
+            if not body_done:
+                body_done = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await finished.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                result.status = message["status"]
+                result.headers = {k.decode().lower(): v.decode() for k, v in message["headers"]}
+            elif message["type"] == "http.response.body":
+                body_part = message.get("body", b"")
+                result.body_size += len(body_part)
+                if len(result.body_head) < BODY_CHUNK:
+                    result.body_head += body_part[:BODY_CHUNK]
+                if not message.get("more_body"):
+                    finished.set()
+
+        await self.client.app(scope, receive, send)
+        return result
+
+    def request(self, method: str, path: str, headers: dict[str, str] | None = None, body: Iterator[bytes] = ()):
+        tracemalloc.start()
+        rss_before = _rss_bytes()
+        rss_peak = rss_before
+        stop = threading.Event()
+
+        def sample_rss() -> None:
+            nonlocal rss_peak
+            while not stop.wait(0.01):
+                rss_peak = max(rss_peak, _rss_bytes())
+
+        sampler = threading.Thread(target=sample_rss, daemon=True)
+        if rss_before is not None:
+            sampler.start()
+        try:
+            baseline = tracemalloc.get_traced_memory()[0]
+            result = self.client.portal.call(self._call, method, path, headers or {}, body)
+            heap_peak = tracemalloc.get_traced_memory()[1] - baseline
+        finally:
+            stop.set()
+            tracemalloc.stop()
+        if sampler.is_alive():
+            sampler.join()
+        rss_growth = None if rss_before is None else rss_peak - rss_before
+        return result, MemoryUsage(heap_peak=heap_peak, rss_growth=rss_growth)
+
+    def upload(self, app_type_id: int, version: str, fill: int):
+        return self.request(
+            "POST",
+            "/admin/apks/upload",
+            {"content-type": f"multipart/form-data; boundary={BOUNDARY}"},
+            _multipart({"app_type_id": str(app_type_id), "version": version}, f"big-{version}.apk", fill),
+        )
+
+    def form(self, path: str, data: dict[str, str]):
+        return self.request(
+            "POST",
+            path,
+            {"content-type": "application/x-www-form-urlencoded"},
+            iter([urlencode(data).encode()]),
+        )
+
+
+def _assert_within_budget(usage: MemoryUsage) -> None:
+    assert usage.heap_peak < PYTHON_HEAP_BUDGET, f"python heap peak {usage.heap_peak / 1024**2:.1f} MiB"
+    if usage.rss_growth is not None:
+        assert usage.rss_growth < RSS_BUDGET, f"rss growth {usage.rss_growth / 1024**2:.1f} MiB"
+
+
+@pytest.fixture
+def asgi_admin(app_ctx):
+    client, db_mod, models = app_ctx
+    client.post("/admin/login", data={"username": "admin", "password": "admin1234"}, follow_redirects=False)
+    client.post("/admin/apps", data={"name": "MES", "slug": "mes", "is_active": "on"})
+    db = db_mod.SessionLocal()
+    try:
+        app_type_id = db.query(models.AppType).filter(models.AppType.slug == "mes").one().id
+    finally:
+        db.close()
+    return AsgiDriver(client, f"session_id={client.cookies['session_id']}"), app_type_id, db_mod, models
+
+
+def test_large_apk_lifecycle_stays_within_memory_budget(asgi_admin):
+    driver, app_type_id, db_mod, models = asgi_admin
+
+    uploaded, usage = driver.upload(app_type_id, "1.0.0", fill=0x11)
+    assert uploaded.status == 200
+    _assert_within_budget(usage)
+
+    prompt, usage = driver.upload(app_type_id, "1.0.0", fill=0x22)
+    _assert_within_budget(usage)
+    token = re.search(rb'name="token" value="([^"]+)"', prompt.body_head).group(1).decode()
+    overwritten, usage = driver.form("/admin/apks/overwrite", {"token": token})
+    assert overwritten.status == 200
+    _assert_within_budget(usage)
+
+    db = db_mod.SessionLocal()
+    try:
+        files = db.query(models.ApkFile).order_by(models.ApkFile.revision_no).all()
+        assert [(f.revision_no, f.file_size, f.is_current) for f in files] == [
+            (1, APK_SIZE, False),
+            (2, APK_SIZE, True),
+        ]
+        current_id = files[1].id
+        version_id = files[1].apk_version_id
+    finally:
+        db.close()
+
+    started = time.perf_counter()
+    full, usage = driver.request("GET", f"/download/{current_id}")
+    assert full.status == 200 and full.body_size == APK_SIZE
+    assert time.perf_counter() - started < 60
+    _assert_within_budget(usage)
+
+    ranged, usage = driver.request("GET", f"/download/{current_id}", {"range": f"bytes=1024-{APK_SIZE // 2}"})
+    assert ranged.status == 206 and ranged.body_size == APK_SIZE // 2 - 1023
+    _assert_within_budget(usage)
+
+    deleted, usage = driver.form("/admin/apks/delete", {"apk_version_id": str(version_id)})
+    assert deleted.status == 200
+    _assert_within_budget(usage)
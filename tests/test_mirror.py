@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import importlib
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+
+@pytest.fixture
+def mirror_token(monkeypatch: pytest.MonkeyPatch) -> str:
+    monkeypatch.setenv("MIRROR_TOKEN", "mirror-secret")
+    return "mirror-secret"
+
+
+def _upload(client, db_mod, models, slug: str, version: str, payload: bytes) -> None:
+    client.post("/admin/apps", data={"name": slug, "slug": slug, "is_active": "on"}, follow_redirects=False)
+    db = db_mod.SessionLocal()
+    try:
+        app_type_id = db.query(models.AppType).filter(models.AppType.slug == slug).one().id
+    finally:
+        db.close()
+    client.post(
+        "/admin/apks/upload",
+        data={"app_type_id": str(app_type_id), "version": version},
+        files={"apk_file": (f"{slug}.apk", payload, "application/vnd.android.package-archive")},
+    )
+
+
+def test_mirror_pulls_missing_blobs_and_swaps_catalog(mirror_token, app_ctx, tmp_path: Path):
+    client, db_mod, models = app_ctx
+    mirror = importlib.import_module("appdownloader.mirror")
+    storage_mod = importlib.import_module("appdownloader.storage")
+    search = importlib.import_module("appdownloader.search")
+
+    client.post("/admin/login", data={"username": "admin", "password": "admin1234"}, follow_redirects=False)
+    _upload(client, db_mod, models, "plant-app", "1.0.0", b"PK\x03\x04" + b"a" * 5000)
+    _upload(client, db_mod, models, "line-app", "2.0.0", b"PK\x03\x04" + b"b" * 5000)
+    client.post("/admin/notices", data={"title": "점검 안내", "content": "주말 점검", "is_visible": "on"})
+
+    assert client.get("/api/mirror/manifest").status_code == 401
+    client.headers["Authorization"] = f"Bearer {mirror_token}"
+
+    engine = create_engine(f"sqlite:///{(tmp_path / 'mirror.db').as_posix()}")
+    models.Base.metadata.create_all(engine)
+    mirror_db = sessionmaker(bind=engine)()
+    mirror_storage = storage_mod.LocalStorage(tmp_path / "mirror-apk")
+    work_dir = tmp_path / "mirror-work"
+    work_dir.mkdir()
+
+    primary_files = client.get("/api/mirror/manifest").json()["tables"]["apk_files"]
+    partial = primary_files[0]["sha256"]
+    (work_dir / f"{partial}.part").write_bytes(b"PK\x03\x04aaaa")
+    ranges = []
+    client.event_hooks["request"] = [lambda request: ranges.append(request.headers.get("range"))]
+
+    try:
+        report = mirror.sync_from_primary(mirror_db, client, storage=mirror_storage, work_dir=work_dir)
+        assert report.blobs_fetched == 2
+        assert report.catalog_changed
+        assert "bytes=8-" in ranges
+
+        files = mirror_db.query(models.ApkFile).order_by(models.ApkFile.id).all()
+        assert [f.sha256 for f in files] == [f["sha256"] for f in primary_files]
+        for item in files:
+            assert item.stored_path == storage_mod.blob_key(item.sha256)
+            assert mirror_storage.local_path(item.stored_path).read_bytes().startswith(b"PK\x03\x04")
+        assert mirror_db.query(models.Notice).one().title == "점검 안내"
+        assert [h.title for h in search.search_catalog(mirror_db, "plant").apps] == ["plant-app"]
+
+        again = mirror.sync_from_primary(mirror_db, client, storage=mirror_storage, work_dir=work_dir)
+        assert again.blobs_fetched == 0
+        assert not again.catalog_changed
+
+        version_id = files[1].apk_version_id
+        client.post("/admin/apks/delete", data={"apk_version_id": str(version_id)})
+        pruned = mirror.sync_from_primary(mirror_db, client, storage=mirror_storage, work_dir=work_dir)
+        assert pruned.catalog_changed
+        assert pruned.blobs_pruned == 1
+        assert mirror_db.query(models.ApkVersion).count() == 1
+    finally:
+        mirror_db.close()
+        engine.dispose()
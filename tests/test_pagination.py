@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import re
+
+
+def test_app_detail_pages_versions_with_cursors(app_ctx):
+    client, db_mod, models = app_ctx
+
+    db = db_mod.SessionLocal()
+    try:
+        app_type = models.AppType(name="Paged App", slug="paged-app", is_active=True)
+        db.add(app_type)
+        db.flush()
+        for i in range(25):
+            db.add(models.ApkVersion(app_type_id=app_type.id, version=f"1.0.{i}"))
+        db.commit()
+    finally:
+        db.close()
+
+    first = client.get("/apps/paged-app")
+    assert first.status_code == 200
+    assert first.text.count("<tr>") == 21
+    assert "1.0.24" in first.text
+    assert "이전" not in first.text
+
+    next_url = re.search(r'href="(/apps/paged-app\?[^"]+direction=next)"', first.text).group(1)
+    second = client.get(next_url.replace("&amp;", "&"))
+    assert second.status_code == 200
+    assert second.text.count("<tr>") == 6
+    assert "1.0.4<" in second.text
+    assert "1.0.24" not in second.text
+    assert "이전" in second.text
+
+
+def test_app_detail_page_links_keep_requested_limit(app_ctx):
+    client, db_mod, models = app_ctx
+
+    with db_mod.SessionLocal() as db:
+        app_type = models.AppType(name="Sized App", slug="sized-app", is_active=True)
+        db.add(app_type)
+        db.flush()
+        for i in range(12):
+            db.add(models.ApkVersion(app_type_id=app_type.id, version=f"2.0.{i}"))
+        db.commit()
+
+    first = client.get("/apps/sized-app?limit=5")
+    assert first.text.count("<tr>") == 6
+    next_url = re.search(r'href="(/apps/sized-app\?[^"]+direction=next)"', first.text).group(1).replace("&amp;", "&")
+    assert "limit=5" in next_url
+
+    second = client.get(next_url)
+    assert second.text.count("<tr>") == 6
+    prev_url = re.search(r'href="(/apps/sized-app\?[^"]+direction=prev)"', second.text).group(1)
+    assert "limit=5" in prev_url
+
+
+def test_non_scalar_cursor_values_are_rejected(app_ctx):
+    client, db_mod, models = app_ctx
+    from appdownloader.pagination import encode_cursor
+
+    with db_mod.SessionLocal() as db:
+        db.add(models.AppType(name="Cursor App", slug="cursor-app", is_active=True))
+        db.commit()
+
+    response = client.get("/apps/cursor-app", params={"cursor": encode_cursor(({}, 1))})
+    assert response.status_code == 400
+    assert client.get("/apps/cursor-app", params={"cursor": encode_cursor(([1], 1))}).status_code == 400
+    assert client.get("/apps/cursor-app", params={"cursor": "garbage"}).status_code == 200
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+
+def _spin(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sampler_collapses_busy_thread_stacks():
+    from appdownloader.profiling import ProfilerBusy, SamplingProfiler
+
+    profiler = SamplingProfiler()
+    stop = threading.Event()
+    worker = threading.Thread(target=_spin, args=(stop,), name="spinner")
+    worker.start()
+    try:
+        stacks = profiler.sample(0.2, interval_ms=5)
+    finally:
+        stop.set()
+        worker.join()
+
+    spinning = [stack for stack in stacks if stack.startswith("spinner;")]
+    assert any("_spin (test_profiling.py)" in stack for stack in spinning)
+    assert not any(stack.endswith("wait (threading.py)") for stack in stacks)
+
+    with profiler._lock, pytest.raises(ProfilerBusy):
+        profiler.sample(0.01)
+
+
+def test_profile_endpoint_requires_admin(app_ctx):
+    client, db_mod, models = app_ctx
+    assert client.get("/admin/profile", follow_redirects=False).status_code == 303
+
+    client.post("/admin/login", data={"username": "admin", "password": "admin1234"}, follow_redirects=False)
+    response = client.get("/admin/profile?seconds=1&interval_ms=20&idle=1")
+    assert response.status_code == 200
+    assert response.headers["content-disposition"].endswith('.folded"')
+    assert int(response.headers["x-profile-samples"]) > 0
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in response.text.splitlines())
+
+    db = db_mod.SessionLocal()
+    try:
+        assert db.query(models.AuditLog).filter(models.AuditLog.action == "run_profiler").count() == 1
+    finally:
+        db.close()
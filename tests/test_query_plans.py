@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import re
+
+import pytest
+
+
+@pytest.fixture
+def mirror_token(monkeypatch: pytest.MonkeyPatch) -> str:
+    monkeypatch.setenv("MIRROR_TOKEN", "plan-token")
+    return "plan-token"
+
+
+def _hot_requests(client, app_type, apk_file, version, mirror_token: str) -> None:
+    home = client.get("/")
+    assert home.status_code == 200
+    token = re.search(r'data-ping="/ping/([^"]+)"', home.text).group(1)
+    detail = client.get(f"/apps/{app_type.slug}?limit=5")
+    next_page = re.search(r'href="(/apps/[^"]*direction=next)"', detail.text).group(1).replace("&amp;", "&")
+    for path in (
+        next_page,
+        "/search?q=seed",
+        f"/download/{apk_file.id}",
+        f"/d/{token}",
+        f"/blobs/{'0' * 64}/missing.apk",
+        f"/bundle?apps={app_type.slug}",
+        f"/api/apps/{app_type.slug}/latest?device=dev-1",
+    ):
+        client.get(path)
+    client.post(f"/ping/{token}")
+    client.get(f"/api/mirror/blobs/{apk_file.sha256}", headers={"Authorization": f"Bearer {mirror_token}"})
+
+    client.post("/admin/login", data={"username": "admin", "password": "admin1234"}, follow_redirects=False)
+    for path in (
+        "/admin",
+        "/admin/apps",
+        f"/admin/apps/{app_type.id}/channels",
+        "/admin/profiles",
+        "/admin/apks/upload",
+        "/admin/notices",
+        "/admin/logs",
+        "/admin/logs?kind=download",
+        f"/admin/logs.json?kind=download&app_type_id={app_type.id}",
+        "/admin/logs.json?kind=download&ip=10.0.0.1",
+        "/admin/logs.json?kind=download&ip=10.0.0.1&start=2026-01-01T00:00",
+        "/admin/logs.json?kind=audit&action=upload_apk",
+        "/admin/logs.json?kind=audit&actor_id=1",
+    ):
+        assert client.get(path).status_code == 200, path
+    client.post("/admin/apks/delete", data={"apk_version_id": str(version.id)})
+
+
+def test_hot_queries_do_not_scan_large_tables(mirror_token, app_ctx):
+    client, db_mod, models = app_ctx
+    from appdownloader.config import settings
+    from appdownloader.queryplan import capture_queries, full_scans
+    from appdownloader.seed import SeedPlan, seed_database
+
+    seed_database(
+        db_mod.engine,
+        SeedPlan(apps=10, versions_per_app=30, revisions_per_version=2, notices=50, audit_logs=5000, download_logs=20000),
+        files_root=settings.files_root,
+    )
+    db = db_mod.SessionLocal()
+    try:
+        app_type = db.query(models.AppType).order_by(models.AppType.id).first()
+        version = db.query(models.ApkVersion).filter(models.ApkVersion.app_type_id == app_type.id).first()
+        apk_file = version.current_file
+    finally:
+        db.close()
+
+    # The mirror manifest is left out on purpose: it exports every row.
+    with capture_queries(db_mod.engine) as captured:
+        _hot_requests(client, app_type, apk_file, version, mirror_token)
+    queries = captured.unique()
+    assert len(queries) > 20
+
+    with db_mod.engine.connect() as connection:
+        findings = full_scans(connection, queries)
+    assert not findings, "\n\n".join(str(finding) for finding in findings)
+
+
+def test_suggest_index_puts_filters_before_ordering():
+    from appdownloader.queryplan import suggest_index
+
+    statement = (
+        "SELECT apk_files.id FROM apk_files WHERE apk_files.sha256 = ? "
+        "ORDER BY apk_files.created_at DESC LIMIT ?"
+    )
+    assert suggest_index(statement, "apk_files") == (
+        "CREATE INDEX ix_apk_files_sha256_created_at ON apk_files (sha256, created_at)"
+    )
+
+
+def test_index_walks_are_exempt_only_when_bounded_by_the_index_order(app_ctx):
+    _client, db_mod, _models = app_ctx
+    from appdownloader.queryplan import AllowedScan, CapturedQuery, full_scans
+
+    def findings(statement: str, allowed=()) -> list[str]:
+        with db_mod.engine.connect() as connection:
+            return [f.detail for f in full_scans(connection, [CapturedQuery(statement, ())], allowed=allowed)]
+
+    ordered = "SELECT notices.id FROM notices ORDER BY notices.created_at DESC, notices.id DESC"
+    assert findings(f"{ordered} LIMIT 20") == []
+    unbounded = findings(ordered)
+    assert unbounded and "ix_notices_created_at_id" in unbounded[0]
+    filtered = (
+        "SELECT notices.id FROM notices WHERE notices.content LIKE '%x%' "
+        "ORDER BY notices.created_at DESC LIMIT 20"
+    )
+    assert findings(filtered.replace("notices.content LIKE '%x%' ", "1 = 1 ")) == []
+    assert findings(filtered)
+    assert findings("SELECT count(notices.id) AS c FROM notices")
+    reason = AllowedScan("notices", r"^SELECT count\(notices\.id\)", "test")
+    assert findings("SELECT count(notices.id) AS c FROM notices", allowed=(reason,)) == []
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from sqlalchemy import text
+
+
+def test_search_matches_apps_release_notes_and_notices(app_ctx):
+    client, db_mod, models = app_ctx
+
+    db = db_mod.SessionLocal()
+    try:
+        app_type = models.AppType(name="재고관리 앱", slug="stock", description="창고 재고 조회용", is_active=True)
+        hidden = models.AppType(name="재고 숨김 앱", slug="hidden", is_active=False)
+        db.add_all([app_type, hidden])
+        db.flush()
+        db.add(models.ApkVersion(app_type_id=app_type.id, version="3.1.0", release_note="바코드 스캐너 <오류> 수정"))
+        db.add(models.Notice(title="바코드 스캐너 교체 안내", content="구형 스캐너는 반납하세요.", is_visible=True))
+        db.add(models.Notice(title="비공개 스캐너 공지", content="내부", is_visible=False))
+        db.commit()
+
+        app_type.description = "창고 재고 실사용"
+        db.commit()
+    finally:
+        db.close()
+
+    scanner = client.get("/search", params={"q": "바코드 스캐너"})
+    assert scanner.status_code == 200
+    assert "<mark>바코드</mark>" in scanner.text
+    assert "&lt;오류&gt;" in scanner.text
+    assert "교체 안내" in scanner.text
+    assert "비공개" not in scanner.text
+
+    short = client.get("/search", params={"q": "재고"})
+    assert "/apps/stock" in short.text
+    assert "/apps/hidden" not in short.text
+
+    updated = client.get("/search", params={"q": "실사용"})
+    assert "/apps/stock" in updated.text
+    stale = client.get("/search", params={"q": "재고 조회용"})
+    assert "/apps/stock" not in stale.text
+
+
+def test_search_ranks_by_relevance_not_recency(app_ctx):
+    client, db_mod, models = app_ctx
+
+    with db_mod.SessionLocal() as db:
+        db.add(models.Notice(title="스캐너 펌웨어 스캐너 점검", content="스캐너 스캐너 스캐너", is_visible=True))
+        db.flush()
+        for i in range(150):
+            db.add(
+                models.Notice(
+                    title=f"정기 공지 {i}",
+                    content=f"이번 주 일정과 장비 반납 안내입니다. 스캐너 포함 {i}. " + "기타 안내 " * 20,
+                    is_visible=True,
+                )
+            )
+        db.commit()
+
+        from appdownloader.search import search_catalog
+
+        results = search_catalog(db, "스캐너", limit=5)
+        assert results.notices[0].title == "스캐너 펌웨어 스캐너 점검"
+
+        trigger_sql = db.execute(
+            text("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'notices_fts_au'")
+        ).scalar_one()
+        assert "AFTER UPDATE OF title, content ON notices" in trigger_sql
+
+
+def test_hidden_matches_do_not_crowd_out_visible_ones(app_ctx):
+    client, db_mod, models = app_ctx
+
+    with db_mod.SessionLocal() as db:
+        db.add_all(
+            models.Notice(title=f"스캐너 스캐너 점검 {i}", content="스캐너 스캐너 스캐너", is_visible=False)
+            for i in range(150)
+        )
+        db.add(models.Notice(title="장비 반납 안내", content="구형 스캐너는 반납하세요. " + "기타 안내 " * 30, is_visible=True))
+        db.commit()
+
+        from appdownloader.search import search_catalog
+
+        assert [hit.title for hit in search_catalog(db, "스캐너", limit=5).notices] == ["장비 반납 안내"]
+        assert [hit.title for hit in search_catalog(db, "스캐너 반납", limit=5).notices] == ["장비 반납 안내"]
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import func
+
+
+def test_seed_builds_skewed_catalog_and_logs(app_ctx, tmp_path):
+    client, db_mod, models = app_ctx
+    from appdownloader.seed import SeedPlan, seed_database
+
+    plan = SeedPlan(apps=4, versions_per_app=5, revisions_per_version=2, notices=3, audit_logs=500, download_logs=20000)
+    report = seed_database(db_mod.engine, plan, files_root=tmp_path / "apk")
+    assert report.counts == {
+        "app_types": 4,
+        "apk_versions": 20,
+        "apk_files": 40,
+        "notices": 3,
+        "audit_logs": 500,
+        "download_logs": 20000,
+    }
+    assert report.placeholder_files == 40
+
+    db = db_mod.SessionLocal()
+    try:
+        current = (
+            db.query(models.ApkFile)
+            .join(models.ApkVersion, models.ApkVersion.current_file_id == models.ApkFile.id)
+            .all()
+        )
+        assert len(current) == 20 and all(f.revision_no == 2 for f in current)
+        placeholder = tmp_path / "apk" / current[0].stored_path
+        assert placeholder.stat().st_size == current[0].file_size
+        assert placeholder.read_bytes()[:4] == b"PK\x03\x04"
+
+        per_app = dict(
+            db.query(models.DownloadLog.app_type_id, func.count()).group_by(models.DownloadLog.app_type_id).all()
+        )
+        per_file = dict(
+            db.query(models.DownloadLog.apk_file_id, func.count()).group_by(models.DownloadLog.apk_file_id).all()
+        )
+        newest = max((f for f in current if f.apk_version.app_type_id == 1), key=lambda f: f.apk_version_id)
+    finally:
+        db.close()
+
+    assert per_app[1] > 2 * per_app[4]
+    assert max(per_file, key=per_file.get) == newest.id
+    assert set(per_file) <= {f.id for f in current}
+
+    assert "Seed App 0001" in client.get("/").text
+    with pytest.raises(ValueError):
+        seed_database(db_mod.engine, plan)
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import importlib
+import os
+
+import pytest
+
+
+@pytest.fixture
+def server_env(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("APP_PORT", "9123")
+    monkeypatch.setenv("APP_LIMIT_CONCURRENCY", "64")
+    monkeypatch.setenv("APP_BACKLOG", "512")
+    monkeypatch.setenv("APP_KEEP_ALIVE_SECONDS", "15")
+    monkeypatch.setenv("APPDOWNLOADER_RUNTIME_PREPARED", "")
+
+
+def test_build_config_maps_settings(server_env, app_ctx):
+    server = importlib.import_module("appdownloader.server")
+
+    config = server.build_config(3)
+    assert (config.port, config.workers, config.backlog) == (9123, 3, 512)
+    assert config.limit_concurrency == 64
+    assert config.timeout_keep_alive == 15
+    assert config.reload is False
+    assert server.build_config().workers == 1
+
+
+def test_rolling_restart_starts_replacement_before_stopping_old_worker(server_env, app_ctx, monkeypatch):
+    server = importlib.import_module("appdownloader.server")
+    multiprocess = importlib.import_module("uvicorn.supervisors.multiprocess")
+    events = []
+
+    class FakeProcess:
+        count = 0
+
+        def __init__(self, config, target, sockets):
+            FakeProcess.count += 1
+            self.pid = FakeProcess.count
+
+        def start(self):
+            events.append(("start", self.pid))
+
+        def is_alive(self, timeout=5):
+            events.append(("alive", self.pid, timeout))
+            return True
+
+        def terminate(self):
+            events.append(("terminate", self.pid))
+
+        def join(self):
+            events.append(("join", self.pid))
+
+    monkeypatch.setattr(server, "Process", FakeProcess)
+    monkeypatch.setattr(server, "ROLLING_WARMUP_SECONDS", 0)
+    monkeypatch.setattr(multiprocess.signal, "signal", lambda *_args: None)
+
+    config = server.build_config(2)
+    supervisor = server.RollingMultiprocess(config, target=lambda sockets: None, sockets=[])
+    supervisor.processes = [FakeProcess(config, None, []), FakeProcess(config, None, [])]
+    supervisor.restart_all()
+
+    timeout = config.timeout_worker_healthcheck
+    assert events == [
+        ("start", 3), ("alive", 3, timeout), ("terminate", 1), ("join", 1),
+        ("start", 4), ("alive", 4, timeout), ("terminate", 2), ("join", 2),
+    ]  # fmt: skip
+    assert [process.pid for process in supervisor.processes] == [3, 4]
+
+
+def test_workers_skip_runtime_preparation_done_by_the_parent(server_env, app_ctx, monkeypatch):
+    main = importlib.import_module("appdownloader.main")
+    server = importlib.import_module("appdownloader.server")
+    prepared, seen_flag = [], []
+
+    monkeypatch.setattr(main, "prepare_runtime", lambda: prepared.append(True))
+    monkeypatch.setattr(server.uvicorn.Config, "bind_socket", lambda self: None)
+    monkeypatch.setattr(
+        server.RollingMultiprocess, "__init__", lambda self, config, target, sockets: None
+    )
+    monkeypatch.setattr(
+        server.RollingMultiprocess, "run", lambda self: seen_flag.append(os.environ.get(main.RUNTIME_PREPARED_ENV))
+    )
+    monkeypatch.setenv("APP_WORKERS", "1")
+
+    server.run_server(2)
+    assert prepared == [True]
+    assert seen_flag == ["1"]
+
+    main.on_startup()
+    assert prepared == [True]
+
+    monkeypatch.delenv(main.RUNTIME_PREPARED_ENV)
+    main.on_startup()
+    assert prepared == [True, True]
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import asyncio
+import importlib
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+
+@pytest.fixture
+def sqlite_sessions(monkeypatch: pytest.MonkeyPatch) -> str:
+    monkeypatch.setenv("SESSION_BACKEND", "sqlite")
+    return "sqlite"
+
+
+def _duplicate_upload(client, db_mod, models) -> None:
+    client.post("/admin/apps", data={"name": "MES", "slug": "mes", "is_active": "on"})
+    db = db_mod.SessionLocal()
+    try:
+        app_type_id = db.query(models.AppType).filter(models.AppType.slug == "mes").one().id
+    finally:
+        db.close()
+    for payload in (b"PK\x03\x04first", b"PK\x03\x04second"):
+        client.post(
+            "/admin/apks/upload",
+            data={"app_type_id": str(app_type_id), "version": "1.0.0", "release_note": "x" * 2000},
+            files={"apk_file": ("mes.apk", payload, "application/vnd.android.package-archive")},
+        )
+
+
+def test_cookie_carries_only_an_opaque_id(sqlite_sessions, app_ctx):
+    client, db_mod, models = app_ctx
+    login = client.post("/admin/login", data={"username": "admin", "password": "admin1234"}, follow_redirects=False)
+    assert "path=/admin" in login.headers["set-cookie"]
+    _duplicate_upload(client, db_mod, models)
+
+    session_id = client.cookies["session_id"]
+    assert len(session_id) < 64
+    db = db_mod.SessionLocal()
+    try:
+        stored = db.get(models.AdminSession, session_id)
+        assert "pending_overwrite" in stored.data
+    finally:
+        db.close()
+
+    token = stored.data.split('"token": "')[1].split('"')[0]
+    response = client.post("/admin/apks/overwrite", data={"token": token})
+    assert "새 리비전" in response.text
+    assert client.get("/").status_code == 200
+
+    client.post("/admin/logout")
+    db = db_mod.SessionLocal()
+    try:
+        assert db.get(models.AdminSession, session_id) is None
+    finally:
+        db.close()
+    assert client.get("/admin", follow_redirects=False).status_code == 303
+
+
+def test_reaper_removes_expired_sessions_and_their_tmp_apks(app_ctx, tmp_path: Path):
+    _client, db_mod, _models = app_ctx
+    sessions = importlib.import_module("appdownloader.sessions")
+    tmp_root = tmp_path / "reap"
+    tmp_root.mkdir()
+    pending_apk = tmp_root / "pending.apk"
+    live_apk = tmp_root / "live.apk"
+    orphan_apk = tmp_root / "orphan.apk"
+    for path in (pending_apk, live_apk, orphan_apk):
+        path.write_bytes(b"PK")
+    old = time.time() - 7200
+    os.utime(orphan_apk, (old, old))
+
+    for store in (sessions.MemorySessionStore(10), sessions.SqliteSessionStore(db_mod.SessionLocal)):
+        pending_apk.write_bytes(b"PK")
+        store.save("expired", {"pending_overwrite": {"tmp_path": str(pending_apk)}}, -1)
+        store.save("live", {"pending_overwrite": {"tmp_path": str(live_apk)}}, 3600)
+        assert store.load("expired") is None
+
+        assert sessions.reap_sessions(store, tmp_root, max_age=3600) == 1
+        assert not pending_apk.exists()
+        assert live_apk.exists()
+        assert not orphan_apk.exists()
+        assert store.load("live")["pending_overwrite"]["tmp_path"] == str(live_apk)
+
+
+def test_login_issues_a_fresh_session_id_and_store_io_leaves_the_loop(sqlite_sessions, app_ctx, monkeypatch):
+    client, db_mod, models = app_ctx
+    sessions = importlib.import_module("appdownloader.sessions")
+    on_loop: list[bool] = []
+    for name in ("load", "save", "delete"):
+        original = getattr(sessions.SqliteSessionStore, name)
+
+        def recorded(self, *args, _original=original):
+            try:
+                asyncio.get_running_loop()
+                on_loop.append(True)
+            except RuntimeError:
+                on_loop.append(False)
+            return _original(self, *args)
+
+        monkeypatch.setattr(sessions.SqliteSessionStore, name, recorded)
+
+    login = {"username": "admin", "password": "admin1234"}
+    client.post("/admin/login", data=login, follow_redirects=False)
+    planted = client.cookies["session_id"]
+    client.post("/admin/login", data=login, follow_redirects=False)
+    session_id = client.cookies["session_id"]
+
+    assert session_id != planted
+    with db_mod.SessionLocal() as db:
+        assert db.get(models.AdminSession, planted) is None
+        assert db.get(models.AdminSession, session_id) is not None
+    assert client.get("/admin", follow_redirects=False).status_code == 200
+    assert on_loop and not any(on_loop)
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import importlib
+import io
+import re
+import time
+
+from sqlalchemy import event
+
+
+def test_signed_download_tokens_skip_sql_and_honor_revocation(app_ctx):
+    client, db_mod, models = app_ctx
+    signing = importlib.import_module("appdownloader.signing")
+    download_logs = importlib.import_module("appdownloader.download_logs")
+
+    client.post("/admin/login", data={"username": "admin", "password": "admin1234"}, follow_redirects=False)
+    client.post("/admin/apps", data={"name": "signed-app", "slug": "signed-app", "is_active": "on"})
+    db = db_mod.SessionLocal()
+    try:
+        app_type_id = db.query(models.AppType).filter(models.AppType.slug == "signed-app").one().id
+    finally:
+        db.close()
+    client.post(
+        "/admin/apks/upload",
+        data={"app_type_id": str(app_type_id), "version": "3.1.0"},
+        files={"apk_file": ("signed.apk", b"PK\x03\x04signed", "application/vnd.android.package-archive")},
+    )
+
+    token = re.search(r'data-ping="/ping/([^"]+)"', client.get("/apps/signed-app").text).group(1)
+    link = f"/d/{token}"
+    assert client.get(link).content == b"PK\x03\x04signed"
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(db_mod.engine, "before_cursor_execute", listener)
+    try:
+        response = client.get(link)
+    finally:
+        event.remove(db_mod.engine, "before_cursor_execute", listener)
+    assert response.status_code == 200
+    assert response.headers["content-disposition"].endswith('"signed.apk"')
+    assert statements == []
+
+    download_logs.download_log_queue.flush()
+    db = db_mod.SessionLocal()
+    try:
+        assert db.query(models.DownloadLog).filter(models.DownloadLog.version == "3.1.0").count() == 2
+        version_id = db.query(models.ApkVersion.id).filter(models.ApkVersion.version == "3.1.0").scalar()
+    finally:
+        db.close()
+
+    payload, _, signature = token.partition(".")
+    assert client.get(f"/d/{payload}x.{signature}").status_code == 403
+    grant = signing.verify_download(token)
+    assert grant.sha256 and grant.size == 10
+    assert client.get(f"/d/{signing.sign_download(grant, expires_at=int(time.time()) - 1)}").status_code == 410
+
+    client.post("/admin/apks/delete", data={"apk_version_id": str(version_id)})
+    assert client.get(link).status_code == 410
+
+
+def test_immutable_blob_urls_and_download_ping(app_ctx):
+    client, db_mod, models = app_ctx
+    download_logs = importlib.import_module("appdownloader.download_logs")
+    storage = importlib.import_module("appdownloader.storage")
+
+    client.post("/admin/login", data={"username": "admin", "password": "admin1234"}, follow_redirects=False)
+    client.post("/admin/apps", data={"name": "blob-app", "slug": "blob-app", "is_active": "on"})
+    db = db_mod.SessionLocal()
+    try:
+        app_type_id = db.query(models.AppType).filter(models.AppType.slug == "blob-app").one().id
+    finally:
+        db.close()
+    client.post(
+        "/admin/apks/upload",
+        data={"app_type_id": str(app_type_id), "version": "1.2.0"},
+        files={"apk_file": ("블롭 앱.apk", b"PK\x03\x04immutable", "application/vnd.android.package-archive")},
+    )
+
+    page = client.get("/apps/blob-app").text
+    blob_link = re.search(r'href="(/blobs/[0-9a-f]{64}/[^"]+)"', page).group(1)
+    sha256 = blob_link.split("/")[2]
+    assert client.get(blob_link).status_code == 200
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(db_mod.engine, "before_cursor_execute", listener)
+    try:
+        response = client.get(blob_link)
+        cached = client.get(blob_link, headers={"If-None-Match": f'"{sha256}"'})
+        partial = client.get(blob_link, headers={"Range": "bytes=4-", "If-Range": f'"{sha256}"'})
+    finally:
+        event.remove(db_mod.engine, "before_cursor_execute", listener)
+    assert statements == []
+    assert response.content == b"PK\x03\x04immutable"
+    assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
+    assert response.headers["etag"] == f'"{sha256}"'
+    assert cached.status_code == 304 and cached.content == b""
+    assert partial.status_code == 206 and partial.content == b"immutable"
+    assert client.get(f"/blobs/{'0' * 64}/missing.apk").status_code == 404
+
+    download_logs.download_log_queue.flush()
+    db = db_mod.SessionLocal()
+    try:
+        assert db.query(models.DownloadLog).count() == 0
+    finally:
+        db.close()
+
+    ping = re.search(r'data-ping="(/ping/[^"]+)"', page).group(1)
+    assert client.post(ping).status_code == 204
+    assert client.post(ping).status_code == 204
+    assert client.post("/ping/bogus.token").status_code == 403
+    download_logs.download_log_queue.flush()
+    assert client.post(ping).status_code == 204
+    other_ping = re.search(r'data-ping="(/ping/[^"]+)"', client.get("/apps/blob-app").text).group(1)
+    assert other_ping != ping
+    assert client.post(other_ping).status_code == 204
+    download_logs.download_log_queue.flush()
+    db = db_mod.SessionLocal()
+    try:
+        assert db.query(models.DownloadLog).filter(models.DownloadLog.version == "1.2.0").count() == 2
+        version_id = db.query(models.ApkVersion.id).filter(models.ApkVersion.version == "1.2.0").scalar()
+    finally:
+        db.close()
+
+    client.post("/admin/apks/delete", data={"apk_version_id": str(version_id)})
+    # A copy left behind (edge cache, failed delete) must not keep the hash servable.
+    storage.get_storage().put(storage.blob_key(sha256), io.BytesIO(b"PK\x03\x04immutable"), 13)
+    assert client.get(blob_link).status_code == 404
+
+
+def test_reupload_after_delete_is_not_caught_by_old_revocation(app_ctx):
+    client, db_mod, models = app_ctx
+
+    client.post("/admin/login", data={"username": "admin", "password": "admin1234"}, follow_redirects=False)
+    client.post("/admin/apps", data={"name": "reuse-app", "slug": "reuse-app", "is_active": "on"})
+    with db_mod.SessionLocal() as db:
+        app_type_id = db.query(models.AppType).filter(models.AppType.slug == "reuse-app").one().id
+
+    def upload(payload: bytes) -> tuple[int, int]:
+        client.post(
+            "/admin/apks/upload",
+            data={"app_type_id": str(app_type_id), "version": "1.0.0"},
+            files={"apk_file": ("reuse.apk", payload, "application/vnd.android.package-archive")},
+        )
+        with db_mod.SessionLocal() as db:
+            version = db.query(models.ApkVersion).filter(models.ApkVersion.app_type_id == app_type_id).one()
+            return version.id, version.current_file_id
+
+    version_id, old_file_id = upload(b"PK\x03\x04old")
+    old_link = "/d/" + re.search(r'data-ping="/ping/([^"]+)"', client.get("/apps/reuse-app").text).group(1)
+    client.post("/admin/apks/delete", data={"apk_version_id": str(version_id)})
+    assert client.get(old_link).status_code == 410
+
+    _version_id, new_file_id = upload(b"PK\x03\x04old")
+    assert new_file_id != old_file_id
+    new_link = "/d/" + re.search(r'data-ping="/ping/([^"]+)"', client.get("/apps/reuse-app").text).group(1)
+    response = client.get(new_link)
+    assert response.status_code == 200
+    assert response.content == b"PK\x03\x04old"
+    assert client.get(old_link).status_code == 410
@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+import importlib
+import hashlib
+import hmac
+import io
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from urllib.parse import quote
+
+import httpx
+import pytest
+
+
+def _fake_object_store(objects: dict[str, bytes]) -> httpx.MockTransport:
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.headers["authorization"].startswith("AWS4-HMAC-SHA256 Credential=key/")
+        path = request.url.path
+        if request.method == "PUT":
+            objects[path] = request.read()
+            return httpx.Response(200)
+        if path not in objects:
+            return httpx.Response(404)
+        body = objects[path]
+        if request.method == "HEAD":
+            return httpx.Response(200, headers={"content-length": str(len(body))})
+        if request.method == "DELETE":
+            del objects[path]
+            return httpx.Response(204)
+        found = re.match(r"bytes=(\d+)-(\d*)", request.headers.get("range", ""))
+        if found:
+            start = int(found.group(1))
+            end = int(found.group(2)) + 1 if found.group(2) else len(body)
+            return httpx.Response(206, content=body[start:end])
+        return httpx.Response(200, content=body)
+
+    return httpx.MockTransport(handler)
+
+
+def test_object_store_adapter_and_cache(app_ctx, tmp_path: Path):
+    storage = importlib.import_module("appdownloader.storage")
+
+    objects: dict[str, bytes] = {}
+    remote = storage.S3Storage(
+        "http://minio.local:9000",
+        "apks",
+        "key",
+        "secret",
+        client=httpx.Client(transport=_fake_object_store(objects)),
+    )
+    key = storage.blob_key("ab" * 32)
+    remote.put(key, io.BytesIO(b"PK" + b"x" * 98), 100)
+    assert f"/apks/ab/ab/{'ab' * 32}" in objects
+    assert remote.stat(key).size == 100
+    assert b"".join(remote.open_range(key, 10, 20)) == b"x" * 10
+    assert remote.local_path(key) is None
+
+    cached = storage.CachedStorage(remote, tmp_path / "cache", max_bytes=150)
+    other = storage.blob_key("cd" * 32)
+    cached.put(other, io.BytesIO(b"y" * 100), 100)
+
+    assert cached.fetch(key).read_bytes().startswith(b"PK")
+    assert cached.fetch(other).read_bytes() == b"y" * 100
+    assert cached.cached_bytes == 100
+    assert not (tmp_path / "cache" / key).exists()
+
+    cached.delete(other)
+    assert remote.stat(other) is None
+    assert cached.cached_bytes == 0
+
+
+def test_download_serves_legacy_absolute_paths_and_ranges(app_ctx, tmp_path: Path):
+    client, db_mod, models = app_ctx
+    public = importlib.import_module("appdownloader.routes.public")
+    storage = importlib.import_module("appdownloader.storage")
+
+    legacy_file = tmp_path / "legacy" / "old.apk"
+    legacy_file.parent.mkdir()
+    legacy_file.write_bytes(b"PK\x03\x04legacy")
+
+    db = db_mod.SessionLocal()
+    try:
+        app_type = models.AppType(name="Legacy", slug="legacy", is_active=True)
+        db.add(app_type)
+        db.flush()
+        version = models.ApkVersion(app_type_id=app_type.id, version="0.1")
+        db.add(version)
+        db.flush()
+        apk = models.ApkFile(
+            apk_version_id=version.id,
+            revision_no=1,
+            stored_path=str(legacy_file),
+            original_filename="old.apk",
+            file_size=10,
+            sha256="0" * 64,
+            is_current=True,
+        )
+        db.add(apk)
+        db.commit()
+        file_id = apk.id
+    finally:
+        db.close()
+
+    response = client.get(f"/download/{file_id}")
+    assert response.status_code == 200
+    assert response.content == b"PK\x03\x04legacy"
+
+    local = storage.LocalStorage(tmp_path / "blobs")
+    local.put("aa/bb/blob", io.BytesIO(b"0123456789"))
+    request = type("Req", (), {"headers": {"range": "bytes=2-5"}})()
+    ranged = public.stream_blob(local, "aa/bb/blob", "x.apk", request)
+    assert ranged.status_code == 206
+    assert ranged.headers["content-range"] == "bytes 2-5/10"
+
+
+def _verify_sigv4(request: httpx.Request, access_key: str, secret_key: str, region: str) -> bool:
+    # Recomputed from the request as it went over the wire, following the
+    # AWS Signature Version 4 spec rather than the adapter's own helper.
+    found = re.fullmatch(
+        r"AWS4-HMAC-SHA256 Credential=(?P<key>[^/]+)/(?P<date>\d{8})/(?P<region>[^/]+)/s3/aws4_request, "
+        r"SignedHeaders=(?P<signed>[a-z0-9;-]+), Signature=(?P<signature>[0-9a-f]{64})",
+        request.headers["authorization"],
+    )
+    if not found or found["key"] != access_key or found["region"] != region:
+        return False
+    amz_date = request.headers["x-amz-date"]
+    signed_at = datetime.strptime(amz_date, "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc)
+    if not amz_date.startswith(found["date"]) or abs(datetime.now(timezone.utc) - signed_at) > timedelta(minutes=15):
+        return False
+    signed = found["signed"].split(";")
+    if "host" not in signed or request.headers["x-amz-content-sha256"] != "UNSIGNED-PAYLOAD":
+        return False
+    canonical = "\n".join(
+        [
+            request.method,
+            quote(request.url.path, safe="/-_.~"),
+            request.url.query.decode(),
+            "".join(f"{name}:{request.headers[name].strip()}\n" for name in signed),
+            ";".join(signed),
+            "UNSIGNED-PAYLOAD",
+        ]
+    )
+    scope = f"{found['date']}/{region}/s3/aws4_request"
+    string_to_sign = f"AWS4-HMAC-SHA256\n{amz_date}\n{scope}\n{hashlib.sha256(canonical.encode()).hexdigest()}"
+    key = f"AWS4{secret_key}".encode()
+    for part in (found["date"], region, "s3", "aws4_request"):
+        key = hmac.new(key, part.encode(), hashlib.sha256).digest()
+    expected = hmac.new(key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, found["signature"])
+
+
+def test_object_store_requests_are_signed_and_errors_surface(app_ctx):
+    storage = importlib.import_module("appdownloader.storage")
+
+    objects: dict[str, bytes] = {}
+    failures: dict[tuple[str, str], int] = {}
+    store = _fake_object_store(objects)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if not _verify_sigv4(request, "key", "secret", "ap-northeast-2"):
+            return httpx.Response(403)
+        status = failures.get((request.method, request.url.path))
+        if status:
+            return httpx.Response(status)
+        return store.handle_request(request)
+
+    def adapter(secret: str = "secret"):
+        return storage.S3Storage(
+            "http://minio.local:9000",
+            "apks",
+            "key",
+            secret,
+            region="ap-northeast-2",
+            client=httpx.Client(transport=httpx.MockTransport(handler)),
+        )
+
+    remote = adapter()
+    key = storage.blob_key("ef" * 32)
+    remote.put(key, io.BytesIO(b"PK\x03\x04signed"), 10)
+    assert remote.stat(key).size == 10
+    assert b"".join(remote.open_range(key, 4, 10)) == b"signed"
+    assert remote.stat(storage.blob_key("00" * 32)) is None
+    remote.delete(storage.blob_key("00" * 32))
+
+    with pytest.raises(storage.StorageError, match="403"):
+        adapter("wrong-secret").stat(key)
+
+    path = f"/apks/{key}"
+    failures[("PUT", path)] = 503
+    with pytest.raises(storage.StorageError, match="PUT .* 503"):
+        remote.put(key, io.BytesIO(b"PK"), 2)
+    failures[("HEAD", path)] = 500
+    with pytest.raises(storage.StorageError, match="HEAD .* 500"):
+        remote.stat(key)
+    failures[("GET", path)] = 404
+    with pytest.raises(storage.StorageError, match="GET .* 404"):
+        b"".join(remote.get(key))
+    failures[("DELETE", path)] = 500
+    with pytest.raises(storage.StorageError, match="DELETE .* 500"):
+        remote.delete(key)
+
+
+def test_cache_miss_streams_from_backend_and_eviction_keeps_open_paths(app_ctx, tmp_path: Path):
+    storage = importlib.import_module("appdownloader.storage")
+
+    objects: dict[str, bytes] = {}
+    remote = storage.S3Storage(
+        "http://minio.local:9000",
+        "apks",
+        "key",
+        "secret",
+        client=httpx.Client(transport=_fake_object_store(objects)),
+    )
+    first = storage.blob_key("11" * 32)
+    second = storage.blob_key("22" * 32)
+    remote.put(first, io.BytesIO(b"a" * 100), 100)
+    remote.put(second, io.BytesIO(b"b" * 100), 100)
+
+    cached = storage.CachedStorage(remote, tmp_path / "cache", max_bytes=150)
+    cached.EVICTION_GRACE_SECONDS = 0.2
+    assert cached.local_path(first) is None
+    assert b"".join(cached.get(first)) == b"a" * 100
+    deadline = time.monotonic() + 5
+    while cached.local_path(first) is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    served = cached.local_path(first)
+    assert served is not None
+
+    with served.open("rb") as response_body:
+        cached.fetch(second)
+        assert not served.exists()
+        assert cached.cached_bytes == 100
+        assert response_body.read() == b"a" * 100
+
+    time.sleep(0.3)
+    cached.fetch(second)
+    assert not list((tmp_path / "cache").rglob("*.evicted"))
+
+
+def test_cached_stat_and_exists_do_not_hit_the_backend(app_ctx, tmp_path: Path):
+    storage = importlib.import_module("appdownloader.storage")
+
+    objects: dict[str, bytes] = {}
+    remote = storage.S3Storage(
+        "http://minio.local:9000",
+        "apks",
+        "key",
+        "secret",
+        client=httpx.Client(transport=_fake_object_store(objects)),
+    )
+    key = storage.blob_key("33" * 32)
+    missing = storage.blob_key("44" * 32)
+    remote.put(key, io.BytesIO(b"c" * 100), 100)
+    cached = storage.CachedStorage(remote, tmp_path / "cache", max_bytes=1000)
+    cached.fetch(key)
+
+    objects.clear()
+    assert cached.stat(key).size == 100
+    assert cached.exists(key)
+    assert cached.stat(missing) is None
+    assert not cached.exists(missing)
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import json
+import time
+
+import pytest
+
+
+@pytest.fixture
+def traced(tmp_path, monkeypatch: pytest.MonkeyPatch) -> float:
+    monkeypatch.setenv("TRACE_SAMPLE_RATE", "1")
+    monkeypatch.setenv("TRACE_DIR", (tmp_path / "traces").as_posix())
+    return 1.0
+
+
+def test_exporter_rotates_and_keeps_backups(tmp_path):
+    from appdownloader.tracing import JsonlExporter
+
+    exporter = JsonlExporter(tmp_path, max_bytes=400, backups=2)
+    for index in range(30):
+        exporter.write({"trace_id": str(index), "duration_ms": float(index), "spans": [], "pad": "x" * 100})
+
+    assert [path.name for path in exporter.files()] == ["traces.jsonl", "traces.1.jsonl", "traces.2.jsonl"]
+    assert all(path.stat().st_size <= 400 for path in exporter.files())
+    assert [record["trace_id"] for record in exporter.slowest(2)] == ["29", "28"]
+
+
+def test_sampled_requests_record_nested_spans(traced, app_ctx):
+    client, db_mod, models = app_ctx
+    from appdownloader.tracing import trace_exporter
+
+    client.post("/admin/login", data={"username": "admin", "password": "admin1234"}, follow_redirects=False)
+    client.post("/admin/apps", data={"name": "MES", "slug": "mes", "is_active": "on"})
+    db = db_mod.SessionLocal()
+    try:
+        app_type_id = db.query(models.AppType).filter(models.AppType.slug == "mes").one().id
+    finally:
+        db.close()
+    client.post(
+        "/admin/apks/upload",
+        data={"app_type_id": str(app_type_id), "version": "1.0.0"},
+        files={"apk_file": ("mes.apk", b"PK\x03\x04trace", "application/zip")},
+    )
+    db = db_mod.SessionLocal()
+    try:
+        file_id = db.query(models.ApkFile).one().id
+    finally:
+        db.close()
+
+    assert client.get("/").status_code == 200
+    assert client.get(f"/download/{file_id}").status_code == 200
+    trace_exporter.flush()
+
+    records = {}
+    for path in trace_exporter.files():
+        for line in path.read_text(encoding="utf-8").splitlines():
+            record = json.loads(line)
+            records[record["name"]] = record
+
+    home = records["GET /"]
+    kinds = {item["kind"] for item in home["spans"]}
+    assert {"route", "sql", "template"} <= kinds
+    root = next(item for item in home["spans"] if item["id"] == 0)
+    assert root["attrs"]["status"] == 200 and "first_byte_ms" in root["attrs"]
+    assert all(item["parent"] == 0 or item["id"] == 0 for item in home["spans"] if item["kind"] == "template")
+
+    download = records["GET /download/{file_id}"]
+    assert {"sql", "file"} <= {item["kind"] for item in download["spans"]}
+    assert any(item["kind"] == "session" for item in records["POST /admin/apks/upload"]["spans"])
+
+    page = client.get("/admin/traces")
+    assert page.status_code == 200
+    assert "GET /download/{file_id}" in page.text
+    assert 'class="bar sql"' in page.text
+
+
+def test_storage_spans_cover_the_whole_stream(tmp_path):
+    from appdownloader import tracing
+    from appdownloader.storage import LocalStorage, TracedStorage
+
+    class SlowStorage(LocalStorage):
+        def get(self, key):
+            for chunk in super().get(key):
+                time.sleep(0.05)
+                yield chunk
+
+    source = tmp_path / "src.bin"
+    source.write_bytes(b"x" * 1000)
+    backend = SlowStorage(tmp_path / "blobs")
+    backend.put_file("ab/blob", source)
+    storage = TracedStorage(backend)
+
+    trace = tracing.Trace(name="GET /blob")
+    token = tracing._current_trace.set(trace)
+    try:
+        chunks = storage.get("ab/blob")
+    finally:
+        tracing._current_trace.reset(token)
+    assert trace.spans == []
+
+    assert b"".join(chunks) == b"x" * 1000
+    [item] = trace.spans
+    assert item["name"] == "storage.open" and item["kind"] == "file"
+    assert item["attrs"]["bytes"] == 1000
+    assert item["duration_ms"] >= 40
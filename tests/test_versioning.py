@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import re
+
+
+def test_version_key_orders_semantically():
+    from appdownloader.versioning import version_key
+
+    ordered = [
+        "0.9",
+        "1.0.0-alpha",
+        "1.0.0-alpha.1",
+        "1.0.0-beta.2",
+        "1.0.0-beta.11",
+        "1.0.0-rc.1",
+        "1.0.0",
+        "1.0.0.1",
+        "1.2.3",
+        "1.10",
+        "2.0.0-rc1",
+        "v2.0.1",
+        "2024.01.15",
+        "9999999999",
+        "20261019123",
+        "20261019123.1",
+    ]
+    assert sorted(reversed(ordered), key=version_key) == ordered
+    assert version_key("1.0") == version_key("1.0.0")
+    assert version_key("1.0.0-rc.9") < version_key("1.0.0-rc.10000000000")
+
+
+def test_latest_is_highest_version_not_newest_upload(app_ctx):
+    client, db_mod, models = app_ctx
+    client.post("/admin/login", data={"username": "admin", "password": "admin1234"}, follow_redirects=False)
+    client.post("/admin/apps", data={"name": "MES", "slug": "mes", "is_active": "on"})
+    db = db_mod.SessionLocal()
+    try:
+        app_type_id = db.query(models.AppType).filter(models.AppType.slug == "mes").one().id
+    finally:
+        db.close()
+    for version in ("1.9.0", "1.10.0", "1.10.1-rc.1", "1.2.5"):
+        client.post(
+            "/admin/apks/upload",
+            data={"app_type_id": str(app_type_id), "version": version},
+            files={"apk_file": (f"mes-{version}.apk", b"PK\x03\x04" + version.encode(), "application/zip")},
+        )
+
+    assert "1.10.1-rc.1" in client.get("/").text
+
+    detail = client.get("/apps/mes?limit=2")
+    assert re.findall(r"<td>(1\.[\d.]+(?:-rc\.1)?)</td>", detail.text) == ["1.10.1-rc.1", "1.10.0"]
+    next_page = re.search(r'href="(/apps/mes\?[^"]*direction=next)"', detail.text).group(1).replace("&amp;", "&")
+    assert re.findall(r"<td>(1\.[\d.]+)</td>", client.get(next_page).text) == ["1.9.0", "1.2.5"]